@@ -4,6 +4,7 @@ import base64
 import binascii
 import hashlib
 import hmac
+import threading
 import time
 import urllib.parse
 from dataclasses import dataclass
@@ -18,6 +19,57 @@ class KrakenFuturesKeys:
     api_secret: str
 
 
+# Kraken Futures meters private /derivatives calls against a per-key budget (500 cost units per
+# 10 seconds); going over it gets requests rejected. Costs below are Kraken's published ones for
+# the endpoints this client uses; anything else counts as 1.
+_PRIVATE_BUDGET = 500.0
+_PRIVATE_BUDGET_WINDOW_S = 10.0
+_PRIVATE_COSTS: dict[str, float] = {
+    "/derivatives/api/v3/accounts": 2.0,
+    "/derivatives/api/v3/openpositions": 2.0,
+}
+
+
+class _CostBucket:
+    """Thread-safe token bucket: acquire() blocks until `cost` units are available."""
+
+    def __init__(self, *, capacity: float, refill_per_s: float) -> None:
+        self._capacity = float(capacity)
+        self._refill_per_s = float(refill_per_s)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: float) -> None:
+        cost = min(float(cost), self._capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._refill_per_s)
+                self._updated = now
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return
+                wait_s = (cost - self._tokens) / self._refill_per_s
+            time.sleep(wait_s)
+
+
+# One bucket per (base_url, api_key): clients are created per tick/thread, the budget is per key.
+_PRIVATE_BUCKETS: dict[tuple[str, str], _CostBucket] = {}
+_PRIVATE_BUCKETS_LOCK = threading.Lock()
+
+
+def _private_bucket(base_url: str, api_key: str) -> _CostBucket:
+    key = (base_url, api_key)
+    with _PRIVATE_BUCKETS_LOCK:
+        bucket = _PRIVATE_BUCKETS.get(key)
+        if bucket is None:
+            bucket = _PRIVATE_BUCKETS[key] = _CostBucket(
+                capacity=_PRIVATE_BUDGET, refill_per_s=_PRIVATE_BUDGET / _PRIVATE_BUDGET_WINDOW_S
+            )
+        return bucket
+
+
 class KrakenFuturesApi:
     """Minimal Kraken Futures (derivatives) API client.
 
@@ -99,6 +151,8 @@ class KrakenFuturesApi:
             if not self._keys:
                 raise RuntimeError("Private request requires keys")
 
+            # Wait for budget before taking the nonce (nonces must stay increasing per key).
+            _private_bucket(self._base_url, self._keys.api_key).acquire(_PRIVATE_COSTS.get(endpoint, 1.0))
             nonce = str(int(time.time() * 1000))
             if data:
                 postdata = urllib.parse.urlencode(data)
@@ -138,6 +192,10 @@ class KrakenFuturesApi:
         result = self._request(method="GET", endpoint="/derivatives/api/v3/tickers")
         return list(result.get("tickers", []) or [])
 
+    def get_tickers_by_symbol(self) -> dict[str, dict[str, Any]]:
+        """All tickers from one /tickers call, keyed by symbol (for looking up many symbols)."""
+        return {str(t["symbol"]): t for t in self.get_tickers() if t.get("symbol")}
+
     def get_ticker(self, symbol: str) -> dict[str, Any]:
         tickers = self.get_tickers()
         for t in tickers:
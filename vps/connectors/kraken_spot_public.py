@@ -22,10 +22,10 @@ class KrakenSpotPublic:
 
     BASE = "https://api.kraken.com/0/public"
 
-    def __init__(self, *, base_url: str | None = None, timeout_s: float = 10.0) -> None:
+    def __init__(self, *, base_url: str | None = None, timeout_s: float = 10.0, session: requests.Session | None = None) -> None:
         self.base_url = (base_url or self.BASE).rstrip("/")
         self.timeout_s = timeout_s
-        self._sess = requests.Session()
+        self._sess = session or requests.Session()
 
     def now_utc(self) -> datetime:
         return datetime.now(timezone.utc)
@@ -29,6 +29,12 @@ class PolymarketClobPublic:
         resp.raise_for_status()
         return resp.json()
 
+    def _post(self, path: str, *, json_body: Any) -> Any:
+        url = f"{self._base_url}{path}"
+        resp = self._sess.post(url, json=json_body, timeout=self._timeout_s)
+        resp.raise_for_status()
+        return resp.json()
+
     def get_market(self, market_id: str) -> dict[str, Any]:
         data = self._get(f"/markets/{market_id}")
         if isinstance(data, dict):
@@ -42,39 +48,57 @@ class PolymarketClobPublic:
             return cast(dict[str, Any], data)
         return {"data": data}
 
+    def get_orderbooks(self, token_ids: list[str], *, batch_size: int = 100) -> dict[str, dict[str, Any]]:
+        """Fetch several books with one POST /books round-trip per `batch_size` tokens.
+
+        Returns books keyed by token id (the book's asset_id). Tokens without a book are absent,
+        so callers can fall back to get_orderbook() for anything missing.
+        """
+        out: dict[str, dict[str, Any]] = {}
+        uniq = list(dict.fromkeys(t for t in token_ids if t))
+        step = max(1, int(batch_size))
+        for i in range(0, len(uniq), step):
+            data = self._post("/books", json_body=[{"token_id": t} for t in uniq[i : i + step]])
+            if not isinstance(data, list):
+                continue
+            for book_any in cast(list[Any], data):
+                if not isinstance(book_any, dict):
+                    continue
+                book = cast(dict[str, Any], book_any)
+                tok = str(book.get("asset_id") or book.get("token_id") or "")
+                if tok:
+                    out[tok] = book
+        return out
+
 
 def best_bid_ask(orderbook: dict[str, Any]) -> tuple[float | None, float | None]:
     """Extract best bid/ask from CLOB /book response if present."""
 
-    bids = orderbook.get("bids")
-    asks = orderbook.get("asks")
+    bid = _best_price(orderbook.get("bids"), best_is_max=True)
+    ask = _best_price(orderbook.get("asks"), best_is_max=False)
+    return bid, ask
 
-    def _prices(side: Any) -> list[float]:
-        if not isinstance(side, list):
-            return []
-        side_list = cast(list[Any], side)
-        out: list[float] = []
-        for level_any in side_list:
-            if not isinstance(level_any, dict):
-                continue
-            level = cast(dict[str, Any], level_any)
-            px_any: Any | None = None
-            if "price" in level:
-                px_any = level.get("price")
-            elif "p" in level:
-                px_any = level.get("p")
-            if px_any is None:
-                continue
-            try:
-                px = float(px_any)
-            except Exception:
-                continue
-            if px > 0:
-                out.append(px)
-        return out
 
-    bid_prices = _prices(bids)
-    ask_prices = _prices(asks)
-    bid = max(bid_prices) if bid_prices else None
-    ask = min(ask_prices) if ask_prices else None
-    return bid, ask
+def _best_price(side: Any, *, best_is_max: bool) -> float | None:
+    """Single pass over one book side: best positive price, without building a price list."""
+    if not isinstance(side, list):
+        return None
+    best: float | None = None
+    levels: list[Any] = side
+    for level_any in levels:
+        if not isinstance(level_any, dict):
+            continue
+        # Declared binding instead of cast(): isinstance() already narrowed it, and this runs per level.
+        level: dict[str, Any] = level_any
+        px_any = level["price"] if "price" in level else level.get("p")
+        if px_any is None:
+            continue
+        try:
+            px = float(px_any)
+        except Exception:
+            continue
+        if px <= 0:
+            continue
+        if best is None or (px > best if best_is_max else px < best):
+            best = px
+    return best
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable, cast
+
+
+def _require_websocket_client() -> Any:
+    try:
+        import websocket  # type: ignore
+
+        return websocket
+    except Exception as e:  # pragma: no cover
+        raise RuntimeError(
+            "Missing dependency 'websocket-client'. Install it on the VPS (pip install websocket-client). "
+            "This is required for the Polymarket market-channel orderbook feed."
+        ) from e
+
+
+def _join_market_url(base: str) -> str:
+    b = (base or "").strip().rstrip("/")
+    if not b:
+        return ""
+    # Accept both base like .../ws/ and already-targeted .../ws/market (or the user-channel URL).
+    if b.endswith("/market"):
+        return b
+    if b.endswith("/user"):
+        return b[: -len("/user")] + "/market"
+    if b.endswith("/ws"):
+        return b + "/market"
+    if "/ws" not in b:
+        return b + "/ws/market"
+    return b + "/market"
+
+
+@dataclass
+class _Book:
+    bids: dict[str, str] = field(default_factory=lambda: cast(dict[str, str], {}))
+    asks: dict[str, str] = field(default_factory=lambda: cast(dict[str, str], {}))
+    updated_at: float = 0.0
+    generation: int = 0
+
+
+def _price_sort_key(p: str) -> float:
+    try:
+        return float(p)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _price_key(p: Any) -> str:
+    # Snapshots and deltas may format the same level differently ("0.5" vs "0.50").
+    try:
+        return repr(float(p))
+    except (TypeError, ValueError):
+        return str(p)
+
+
+class PolymarketMarketWssClient:
+    """Background market-channel websocket that keeps local orderbooks for watched tokens.
+
+    Books are rebuilt from `book` snapshots and kept current with `price_change` deltas.
+    get_books() returns them in the REST /book shape, so callers can use them in place of
+    a fetch and fall back to REST for anything missing or stale.
+    """
+
+    def __init__(self, *, wss_url: str, status_sink: dict[str, Any] | None = None) -> None:
+        self._url = _join_market_url(wss_url)
+        self._status = status_sink if status_sink is not None else {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._tokens: set[str] = set()
+        self._books: dict[str, _Book] = {}
+        # Bumped on every (re)connect; books from an older connection are never served.
+        self._generation = 0
+        self._open = False
+        self._app: Any | None = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        # Fail here (caller falls back to REST) rather than inside the thread.
+        _require_websocket_client()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pm_market_wss", daemon=True)
+        self._thread.start()
+
+    def stop(self, *, timeout_s: float = 2.0) -> None:
+        self._stop.set()
+        self._close_app()
+        t = self._thread
+        if t:
+            t.join(timeout=float(timeout_s))
+
+    def status(self) -> dict[str, Any]:
+        return dict(self._status)
+
+    def watch(self, token_ids: Iterable[str]) -> None:
+        """Add tokens to the subscription; new tokens trigger a resubscribe (reconnect)."""
+        new = {str(t) for t in token_ids if t} - self._tokens
+        if not new:
+            return
+        with self._lock:
+            # Rebind rather than mutate: the ws thread reads the set without the lock.
+            self._tokens = self._tokens | new
+        self._status["tokens"] = len(self._tokens)
+        self._close_app()
+
+    def get_books(self, token_ids: Iterable[str], *, max_age_s: float) -> dict[str, dict[str, Any]]:
+        """Books for the given tokens that were updated on the live connection within max_age_s."""
+        out: dict[str, dict[str, Any]] = {}
+        now = time.monotonic()
+        with self._lock:
+            if not self._open:
+                return out
+            for tok in token_ids:
+                book = self._books.get(tok)
+                if book is None or book.generation != self._generation:
+                    continue
+                if max_age_s > 0 and (now - book.updated_at) > max_age_s:
+                    continue
+                out[tok] = {
+                    "asset_id": tok,
+                    # Same ordering as REST /book: best bid and best ask last.
+                    "bids": [{"price": p, "size": s} for p, s in sorted(book.bids.items(), key=lambda kv: _price_sort_key(kv[0]))],
+                    "asks": [
+                        {"price": p, "size": s}
+                        for p, s in sorted(book.asks.items(), key=lambda kv: _price_sort_key(kv[0]), reverse=True)
+                    ],
+                }
+        return out
+
+    def _close_app(self) -> None:
+        app = self._app
+        if app is not None:
+            try:
+                app.close()
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        websocket = _require_websocket_client()
+
+        if not self._url:
+            self._status.update({"ok": False, "error": "missing_wss_url"})
+            return
+
+        backoff_s = 1.0
+        while not self._stop.is_set():
+            tokens = sorted(self._tokens)
+            if not tokens:
+                # Nothing to subscribe to yet; the agent calls watch() once it knows its tokens.
+                self._stop.wait(0.5)
+                continue
+            try:
+                self._status.update({"ok": False, "url": self._url, "state": "connecting", "error": None})
+
+                def on_open(ws: Any) -> None:
+                    nonlocal backoff_s
+                    backoff_s = 1.0
+                    with self._lock:
+                        self._generation += 1
+                        self._open = True
+                    self._status.update({"ok": True, "state": "open", "connected_at": time.time(), "tokens": len(tokens)})
+                    try:
+                        ws.send(json.dumps({"assets_ids": tokens, "type": "market"}))
+                        self._status.update({"subscribed": True, "subscribe_error": None})
+                    except Exception as e:
+                        self._status.update({"subscribed": False, "subscribe_error": str(e)})
+
+                def on_message(ws: Any, message: str) -> None:
+                    try:
+                        payload: Any = json.loads(message)
+                    except Exception:
+                        return
+                    events = cast(list[Any], payload) if isinstance(payload, list) else [payload]
+                    for ev in events:
+                        if isinstance(ev, dict):
+                            self._apply_event(cast(dict[str, Any], ev))
+
+                def on_error(ws: Any, error: Any) -> None:
+                    self._status.update({"ok": False, "state": "error", "error": str(error)})
+
+                def on_close(ws: Any, status_code: Any, msg: Any) -> None:
+                    with self._lock:
+                        self._open = False
+                    self._status.update({"ok": False, "state": "closed", "close_code": status_code, "close_msg": str(msg)})
+
+                app = websocket.WebSocketApp(self._url, on_open=on_open, on_message=on_message, on_error=on_error, on_close=on_close)
+                self._app = app
+
+                # Keep-alives
+                app.run_forever(ping_interval=30, ping_timeout=10)
+
+            except Exception as e:
+                self._status.update({"ok": False, "state": "exception", "error": str(e)})
+            finally:
+                self._app = None
+                with self._lock:
+                    self._open = False
+
+            if self._stop.is_set():
+                break
+
+            # A watch() resubscribe closes the socket on purpose: reconnect right away.
+            if sorted(self._tokens) != tokens:
+                continue
+
+            # simple reconnect backoff
+            time.sleep(backoff_s)
+            backoff_s = min(backoff_s * 1.7, 30.0)
+
+    def _apply_event(self, ev: dict[str, Any]) -> None:
+        event_type = str(ev.get("event_type") or ev.get("type") or "").strip().lower()
+        now = time.monotonic()
+        if event_type == "book":
+            tok = str(ev.get("asset_id") or "")
+            if not tok:
+                return
+            book = _Book(
+                bids=_levels_to_map(ev.get("bids", ev.get("buys"))),
+                asks=_levels_to_map(ev.get("asks", ev.get("sells"))),
+                updated_at=now,
+            )
+            with self._lock:
+                book.generation = self._generation
+                self._books[tok] = book
+            self._status["last_book_at"] = time.time()
+        elif event_type == "price_change":
+            # Older shape: {asset_id, changes: [...]}; newer: {price_changes: [{asset_id, ...}]}.
+            changes: list[tuple[str, Any]] = []
+            nested = ev.get("price_changes")
+            if isinstance(nested, list):
+                for ch in cast(list[Any], nested):
+                    if isinstance(ch, dict):
+                        ch_d = cast(dict[str, Any], ch)
+                        changes.append((str(ch_d.get("asset_id") or ""), ch_d))
+            flat = ev.get("changes")
+            if isinstance(flat, list):
+                tok = str(ev.get("asset_id") or "")
+                for ch in cast(list[Any], flat):
+                    if isinstance(ch, dict):
+                        changes.append((tok, ch))
+            with self._lock:
+                for tok, ch_any in changes:
+                    book = self._books.get(tok)
+                    # Deltas only apply on top of a snapshot from the same connection.
+                    if book is None or book.generation != self._generation:
+                        continue
+                    ch_d = cast(dict[str, Any], ch_any)
+                    side = str(ch_d.get("side") or "").strip().upper()
+                    levels = book.bids if side == "BUY" else book.asks if side == "SELL" else None
+                    price = ch_d.get("price")
+                    if levels is None or price is None:
+                        continue
+                    price_s = _price_key(price)
+                    size_s = str(ch_d.get("size") or "0")
+                    if _price_sort_key(size_s) <= 0:
+                        levels.pop(price_s, None)
+                    else:
+                        levels[price_s] = size_s
+                    book.updated_at = now
+
+
+def _levels_to_map(levels: Any) -> dict[str, str]:
+    out: dict[str, str] = {}
+    if not isinstance(levels, list):
+        return out
+    for level in cast(list[Any], levels):
+        if not isinstance(level, dict):
+            continue
+        lv = cast(dict[str, Any], level)
+        price = lv.get("price")
+        if price is None:
+            continue
+        out[_price_key(price)] = str(lv.get("size") or "0")
+    return out
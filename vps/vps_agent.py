@@ -3,28 +3,90 @@ from __future__ import annotations
 # pyright: reportUnusedImport=false, reportUnusedVariable=false, reportUnusedFunction=false
 
 import csv
+import gzip
+import hashlib
 import json
 import os
+import queue
 import time
 import threading
 import urllib.parse
 import zipfile
 import io
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import socket
+import ssl
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from collections import Counter, deque
+from operator import itemgetter
 from dataclasses import dataclass, field
+from statistics import median_high
 from datetime import datetime, timezone, timedelta
-from ftplib import FTP
+from ftplib import FTP, FTP_TLS
 from pathlib import Path
-from typing import Any, cast
+from typing import Any, Callable, Iterator, cast
 
 _ftp_last_upload_mono: float | None = None
 _ftp_last_uploaded_mtime: dict[str, float] = {}
+# Content digest per uploaded name: files rewritten with identical bytes are not re-sent.
+_ftp_last_uploaded_digest: dict[str, bytes] = {}
+# When each name was last actually sent (monotonic): digest-equal files are re-sent after
+# FTP_UPLOAD_REFRESH_S so the remote Last-Modified (the portal's freshness signal) keeps moving.
+_ftp_last_sent_mono: dict[str, float] = {}
+# Control connections kept open between ticks (FTP_KEEPALIVE=1), already cwd'd into FTP_REMOTE_DIR.
+_ftp_pool: list[FTP] = []
 
 _http_last_upload_mono: float | None = None
 _http_last_uploaded_mtime: dict[str, float] = {}
+# Outcome of the most recent upload (set by whichever thread uploads, reported in the next live_status).
+_last_upload: dict[str, Any] = {}
+
+# Upload only the portal-facing files (not raw debug); shared by the FTP/SFTP and HTTP uploaders.
+_UPLOAD_ALLOW: frozenset[str] = frozenset(
+    {
+        "live_status.json",
+        "lead_lag_health.json",
+        "sources_health.json",
+        "deribit_options_public.json",
+        "polymarket_status.json",
+        "polymarket_clob_public.json",
+        "pm_open_orders.json",
+        "pm_scanner_log.csv",
+        "pm_markets_index.json",
+        "pm_scan_candidates.csv",
+        "edge_signals_live.csv",
+        "edge_calculator_live.csv",
+        "pm_orders.csv",
+        "pm_paper_portfolio.json",
+        "pm_paper_positions.csv",
+        "pm_paper_trades.csv",
+        "pm_paper_candidates.csv",
+        "kraken_futures_public.json",
+        "kraken_futures_private.json",
+        "kraken_futures_signals.csv",
+        "kraken_futures_fills.csv",
+        "executed_trades.csv",
+    }
+)
+# Large, highly compressible JSON sent as <name>.gz when FTP_UPLOAD_GZIP_JSON=1; web/.htaccess
+# serves the .gz under the plain .json URL (Content-Encoding: gzip), so the portal is unchanged.
+_FTP_GZIP_JSON: frozenset[str] = frozenset(
+    {
+        "sources_health.json",
+        "deribit_options_public.json",
+        "pm_markets_index.json",
+    }
+)
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # type: ignore
+except Exception:  # optional: stdlib json is used when orjson is not installed
+    orjson = None
 
 from vps.connectors.kraken_public import fetch_public_snapshot as fetch_kraken_public
 from vps.connectors.polymarket_public import fetch_public_snapshot as fetch_pm_public
@@ -53,6 +115,7 @@ from vps.connectors.polymarket_clob_trading import (
     post_limit_order as pm_post_limit_order,
 )
 from vps.connectors.polymarket_position_store import PolymarketPositionStore, fill_from_loose_dict
+from vps.connectors.polymarket_market_wss import PolymarketMarketWssClient
 from vps.connectors.polymarket_user_wss import PolymarketUserWssAuth, PolymarketUserWssClient, PolymarketUserWssConfig
 
 
@@ -84,6 +147,69 @@ def _cache_set_gamma_market(cache: RuntimeCache, *, key: str, market: Any, now_m
     cache.gamma_market_fetched_at_ms[key] = int(now_ms)
 
 
+def _prefetch_gamma_markets(
+    cache: RuntimeCache,
+    refs: list[str],
+    *,
+    executor: ThreadPoolExecutor,
+    workers: int,
+    now_ms: int,
+    ttl_s: float,
+    latency_tracker: LatencyTracker | None = None,
+) -> None:
+    """Fetch the refs missing from (or expired in) the Gamma cache concurrently, `workers` at a time.
+
+    Failures are skipped; callers fall back to a serial lookup and report the error there.
+    Cache writes stay on the calling thread.
+    """
+    missing = [r for r in dict.fromkeys(refs) if _cache_get_gamma_market(cache, key=r, now_ms=now_ms, ttl_s=ttl_s) is None]
+    if workers <= 1 or len(missing) <= 1:
+        return
+    sem = threading.Semaphore(int(workers))
+
+    def _fetch(ref: str) -> tuple[Any, float]:
+        with sem:
+            t_g0 = time.perf_counter()
+            gm = _gamma_threadlocal().get_market_by_slug(slug=ref)
+            return gm, float((time.perf_counter() - t_g0) * 1000.0)
+
+    futs = {executor.submit(_fetch, ref): ref for ref in missing}
+    for fut in as_completed(futs):
+        try:
+            gm, ms = fut.result()
+        except Exception:
+            continue
+        if latency_tracker is not None:
+            latency_tracker.record_gamma_fetch(ms)
+        _cache_set_gamma_market(cache, key=futs[fut], market=gm, now_ms=now_ms)
+
+
+def _deribit_fair_result(
+    cache: RuntimeCache,
+    deribit: DeribitOptionsPublic,
+    *,
+    mode: str,
+    model: dict[str, Any],
+    now_ms: int,
+    ttl_s: float,
+) -> dict[str, Any]:
+    """Deribit RN/touch result for `model`, reused for `ttl_s` (option chains move in seconds, not per tick).
+
+    Errors are not cached; they propagate so the caller can report them.
+    """
+    key = f"{mode}:{json.dumps(model, sort_keys=True, default=str)}"
+    hit = cache.deribit_result_by_model.get(key)
+    ttl_ms = int(max(0.0, float(ttl_s)) * 1000.0)
+    if hit is not None and _ttl_ok(fetched_at_ms=hit[0], ttl_ms=ttl_ms, now_ms=now_ms):
+        return hit[1]
+    if mode == "deribit_touch":
+        result = deribit.compute_touch_probability_from_model(model=model)
+    else:
+        result = deribit.compute_rn_probability_from_model(model=model)
+    cache.deribit_result_by_model[key] = (int(now_ms), result)
+    return result
+
+
 def _cache_get_token_id(cache: RuntimeCache, *, key: tuple[str, str], now_ms: int, ttl_s: float) -> str | None:
     ttl_ms = int(max(0.0, float(ttl_s)) * 1000.0)
     if key in cache.token_id_by_slug_outcome and _ttl_ok(fetched_at_ms=cache.token_id_fetched_at_ms.get(key), ttl_ms=ttl_ms, now_ms=now_ms):
@@ -95,6 +221,53 @@ def _cache_get_token_id(cache: RuntimeCache, *, key: tuple[str, str], now_ms: in
 def _cache_set_token_id(cache: RuntimeCache, *, key: tuple[str, str], token_id: str, now_ms: int) -> None:
     cache.token_id_by_slug_outcome[key] = str(token_id)
     cache.token_id_fetched_at_ms[key] = int(now_ms)
+    cache.token_id_dirty = True
+
+
+_TOKEN_CACHE_FILENAME = ".token_cache.json"
+
+
+def _load_token_cache(out: Path, cache: RuntimeCache, *, now_ms: int, ttl_s: float) -> None:
+    """Preload resolved token ids from `out/.token_cache.json` (written by _save_token_cache).
+
+    Schema: {market_ref: {outcome: {"token": "...", "resolved_at": ms}}}. Entries older than
+    ttl_s are skipped; the in-memory entries keep their original resolved_at.
+    """
+    cache.token_id_disk_loaded = True
+    path = out / _TOKEN_CACHE_FILENAME
+    if not path.exists():
+        return
+    try:
+        raw: Any = read_json(path)
+    except Exception:
+        return
+    if not isinstance(raw, dict):
+        return
+    ttl_ms = int(max(0.0, float(ttl_s)) * 1000.0)
+    for ref, by_outcome in cast(dict[str, Any], raw).items():
+        if not isinstance(by_outcome, dict):
+            continue
+        for outcome, ent in cast(dict[str, Any], by_outcome).items():
+            if not isinstance(ent, dict):
+                continue
+            token = str(cast(dict[str, Any], ent).get("token") or "")
+            try:
+                resolved_at = int(cast(dict[str, Any], ent).get("resolved_at") or 0)
+            except (TypeError, ValueError):
+                continue
+            key = (str(ref), str(outcome))
+            if token and key not in cache.token_id_by_slug_outcome and _ttl_ok(fetched_at_ms=resolved_at, ttl_ms=ttl_ms, now_ms=now_ms):
+                cache.token_id_by_slug_outcome[key] = token
+                cache.token_id_fetched_at_ms[key] = resolved_at
+
+
+def _save_token_cache(out: Path, cache: RuntimeCache) -> None:
+    """Persist resolved token ids (atomic replace) so restarts skip the Gamma lookups."""
+    doc: dict[str, dict[str, dict[str, Any]]] = {}
+    for (ref, outcome), token in cache.token_id_by_slug_outcome.items():
+        doc.setdefault(ref, {})[outcome] = {"token": token, "resolved_at": cache.token_id_fetched_at_ms.get((ref, outcome), 0)}
+    write_json_compact(out / _TOKEN_CACHE_FILENAME, doc)
+    cache.token_id_dirty = False
 
 
 def _coerce_float(x: Any) -> float | None:
@@ -107,17 +280,30 @@ def _coerce_float(x: Any) -> float | None:
 def _safe_top_levels(side: Any, *, max_levels: int) -> list[dict[str, float]]:
     if not isinstance(side, list):
         return []
+    if max_levels <= 0:
+        return []
     out: list[dict[str, float]] = []
-    side_list = cast(list[Any], side)
-    for item_any in side_list[: max_levels if max_levels > 0 else 0]:
+    append = out.append
+    # Inlined float parsing: this runs for every level of every book, every tick.
+    levels: list[Any] = side
+    for item_any in levels[:max_levels]:
         if not isinstance(item_any, dict):
             continue
-        item = cast(dict[str, Any], item_any)
-        price = _coerce_float(item.get("price") if "price" in item else item.get("p"))
-        size = _coerce_float(item.get("size") if "size" in item else item.get("s"))
-        if price is None:
+        # Declared binding instead of cast(): isinstance() already narrowed it, and this runs per level.
+        item: dict[str, Any] = item_any
+        px_any = item["price"] if "price" in item else item.get("p")
+        if px_any is None:
+            continue
+        try:
+            price = float(px_any)
+        except (TypeError, ValueError, OverflowError):
             continue
-        out.append({"price": float(price), "size": float(size or 0.0)})
+        sz_any = item["size"] if "size" in item else item.get("s")
+        try:
+            size = float(sz_any) if sz_any is not None else 0.0
+        except (TypeError, ValueError, OverflowError):
+            size = 0.0
+        append({"price": price, "size": size})
     return out
 
 
@@ -226,13 +412,33 @@ class RuntimeCache:
     gamma_market_fetched_at_ms: dict[str, int] = field(default_factory=lambda: cast(dict[str, int], {}))
     token_id_by_slug_outcome: dict[tuple[str, str], str] = field(default_factory=lambda: cast(dict[tuple[str, str], str], {}))
     token_id_fetched_at_ms: dict[tuple[str, str], int] = field(default_factory=lambda: cast(dict[tuple[str, str], int], {}))
+    # Token ids are also persisted under out_dir so process restarts skip the Gamma lookups.
+    token_id_disk_loaded: bool = False
+    token_id_dirty: bool = False
 
     kraken_futures_public_snapshot: dict[str, Any] | None = None
     kraken_futures_public_fetched_at_ms: int = 0
+    # Instruments change far less often than tickers, so they get their own (longer) refresh.
+    kraken_futures_instruments: list[dict[str, Any]] | None = None
+    kraken_futures_instruments_fetched_at_ms: int = 0
 
     kraken_futures_private_snapshot: dict[str, Any] | None = None
     kraken_futures_private_fetched_at_ms: int = 0
 
+    # Market-map entries, reparsed only when the file's (mtime_ns, size) changes, plus their
+    # MarketSpec keyed by id() (the entries stay alive in market_map_markets, so ids are stable).
+    market_map_stamp: tuple[int, int] | None = None
+    market_map_markets: list[dict[str, Any]] = field(default_factory=lambda: cast(list[dict[str, Any]], []))
+    market_specs_by_id: dict[int, MarketSpec] = field(default_factory=lambda: cast(dict[int, MarketSpec], {}))
+
+    # fair_model mode + JSON -> (computed_at_ms, Deribit RN/touch result).
+    deribit_result_by_model: dict[str, tuple[int, dict[str, Any]]] = field(
+        default_factory=lambda: cast(dict[str, tuple[int, dict[str, Any]]], {})
+    )
+
+    # Killswitch cancel-all already succeeded for the current activation (reset when it clears).
+    killswitch_cancel_done: bool = False
+
     pm_scan_last_run_ms: int = 0
     # Optional: use Gamma scan results as the active trading universe.
     pm_scan_selected_mkts: list[dict[str, Any]] = field(default_factory=lambda: cast(list[dict[str, Any]], []))
@@ -249,6 +455,61 @@ class RuntimeCache:
     pm_deadline_last_trade_key: str | None = None
 
 
+# Kraken Futures ticker fields probed (in order) for the fair-model reference price.
+_KR_REF_KEYS_DEFAULT: tuple[str, ...] = ("markPrice", "indexPrice", "last", "lastPrice")
+
+
+@dataclass(frozen=True, slots=True)
+class MarketSpec:
+    """Normalized per-market inputs for the fair-model loop (parsed once from a market-map entry)."""
+
+    name: str
+    token_id: str | None
+    chosen_outcome: str | None
+    market_ref: str | None
+    symbol: str | None
+    testnet: bool
+    ref_keys: tuple[str, ...]  # optional ref_price_field first, then _KR_REF_KEYS_DEFAULT
+    fair_model: dict[str, Any]
+    hedge: dict[str, Any]
+
+    @classmethod
+    def from_market(cls, mkt: dict[str, Any], *, default_testnet: bool) -> MarketSpec:
+        token_id: str | None = None
+        chosen_outcome: str | None = None
+        market_ref: str | None = None
+        pm_block = mkt.get("polymarket")
+        if isinstance(pm_block, dict):
+            pm_cfg = cast(dict[str, Any], pm_block)
+            token_id = str(pm_cfg.get("clob_token_id", "") or "").strip() or None
+            chosen_outcome = str(pm_cfg.get("outcome") or "").strip() or None
+            market_ref = str(pm_cfg.get("market_url") or pm_cfg.get("market_slug") or "").strip() or None
+
+        symbol: str | None = None
+        testnet = default_testnet
+        ref_field: str | None = None
+        k_block = mkt.get("kraken_futures")
+        if isinstance(k_block, dict):
+            k_cfg = cast(dict[str, Any], k_block)
+            symbol = str(k_cfg.get("symbol", "") or "").strip() or None
+            testnet = bool(k_cfg.get("testnet", testnet))
+            ref_field = str(k_cfg.get("ref_price_field", "") or "").strip() or None
+
+        fm = mkt.get("fair_model")
+        h = mkt.get("hedge")
+        return cls(
+            name=str(mkt.get("name") or "market"),
+            token_id=token_id,
+            chosen_outcome=chosen_outcome,
+            market_ref=market_ref,
+            symbol=symbol,
+            testnet=testnet,
+            ref_keys=(ref_field, *_KR_REF_KEYS_DEFAULT) if ref_field else _KR_REF_KEYS_DEFAULT,
+            fair_model=cast(dict[str, Any], fm) if isinstance(fm, dict) else {"mode": "constant", "p": 0.5},
+            hedge=cast(dict[str, Any], h) if isinstance(h, dict) else {},
+        )
+
+
 def _parse_gamma_end_date(s: str | None) -> datetime | None:
     if not s:
         return None
@@ -457,6 +718,7 @@ class Config:
 
     # Strategy selection
     strategy_mode: str  # fair_model|lead_lag|pm_trend|pm_draw
+    run_fair_loop: bool  # derived from strategy_mode: fair-model pass runs for every mode except lead_lag
 
     # public endpoints (optional)
     polymarket_public_url: str | None
@@ -529,8 +791,12 @@ class Config:
 
     # Performance: Gamma (slug->market) caching + parallel prefetch
     gamma_cache_ttl_s: float
+    gamma_token_cache_ttl_s: float
     gamma_workers: int
 
+    # Performance: reuse Deribit RN/touch fair probabilities across ticks
+    deribit_cache_ttl_s: float
+
     # Polymarket live trading (optional; requires explicit gates)
     poly_chain_id: int
     poly_private_key: str | None
@@ -540,18 +806,24 @@ class Config:
     poly_signature_type: int
     poly_funder: str | None
     poly_live_confirm: str
+    poly_trading_configured: bool  # derived: trading_mode=live + POLY_LIVE_CONFIRM=YES + full API creds
 
     # Optional: Polymarket user websocket + reconcile (live safety)
     poly_wss_url: str | None
     pm_user_wss_enable: bool
     pm_user_reconcile_interval_s: float
 
+    # Optional: market-channel websocket orderbooks (REST stays the fallback)
+    pm_market_wss_enable: bool
+    pm_market_wss_max_age_s: float
+
     pm_order_size_shares: float
     pm_max_orders_per_tick: int
 
     # Optional: restrict candidates by decimal odds interval (e.g. 1.15–1.30)
     pm_min_odds: float | None
     pm_max_odds: float | None
+    pm_odds_price_band: tuple[float, float] | None  # derived: price interval [1/max_odds, 1/min_odds]; None = no filter
 
     # Optional: widen odds filter for demo/testing
     pm_odds_test_mode: bool
@@ -566,9 +838,11 @@ class Config:
 
     # Paper portfolio
     paper_start_balance_usd: float
+    paper_portfolio_rewrite_every_n: int
 
     # Simple paper thresholds
     edge_threshold: float
+    edge_signals_rewrite_every_n: int
 
     # Estimated frictions for "edge after costs" (observability)
     # Expressed as fractions (e.g. 0.02 = 2%).
@@ -580,7 +854,7 @@ class Config:
     ftp_user: str | None
     ftp_pass: str | None
     ftp_remote_dir: str
-    ftp_protocol: str  # ftp|sftp
+    ftp_protocol: str  # ftp|ftps|sftp
     ftp_port: int
 
     # Optional HTTPS push upload (preferred when FTP/SFTP is blocked)
@@ -591,110 +865,129 @@ class Config:
     killswitch_file: Path | None
 
 
+def _env(key: str, default: str = "") -> str:
+    """os.getenv() that treats an empty value like an unset one (one lookup, no `or` fallback chain)."""
+    return os.environ.get(key) or default
+
+
 def load_config() -> Config:
     out_dir = Path(os.getenv("OUT_DIR", "./out")).resolve()
     interval_s = float(os.getenv("INTERVAL_S", "15"))
 
-    strategy_mode = (os.getenv("STRATEGY_MODE", "lead_lag") or "lead_lag").strip().lower()
-
-    polymarket_public_url = os.getenv("POLYMARKET_PUBLIC_URL") or None
-    kraken_public_url = os.getenv("KRAKEN_PUBLIC_URL") or None
-
-    polymarket_clob_base_url = (os.getenv("POLYMARKET_CLOB_BASE_URL", "https://clob.polymarket.com") or "https://clob.polymarket.com").rstrip("/")
-    polymarket_clob_token_id = os.getenv("POLYMARKET_CLOB_TOKEN_ID") or None
-
-    kraken_spot_base_url = (os.getenv("KRAKEN_SPOT_BASE_URL", "https://api.kraken.com/0/public") or "https://api.kraken.com/0/public").rstrip("/")
-    kraken_spot_pair = (os.getenv("KRAKEN_SPOT_PAIR", "XBTUSD") or "XBTUSD").strip()
-
-    lead_lag_side = (os.getenv("LEAD_LAG_SIDE", "YES") or "YES").strip().upper()
-    lead_lag_lookback_points = int(os.getenv("LEAD_LAG_LOOKBACK_POINTS", os.getenv("LOOKBACK_POINTS", "6") or "6") or "6")
-    lead_lag_spot_move_min_pct = float(os.getenv("LEAD_LAG_SPOT_MOVE_MIN_PCT", os.getenv("SPOT_MOVE_MIN_PCT", "0.25") or "0.25") or "0.25")
-    lead_lag_spot_noise_window_points = int(os.getenv("LEAD_LAG_SPOT_NOISE_WINDOW_POINTS", "40") or "40")
-    lead_lag_spot_noise_mult = float(os.getenv("LEAD_LAG_SPOT_NOISE_MULT", "2.0") or "2.0")
-    lead_lag_spread_move_mult = float(os.getenv("LEAD_LAG_SPREAD_MOVE_MULT", "1.0") or "1.0")
-    lead_lag_edge_min_pct = float(os.getenv("LEAD_LAG_EDGE_MIN_PCT", os.getenv("EDGE_MIN_PCT", "0.20") or "0.20") or "0.20")
-    lead_lag_edge_exit_pct = float(os.getenv("LEAD_LAG_EDGE_EXIT_PCT", os.getenv("EDGE_EXIT_PCT", "0.05") or "0.05") or "0.05")
-    lead_lag_max_hold_secs = int(os.getenv("LEAD_LAG_MAX_HOLD_SECS", os.getenv("MAX_HOLD_SECS", "180") or "180") or "180")
-    lead_lag_pm_stop_pct = float(os.getenv("LEAD_LAG_PM_STOP_PCT", os.getenv("PM_STOP_PCT", "0.25") or "0.25") or "0.25")
-    lead_lag_avoid_price_above = float(os.getenv("LEAD_LAG_AVOID_PRICE_ABOVE", os.getenv("AVOID_PRICE_ABOVE", "0.90") or "0.90") or "0.90")
-    lead_lag_avoid_price_below = float(os.getenv("LEAD_LAG_AVOID_PRICE_BELOW", os.getenv("AVOID_PRICE_BELOW", "0.02") or "0.02") or "0.02")
-
-    lead_lag_net_edge_min_pct = float(os.getenv("LEAD_LAG_NET_EDGE_MIN_PCT", "0.05") or "0.05")
-    lead_lag_spread_cost_cap_pct = float(os.getenv("LEAD_LAG_SPREAD_COST_CAP_PCT", "1.00") or "1.00")
-    lead_lag_min_market_lag_ms = float(os.getenv("LEAD_LAG_MIN_MARKET_LAG_MS", "0") or "0")
-    lead_lag_min_trade_notional_usdc = float(os.getenv("LEAD_LAG_MIN_TRADE_NOTIONAL_USDC", "5") or "5")
-
-    lead_lag_enable_orderbook_sizing = (os.getenv("LEAD_LAG_ENABLE_ORDERBOOK_SIZING", os.getenv("ENABLE_ORDERBOOK_SIZING", "1") or "1") or "1").strip().lower() not in {"0", "false", "no"}
-    lead_lag_slippage_cap = float(os.getenv("LEAD_LAG_SLIPPAGE_CAP", os.getenv("SLIPPAGE_CAP", "0.01") or "0.01") or "0.01")
+    strategy_mode = _env("STRATEGY_MODE", "lead_lag").strip().lower()
+
+    polymarket_public_url = _env("POLYMARKET_PUBLIC_URL") or None
+    kraken_public_url = _env("KRAKEN_PUBLIC_URL") or None
+
+    polymarket_clob_base_url = _env("POLYMARKET_CLOB_BASE_URL", "https://clob.polymarket.com").rstrip("/")
+    polymarket_clob_token_id = _env("POLYMARKET_CLOB_TOKEN_ID") or None
+
+    kraken_spot_base_url = _env("KRAKEN_SPOT_BASE_URL", "https://api.kraken.com/0/public").rstrip("/")
+    kraken_spot_pair = _env("KRAKEN_SPOT_PAIR", "XBTUSD").strip()
+
+    lead_lag_side = _env("LEAD_LAG_SIDE", "YES").strip().upper()
+    lead_lag_lookback_points = int(_env("LEAD_LAG_LOOKBACK_POINTS") or _env("LOOKBACK_POINTS", "6"))
+    lead_lag_spot_move_min_pct = float(_env("LEAD_LAG_SPOT_MOVE_MIN_PCT") or _env("SPOT_MOVE_MIN_PCT", "0.25"))
+    lead_lag_spot_noise_window_points = int(_env("LEAD_LAG_SPOT_NOISE_WINDOW_POINTS", "40"))
+    lead_lag_spot_noise_mult = float(_env("LEAD_LAG_SPOT_NOISE_MULT", "2.0"))
+    lead_lag_spread_move_mult = float(_env("LEAD_LAG_SPREAD_MOVE_MULT", "1.0"))
+    lead_lag_edge_min_pct = float(_env("LEAD_LAG_EDGE_MIN_PCT") or _env("EDGE_MIN_PCT", "0.20"))
+    lead_lag_edge_exit_pct = float(_env("LEAD_LAG_EDGE_EXIT_PCT") or _env("EDGE_EXIT_PCT", "0.05"))
+    lead_lag_max_hold_secs = int(_env("LEAD_LAG_MAX_HOLD_SECS") or _env("MAX_HOLD_SECS", "180"))
+    lead_lag_pm_stop_pct = float(_env("LEAD_LAG_PM_STOP_PCT") or _env("PM_STOP_PCT", "0.25"))
+    lead_lag_avoid_price_above = float(_env("LEAD_LAG_AVOID_PRICE_ABOVE") or _env("AVOID_PRICE_ABOVE", "0.90"))
+    lead_lag_avoid_price_below = float(_env("LEAD_LAG_AVOID_PRICE_BELOW") or _env("AVOID_PRICE_BELOW", "0.02"))
+
+    lead_lag_net_edge_min_pct = float(_env("LEAD_LAG_NET_EDGE_MIN_PCT", "0.05"))
+    lead_lag_spread_cost_cap_pct = float(_env("LEAD_LAG_SPREAD_COST_CAP_PCT", "1.00"))
+    lead_lag_min_market_lag_ms = float(_env("LEAD_LAG_MIN_MARKET_LAG_MS", "0"))
+    lead_lag_min_trade_notional_usdc = float(_env("LEAD_LAG_MIN_TRADE_NOTIONAL_USDC", "5"))
+
+    lead_lag_enable_orderbook_sizing = (_env("LEAD_LAG_ENABLE_ORDERBOOK_SIZING") or _env("ENABLE_ORDERBOOK_SIZING", "1")).strip().lower() not in {"0", "false", "no"}
+    lead_lag_slippage_cap = float(_env("LEAD_LAG_SLIPPAGE_CAP") or _env("SLIPPAGE_CAP", "0.01"))
     lead_lag_max_fraction_of_band_liquidity = float(
-        os.getenv("LEAD_LAG_MAX_FRACTION_OF_BAND_LIQUIDITY", os.getenv("MAX_FRACTION_OF_BAND_LIQUIDITY", "0.10") or "0.10") or "0.10"
+        _env("LEAD_LAG_MAX_FRACTION_OF_BAND_LIQUIDITY") or _env("MAX_FRACTION_OF_BAND_LIQUIDITY", "0.10")
     )
-    lead_lag_hard_cap_usdc = float(os.getenv("LEAD_LAG_HARD_CAP_USDC", os.getenv("HARD_CAP_USDC", "2000") or "2000") or "2000")
+    lead_lag_hard_cap_usdc = float(_env("LEAD_LAG_HARD_CAP_USDC") or _env("HARD_CAP_USDC", "2000"))
 
-    lead_lag_scale_on_odds_change_pct = float(os.getenv("LEAD_LAG_SCALE_ON_ODDS_CHANGE_PCT", "0.40") or "0.40")
-    lead_lag_scale_cooldown_s = float(os.getenv("LEAD_LAG_SCALE_COOLDOWN_S", "20") or "20")
-    lead_lag_scale_max_adds = int(os.getenv("LEAD_LAG_SCALE_MAX_ADDS", "3") or "3")
-    lead_lag_scale_size_mult = float(os.getenv("LEAD_LAG_SCALE_SIZE_MULT", "0.50") or "0.50")
-    lead_lag_scale_max_total_shares = float(os.getenv("LEAD_LAG_SCALE_MAX_TOTAL_SHARES", "50") or "50")
+    lead_lag_scale_on_odds_change_pct = float(_env("LEAD_LAG_SCALE_ON_ODDS_CHANGE_PCT", "0.40"))
+    lead_lag_scale_cooldown_s = float(_env("LEAD_LAG_SCALE_COOLDOWN_S", "20"))
+    lead_lag_scale_max_adds = int(_env("LEAD_LAG_SCALE_MAX_ADDS", "3"))
+    lead_lag_scale_size_mult = float(_env("LEAD_LAG_SCALE_SIZE_MULT", "0.50"))
+    lead_lag_scale_max_total_shares = float(_env("LEAD_LAG_SCALE_MAX_TOTAL_SHARES", "50"))
 
-    pm_trend_lookback_points = int(os.getenv("PM_TREND_LOOKBACK_POINTS", str(lead_lag_lookback_points)) or str(lead_lag_lookback_points))
-    pm_trend_move_min_pct = float(os.getenv("PM_TREND_MOVE_MIN_PCT", "0.10") or "0.10")
-    pm_trend_exit_move_min_pct = float(os.getenv("PM_TREND_EXIT_MOVE_MIN_PCT", "0.00") or "0.00")
-    pm_trend_auto_side = (os.getenv("PM_TREND_AUTO_SIDE", "1") or "1").strip().lower() not in {"0", "false", "no"}
+    pm_trend_lookback_points = int(_env("PM_TREND_LOOKBACK_POINTS", str(lead_lag_lookback_points)))
+    pm_trend_move_min_pct = float(_env("PM_TREND_MOVE_MIN_PCT", "0.10"))
+    pm_trend_exit_move_min_pct = float(_env("PM_TREND_EXIT_MOVE_MIN_PCT", "0.00"))
+    pm_trend_auto_side = _env("PM_TREND_AUTO_SIDE", "1").strip().lower() not in {"0", "false", "no"}
 
-    pm_draw_baseline_file_raw = (os.getenv("PM_DRAW_BASELINE_FILE") or "").strip()
+    pm_draw_baseline_file_raw = _env("PM_DRAW_BASELINE_FILE").strip()
     pm_draw_baseline_file = Path(pm_draw_baseline_file_raw).expanduser() if pm_draw_baseline_file_raw else None
-    pm_draw_baseline_p = float(os.getenv("PM_DRAW_BASELINE_P", "0.28") or "0.28")
-    pm_draw_book_prob_mult = float(os.getenv("PM_DRAW_BOOK_PROB_MULT", "0.95") or "0.95")
-    pm_draw_edge_min_pct = float(os.getenv("PM_DRAW_EDGE_MIN_PCT", "2.0") or "2.0")
-    pm_draw_edge_exit_pct = float(os.getenv("PM_DRAW_EDGE_EXIT_PCT", "0.5") or "0.5")
-    pm_draw_max_price = float(os.getenv("PM_DRAW_MAX_PRICE", "0.45") or "0.45")
-    pm_draw_require_3way = (os.getenv("PM_DRAW_REQUIRE_3WAY", "0") or "0").strip().lower() in {"1", "true", "yes"}
-    pm_draw_fav_min = float(os.getenv("PM_DRAW_FAV_MIN", "0.35") or "0.35")
-    pm_draw_fav_max = float(os.getenv("PM_DRAW_FAV_MAX", "0.65") or "0.65")
+    pm_draw_baseline_p = float(_env("PM_DRAW_BASELINE_P", "0.28"))
+    pm_draw_book_prob_mult = float(_env("PM_DRAW_BOOK_PROB_MULT", "0.95"))
+    pm_draw_edge_min_pct = float(_env("PM_DRAW_EDGE_MIN_PCT", "2.0"))
+    pm_draw_edge_exit_pct = float(_env("PM_DRAW_EDGE_EXIT_PCT", "0.5"))
+    pm_draw_max_price = float(_env("PM_DRAW_MAX_PRICE", "0.45"))
+    pm_draw_require_3way = _env("PM_DRAW_REQUIRE_3WAY", "0").strip().lower() in {"1", "true", "yes"}
+    pm_draw_fav_min = float(_env("PM_DRAW_FAV_MIN", "0.35"))
+    pm_draw_fav_max = float(_env("PM_DRAW_FAV_MAX", "0.65"))
 
-    freshness_max_age_s = float(os.getenv("FRESHNESS_MAX_AGE_SECS", "60") or "60")
+    freshness_max_age_s = float(_env("FRESHNESS_MAX_AGE_SECS", "60"))
 
-    clob_depth_levels = int(os.getenv("CLOB_DEPTH_LEVELS", "10") or "10")
+    clob_depth_levels = int(_env("CLOB_DEPTH_LEVELS", "10"))
 
-    pm_orderbook_workers = int(os.getenv("PM_ORDERBOOK_WORKERS", "1") or "1")
+    pm_orderbook_workers = int(_env("PM_ORDERBOOK_WORKERS", "1"))
     # Safety caps: prevent accidental fork-bombs.
     pm_orderbook_workers = max(1, min(int(pm_orderbook_workers), 32))
 
-    gamma_cache_ttl_s = float(os.getenv("GAMMA_CACHE_TTL_S", "900") or "900")
+    gamma_cache_ttl_s = float(_env("GAMMA_CACHE_TTL_S", "900"))
     if gamma_cache_ttl_s < 0:
         gamma_cache_ttl_s = 0.0
 
-    gamma_workers = int(os.getenv("GAMMA_WORKERS", "1") or "1")
+    # Resolved (market, outcome) -> token id mappings do not change, so they live much longer
+    # than the Gamma market payloads (also across restarts via out_dir/.token_cache.json).
+    gamma_token_cache_ttl_s = float(_env("GAMMA_TOKEN_CACHE_TTL_S", "86400"))
+    if gamma_token_cache_ttl_s < 0:
+        gamma_token_cache_ttl_s = 0.0
+
+    gamma_workers = int(_env("GAMMA_WORKERS", "1"))
     gamma_workers = max(1, min(int(gamma_workers), 32))
 
-    poly_chain_id = int(os.getenv("POLY_CHAIN_ID", "137") or "137")
-    poly_private_key = (os.getenv("POLY_PRIVATE_KEY") or os.getenv("POLY_PK") or "").strip() or None
-    poly_api_key = (os.getenv("POLY_CLOB_API_KEY") or os.getenv("CLOB_API_KEY") or "").strip() or None
-    poly_api_secret = (os.getenv("POLY_CLOB_SECRET") or os.getenv("CLOB_SECRET") or "").strip() or None
-    poly_api_passphrase = (os.getenv("POLY_CLOB_PASS_PHRASE") or os.getenv("CLOB_PASS_PHRASE") or "").strip() or None
-    poly_signature_type = int(os.getenv("POLY_SIGNATURE_TYPE", "0") or "0")
-    poly_funder = (os.getenv("POLY_FUNDER") or "").strip() or None
-    poly_live_confirm = (os.getenv("POLY_LIVE_CONFIRM", "NO") or "NO").strip().upper()
+    # Deribit option chains (and the RN/touch integrals on top) barely move between ticks; 0 disables.
+    deribit_cache_ttl_s = float(_env("DERIBIT_CACHE_TTL_S", "15"))
+    if deribit_cache_ttl_s < 0:
+        deribit_cache_ttl_s = 0.0
+
+    poly_chain_id = int(_env("POLY_CHAIN_ID", "137"))
+    poly_private_key = (_env("POLY_PRIVATE_KEY") or _env("POLY_PK")).strip() or None
+    poly_api_key = (_env("POLY_CLOB_API_KEY") or _env("CLOB_API_KEY")).strip() or None
+    poly_api_secret = (_env("POLY_CLOB_SECRET") or _env("CLOB_SECRET")).strip() or None
+    poly_api_passphrase = (_env("POLY_CLOB_PASS_PHRASE") or _env("CLOB_PASS_PHRASE")).strip() or None
+    poly_signature_type = int(_env("POLY_SIGNATURE_TYPE", "0"))
+    poly_funder = _env("POLY_FUNDER").strip() or None
+    poly_live_confirm = _env("POLY_LIVE_CONFIRM", "NO").strip().upper()
 
     poly_wss_url = (
-        (os.getenv("POLY_WSS_URL") or "").strip()
-        or (os.getenv("POLYMARKET_WSS_URL") or "").strip()
-        or (os.getenv("POLY_WS_URL") or "").strip()
+        _env("POLY_WSS_URL").strip()
+        or _env("POLYMARKET_WSS_URL").strip()
+        or _env("POLY_WS_URL").strip()
         or None
     )
-    pm_user_wss_enable = (os.getenv("PM_USER_WSS_ENABLE", "1") or "1").strip().lower() not in {"0", "false", "no"}
-    pm_user_reconcile_interval_s = float(os.getenv("PM_USER_RECONCILE_INTERVAL_S", "60") or "60")
+    pm_user_wss_enable = _env("PM_USER_WSS_ENABLE", "1").strip().lower() not in {"0", "false", "no"}
+    pm_user_reconcile_interval_s = float(_env("PM_USER_RECONCILE_INTERVAL_S", "60"))
+    pm_market_wss_enable = _env("PM_MARKET_WSS_ENABLE", "0").strip().lower() in {"1", "true", "yes"}
+    # Books quieter than this (or from a dropped connection) are refetched over REST; 0 = no age limit.
+    pm_market_wss_max_age_s = max(0.0, float(_env("PM_MARKET_WSS_MAX_AGE_S", "30")))
 
-    pm_order_size_shares = float(os.getenv("PM_ORDER_SIZE_SHARES", "10") or "10")
-    pm_max_orders_per_tick = int(os.getenv("PM_MAX_ORDERS_PER_TICK", "1") or "1")
+    pm_order_size_shares = float(_env("PM_ORDER_SIZE_SHARES", "10"))
+    pm_max_orders_per_tick = int(_env("PM_MAX_ORDERS_PER_TICK", "1"))
 
-    pm_min_odds_raw = (os.getenv("PM_MIN_ODDS") or "").strip()
-    pm_max_odds_raw = (os.getenv("PM_MAX_ODDS") or "").strip()
+    pm_min_odds_raw = _env("PM_MIN_ODDS").strip()
+    pm_max_odds_raw = _env("PM_MAX_ODDS").strip()
     pm_min_odds = float(pm_min_odds_raw) if pm_min_odds_raw else None
     pm_max_odds = float(pm_max_odds_raw) if pm_max_odds_raw else None
 
-    pm_odds_test_mode = (os.getenv("PM_ODDS_TEST_MODE", "0") or "0").strip().lower() in {"1", "true", "yes"}
+    pm_odds_test_mode = _env("PM_ODDS_TEST_MODE", "0").strip().lower() in {"1", "true", "yes"}
     if pm_odds_test_mode:
         # Widen the band to make it easier to see paper trades in the portal.
         pm_min_odds = 1.01
@@ -703,51 +996,56 @@ def load_config() -> Config:
     market_map_path_raw = os.getenv("MARKET_MAP_PATH")
     market_map_path = Path(market_map_path_raw).expanduser() if market_map_path_raw else None
 
-    kraken_futures_symbol = os.getenv("KRAKEN_FUTURES_SYMBOL") or None
-    kraken_futures_testnet = (os.getenv("KRAKEN_FUTURES_TESTNET", "0") or "0").strip().lower() in {"1", "true", "yes"}
+    kraken_futures_symbol = _env("KRAKEN_FUTURES_SYMBOL") or None
+    kraken_futures_testnet = _env("KRAKEN_FUTURES_TESTNET", "0").strip().lower() in {"1", "true", "yes"}
 
     # Support either a generic name or Markov-style env var.
-    kraken_keys_path_raw = os.getenv("KRAKEN_KEYS_PATH") or os.getenv("MARKOV_KRAKEN_KEYS_PATH")
+    kraken_keys_path_raw = _env("KRAKEN_KEYS_PATH") or _env("MARKOV_KRAKEN_KEYS_PATH")
     kraken_keys_path = Path(kraken_keys_path_raw).expanduser() if kraken_keys_path_raw else None
 
-    paper_start_balance_usd = float(os.getenv("PAPER_START_BALANCE_USD", "1000") or "1000")
+    paper_start_balance_usd = float(_env("PAPER_START_BALANCE_USD", "1000"))
+    # Ticks where the portfolio is unchanged (apart from generated_at) skip the rewrite; it is still
+    # rewritten every N ticks so the portal's freshness check stays green. 1 = rewrite every tick.
+    paper_portfolio_rewrite_every_n = max(1, int(_env("PAPER_PORTFOLIO_REWRITE_EVERY_N", "10")))
 
     edge_threshold = float(os.getenv("EDGE_THRESHOLD", "0.02"))
+    # Unchanged edge_signals_live.csv is skipped but still rewritten every N ticks (portal freshness).
+    edge_signals_rewrite_every_n = max(1, int(_env("EDGE_SIGNALS_REWRITE_EVERY_N", "10")))
 
     # Friction model used for reporting edge_net:
     # - spread is taken from observed bid/ask (half-spread approximates entry cost vs mid)
     # - fee and extra_cost are applied as % of execution price
-    pm_est_fee_pct = float(os.getenv("PM_EST_FEE_PCT", "0.0") or "0.0")
-    pm_edge_extra_cost_pct = float(os.getenv("PM_EDGE_EXTRA_COST_PCT", "0.0") or "0.0")
+    pm_est_fee_pct = float(_env("PM_EST_FEE_PCT", "0.0"))
+    pm_edge_extra_cost_pct = float(_env("PM_EDGE_EXTRA_COST_PCT", "0.0"))
 
-    ftp_host = os.getenv("FTP_HOST") or None
-    ftp_user = os.getenv("FTP_USER") or None
-    ftp_pass = os.getenv("FTP_PASS") or None
+    ftp_host = _env("FTP_HOST") or None
+    ftp_user = _env("FTP_USER") or None
+    ftp_pass = _env("FTP_PASS") or None
     ftp_remote_dir = os.getenv("FTP_REMOTE_DIR", "/web/data").rstrip("/")
 
-    ftp_protocol = (os.getenv("FTP_PROTOCOL", "ftp") or "ftp").strip().lower()
-    if ftp_protocol not in {"ftp", "sftp"}:
+    ftp_protocol = _env("FTP_PROTOCOL", "ftp").strip().lower()
+    if ftp_protocol not in {"ftp", "ftps", "sftp"}:
         ftp_protocol = "ftp"
 
-    ftp_port_raw = (os.getenv("FTP_PORT") or "").strip()
+    ftp_port_raw = _env("FTP_PORT").strip()
     if ftp_port_raw:
         try:
             ftp_port = int(ftp_port_raw)
         except Exception:
-            ftp_port = 21 if ftp_protocol == "ftp" else 22
+            ftp_port = 22 if ftp_protocol == "sftp" else 21
     else:
-        ftp_port = 21 if ftp_protocol == "ftp" else 22
+        ftp_port = 22 if ftp_protocol == "sftp" else 21
 
-    upload_url = (os.getenv("UPLOAD_URL") or os.getenv("HTTP_UPLOAD_URL") or "").strip() or None
+    upload_url = (_env("UPLOAD_URL") or _env("HTTP_UPLOAD_URL")).strip() or None
     # Support both project-style names, plus a generic.
     upload_api_key = (
-        (os.getenv("UPLOAD_API_KEY") or "").strip()
-        or (os.getenv("SPELAR_UPLOAD_API_KEY") or "").strip()
-        or (os.getenv("MARKOV_UPLOAD_API_KEY") or "").strip()
+        _env("UPLOAD_API_KEY").strip()
+        or _env("SPELAR_UPLOAD_API_KEY").strip()
+        or _env("MARKOV_UPLOAD_API_KEY").strip()
         or None
     )
 
-    trading_mode = (os.getenv("TRADING_MODE", "paper") or "paper").strip().lower()
+    trading_mode = _env("TRADING_MODE", "paper").strip().lower()
 
     killswitch_file_raw = os.getenv("KILLSWITCH_FILE")
     killswitch_file = Path(killswitch_file_raw).expanduser() if killswitch_file_raw else None
@@ -756,6 +1054,7 @@ def load_config() -> Config:
         out_dir=out_dir,
         interval_s=interval_s,
         strategy_mode=strategy_mode,
+        run_fair_loop=strategy_mode != "lead_lag",
         polymarket_public_url=polymarket_public_url,
         kraken_public_url=kraken_public_url,
         polymarket_clob_base_url=polymarket_clob_base_url,
@@ -804,7 +1103,9 @@ def load_config() -> Config:
         clob_depth_levels=clob_depth_levels,
         pm_orderbook_workers=pm_orderbook_workers,
         gamma_cache_ttl_s=gamma_cache_ttl_s,
+        gamma_token_cache_ttl_s=gamma_token_cache_ttl_s,
         gamma_workers=gamma_workers,
+        deribit_cache_ttl_s=deribit_cache_ttl_s,
         poly_chain_id=poly_chain_id,
         poly_private_key=poly_private_key,
         poly_api_key=poly_api_key,
@@ -813,20 +1114,35 @@ def load_config() -> Config:
         poly_signature_type=poly_signature_type,
         poly_funder=poly_funder,
         poly_live_confirm=poly_live_confirm,
+        poly_trading_configured=bool(
+            trading_mode == "live"
+            and poly_live_confirm == "YES"
+            and poly_private_key
+            and poly_api_key
+            and poly_api_secret
+            and poly_api_passphrase
+        ),
         poly_wss_url=poly_wss_url,
         pm_user_wss_enable=pm_user_wss_enable,
+        pm_market_wss_enable=pm_market_wss_enable,
+        pm_market_wss_max_age_s=pm_market_wss_max_age_s,
         pm_user_reconcile_interval_s=pm_user_reconcile_interval_s,
         pm_order_size_shares=pm_order_size_shares,
         pm_max_orders_per_tick=pm_max_orders_per_tick,
         pm_min_odds=pm_min_odds,
         pm_max_odds=pm_max_odds,
+        pm_odds_price_band=(
+            _odds_price_band(pm_min_odds, pm_max_odds) if (pm_min_odds is not None or pm_max_odds is not None) else None
+        ),
         pm_odds_test_mode=pm_odds_test_mode,
         market_map_path=market_map_path,
         kraken_futures_symbol=kraken_futures_symbol,
         kraken_futures_testnet=kraken_futures_testnet,
         kraken_keys_path=kraken_keys_path,
         paper_start_balance_usd=paper_start_balance_usd,
+        paper_portfolio_rewrite_every_n=paper_portfolio_rewrite_every_n,
         edge_threshold=edge_threshold,
+        edge_signals_rewrite_every_n=edge_signals_rewrite_every_n,
         pm_est_fee_pct=pm_est_fee_pct,
         pm_edge_extra_cost_pct=pm_edge_extra_cost_pct,
         ftp_host=ftp_host,
@@ -843,11 +1159,60 @@ def load_config() -> Config:
 
 
 def read_json(path: Path) -> Any:
-    return json.loads(path.read_text(encoding="utf-8"))
+    data = path.read_bytes()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN/Infinity written by older stdlib dumps; let json decide.
+    return json.loads(data.decode("utf-8"))
+
+
+# Paper state this process last wrote, keyed by path -> (st_mtime_ns, st_size, state). While the
+# file on disk is still that write, the next tick reuses it instead of re-reading and parsing.
+_PAPER_STATE_CACHE: dict[Path, tuple[int, int, dict[str, Any]]] = {}
+# Consecutive ticks whose unchanged paper state was not rewritten, keyed by path.
+_PAPER_STATE_SKIPPED: dict[Path, int] = {}
+
+
+def _remember_paper_state(path: Path, state: dict[str, Any]) -> None:
+    try:
+        st = path.stat()
+    except OSError:
+        _PAPER_STATE_CACHE.pop(path, None)
+        return
+    _PAPER_STATE_CACHE[path] = (st.st_mtime_ns, st.st_size, state)
+
+
+def _paper_state_unchanged(path: Path, state: dict[str, Any]) -> bool:
+    """True when `state` equals the last write to `path` (still on disk), ignoring generated_at."""
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    cached = _PAPER_STATE_CACHE.get(path)
+    if cached is None or cached[0] != st.st_mtime_ns or cached[1] != st.st_size:
+        return False
+    prev = cached[2]
+    # Plain dict comparison: cheaper than encoding the positions map just to find nothing moved.
+    return len(prev) == len(state) and all(k == "generated_at" or prev.get(k) == v for k, v in state.items())
 
 
 def _load_paper_state(*, path: Path, ts: str, start_balance_usd: float) -> dict[str, Any]:
-    if path.exists():
+    try:
+        st = path.stat()
+    except OSError:
+        st = None
+    if st is not None:
+        cached = _PAPER_STATE_CACHE.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            # Callers mutate the state and its position dicts in place; hand out copies so a tick
+            # that fails before saving cannot leak its edits into the next one.
+            state = cached[2]
+            positions = state.get("positions")
+            if isinstance(positions, dict):
+                return {**state, "positions": {k: dict(v) if isinstance(v, dict) else v for k, v in cast(dict[Any, Any], positions).items()}}
+            return dict(state)
         try:
             raw: Any = read_json(path)
             if isinstance(raw, dict) and "cash_usd" in raw and "positions" in raw:
@@ -870,6 +1235,92 @@ def _price_to_decimal_odds(p: float) -> float | None:
     return 1.0 / p
 
 
+def _odds_price_band(min_odds: float | None, max_odds: float | None) -> tuple[float, float]:
+    """Price interval [1/max_odds, 1/min_odds] for an odds filter (resolved once in load_config())."""
+    lo_price = 0.0
+    hi_price = 1.0
+    if max_odds is not None and max_odds > 0:
+        lo_price = 1.0 / max_odds
+    if min_odds is not None and min_odds > 0:
+        hi_price = 1.0 / min_odds
+    return lo_price, hi_price
+
+
+# Long-lived HTTP sessions per upstream API. Connector objects are still built per tick (their
+# in-object caches stay tick-scoped) but share these main-thread sessions, so keep-alive
+# connections and their TLS handshakes carry over from one tick to the next.
+_HTTP_SESSIONS: dict[str, requests.Session] = {}
+
+
+def _new_http_session() -> requests.Session:
+    """Session with a keep-alive pool and quick retries of failed connects.
+
+    Only connection setup is retried (the request was never sent), so signed/nonce'd
+    Kraken calls and POSTs are not replayed.
+    """
+    sess = requests.Session()
+    retry = Retry(total=2, connect=2, read=0, status=0, other=0, backoff_factor=0.2)
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=retry)
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
+    return sess
+
+
+def _http_session(name: str) -> requests.Session:
+    sess = _HTTP_SESSIONS.get(name)
+    if sess is None:
+        sess = _new_http_session()
+        _HTTP_SESSIONS[name] = sess
+    return sess
+
+
+# Thread-local PM CLOB clients for pool workers (a requests.Session is not shared across threads).
+# Module-level so each worker keeps its keep-alive connection from tick to tick.
+_PM_CLOB_TLS = threading.local()
+
+
+def _pm_clob_threadlocal(base_url: str) -> PolymarketClobPublic:
+    c = getattr(_PM_CLOB_TLS, "client", None)
+    if c is None or getattr(_PM_CLOB_TLS, "base_url", None) != base_url:
+        c = PolymarketClobPublic(base_url=base_url, timeout_s=10.0, session=_new_http_session())
+        _PM_CLOB_TLS.client = c
+        _PM_CLOB_TLS.base_url = base_url
+    return cast(PolymarketClobPublic, c)
+
+
+# Same for the Gamma lookups the lead-lag pass runs on the pool.
+_GAMMA_TLS = threading.local()
+
+
+def _gamma_threadlocal() -> PolymarketGammaPublic:
+    g = getattr(_GAMMA_TLS, "client", None)
+    if g is None:
+        g = PolymarketGammaPublic(timeout_s=20.0, session=_new_http_session())
+        _GAMMA_TLS.client = g
+    return cast(PolymarketGammaPublic, g)
+
+
+# Kraken Futures prefetch: one long-lived pool for the whole process, each worker with its own
+# keep-alive session, so refresh ticks reuse connections instead of paying a new TLS handshake.
+_KF_PREFETCH_POOL: ThreadPoolExecutor | None = None
+_KF_TLS = threading.local()
+
+
+def _kf_prefetch_pool() -> ThreadPoolExecutor:
+    global _KF_PREFETCH_POOL
+    if _KF_PREFETCH_POOL is None:
+        _KF_PREFETCH_POOL = ThreadPoolExecutor(max_workers=3, thread_name_prefix="kf_prefetch")
+    return _KF_PREFETCH_POOL
+
+
+def _kf_threadlocal(*, testnet: bool, keys: KrakenFuturesKeys | None = None) -> KrakenFuturesApi:
+    # The client itself is cheap; what must persist per worker thread is its session.
+    sess = getattr(_KF_TLS, "session", None)
+    if sess is None:
+        sess = _KF_TLS.session = _new_http_session()
+    return KrakenFuturesApi(keys=keys, testnet=testnet, session=cast(requests.Session, sess))
+
+
 def _price_allowed_by_odds(cfg: Config, *, price: float) -> bool:
     """Filter by odds interval if configured.
 
@@ -879,43 +1330,119 @@ def _price_allowed_by_odds(cfg: Config, *, price: float) -> bool:
     If you want odds in [min_odds, max_odds], that corresponds to price in [1/max_odds, 1/min_odds].
     """
 
-    if cfg.pm_min_odds is None and cfg.pm_max_odds is None:
+    band = cfg.pm_odds_price_band
+    if band is None:
         return True
-    odds = _price_to_decimal_odds(price)
-    if odds is None:
+    if price <= 0:
         return False
+    return band[0] <= price <= band[1]
 
-    lo_price = 0.0
-    hi_price = 1.0
-    if cfg.pm_max_odds is not None and cfg.pm_max_odds > 0:
-        lo_price = 1.0 / cfg.pm_max_odds
-    if cfg.pm_min_odds is not None and cfg.pm_min_odds > 0:
-        hi_price = 1.0 / cfg.pm_min_odds
-    return lo_price <= price <= hi_price
+
+def _odds_band_distance(cfg: Config, odds: float | None) -> float:
+    """How far decimal odds lie outside [pm_min_odds, pm_max_odds]; 0.0 inside the band or when unset."""
+    min_odds = cfg.pm_min_odds
+    max_odds = cfg.pm_max_odds
+    if min_odds is None or max_odds is None or odds is None:
+        return 0.0
+    if odds < min_odds:
+        return min_odds - odds
+    if odds > max_odds:
+        return odds - max_odds
+    return 0.0
 
 
 def ensure_parent(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
+def _orjson_bytes(obj: Any, *, indent: bool) -> bytes | None:
+    """Encode with orjson when available; None means "use stdlib json" (missing or unsupported input)."""
+    if orjson is None:
+        return None
+    opts = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+    if indent:
+        opts |= orjson.OPT_INDENT_2
+    try:
+        return orjson.dumps(obj, option=opts)
+    except TypeError:
+        return None
+
+
+def _json_snippet(obj: Any, limit: int = 500) -> str:
+    """First `limit` characters of obj as JSON, for CSV notes (orjson when available)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)[:limit].decode("utf-8", errors="replace")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, default=str)[:limit]
+
+
 def write_json(path: Path, obj: Any) -> None:
+    """Write indented JSON via a sibling .tmp file + os.replace, so readers never see a partial file."""
     ensure_parent(path)
-    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    data = _orjson_bytes(obj, indent=True)
+    if data is not None:
+        tmp.write_bytes(data)
+    else:
+        # Indented stdlib encoding is pure Python either way; stream it instead of building the string.
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+    os.replace(tmp, path)
 
 
 def write_json_compact(path: Path, obj: Any) -> None:
     """Write JSON without whitespace to keep snapshots small for FTP hosting."""
     ensure_parent(path)
-    path.write_text(json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n", encoding="utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    data = _orjson_bytes(obj, indent=False)
+    if data is None:
+        # Compact json.dumps() uses the C encoder (json.dump() would not), so keep the one-shot string.
+        data = (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
 
 
 def write_csv(path: Path, header: list[str], rows: list[list[Any]]) -> None:
+    # Render in memory, then one write + atomic replace (readers never see a half-written CSV).
     ensure_parent(path)
-    with path.open("w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(header)
-        for r in rows:
-            w.writerow(r)
+    buf = io.StringIO(newline="")
+    w = csv.writer(buf)
+    w.writerow(header)
+    w.writerows(rows)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(buf.getvalue().encode("utf-8"))
+    os.replace(tmp, path)
+
+
+_CSV_CONTENT_DIGEST: dict[str, bytes] = {}
+# Consecutive skipped (unchanged) writes per path, for write_csv_if_changed(rewrite_every_n=...).
+_CSV_SKIPPED: dict[str, int] = {}
+
+
+def write_csv_if_changed(
+    path: Path, header: list[str], rows: list[list[Any]], *, ignore_cols: int = 0, rewrite_every_n: int = 0
+) -> bool:
+    """write_csv, skipped when the rows match the previous write to the same path.
+
+    The first `ignore_cols` columns (e.g. a per-tick ts) are left out of the comparison.
+    With rewrite_every_n > 0, an unchanged file is still rewritten on every Nth call, so its
+    mtime (the portal's freshness signal) keeps advancing in quiet markets.
+    Returns True when the file was written.
+    """
+    key = str(path)
+    digest = hashlib.blake2b(repr([r[ignore_cols:] for r in rows]).encode("utf-8"), digest_size=16).digest()
+    if _CSV_CONTENT_DIGEST.get(key) == digest and path.exists():
+        skipped = _CSV_SKIPPED.get(key, 0)
+        if rewrite_every_n <= 0 or skipped + 1 < rewrite_every_n:
+            _CSV_SKIPPED[key] = skipped + 1
+            return False
+    write_csv(path, header, rows)
+    _CSV_CONTENT_DIGEST[key] = digest
+    _CSV_SKIPPED[key] = 0
+    return True
 
 
 @dataclass
@@ -923,11 +1450,13 @@ class _CsvAppendState:
     """Fast-path state for append_csv_row.
 
     We keep a cheap estimate of the number of data rows in the file so we can
-    append quickly and only compact occasionally.
+    append quickly and only compact occasionally. `tail` mirrors the last keep_last
+    rows in memory, so compaction is a bounded rewrite with no read of the file.
     """
 
     data_rows: int = 0
     last_compact_at_ms: int = 0
+    tail: deque[list[str]] | None = None
 
 
 _CSV_APPEND_STATE: dict[str, _CsvAppendState] = {}
@@ -942,51 +1471,65 @@ def _csv_state_for(path: Path) -> _CsvAppendState:
     return st
 
 
-def _count_csv_data_rows(path: Path) -> int:
-    """Count data rows (excluding header). Used only on first touch / compaction."""
-    if not path.exists():
-        return 0
+def _read_csv_tail(path: Path, keep_last: int) -> tuple[int, deque[list[str]]]:
+    """Count data rows (excluding header) and collect the last keep_last of them. Used only on first touch."""
+    tail: deque[list[str]] = deque(maxlen=max(1, int(keep_last)))
+    n = 0
     try:
-        n = 0
         with path.open("r", encoding="utf-8", newline="") as f:
-            for _ in f:
+            r = csv.reader(f)
+            next(r, None)
+            for line in r:
+                if not line:
+                    continue
                 n += 1
-        return max(0, n - 1)
+                tail.append(line)
     except Exception:
-        return 0
+        pass
+    return n, tail
 
 
-def append_csv_row(path: Path, header: list[str], row: list[Any], *, keep_last: int = 200) -> None:
-    """Append a row to a CSV, keeping only the last N rows (plus header).
+def _append_csv_rows(path: Path, header: list[str], rows: list[list[str]], *, keep_last: int) -> None:
+    """Append already-stringified rows to a CSV, keeping only the last N rows (plus header).
 
     Performance notes:
     - We append in O(1) without re-reading the whole file.
-    - We compact (read tail + rewrite) only when the file grows beyond a threshold.
+    - The steady-state path is a single open(..., "a"): no exists()/stat()/mkdir per call.
+      An append handle positioned at 0 means a new (or externally truncated) file, so the
+      header is written first.
+    - We compact (rewrite the in-memory tail) only when the file grows beyond a threshold;
+      the file itself is read once per process, on first touch.
     """
 
-    ensure_parent(path)
     st = _csv_state_for(path)
 
-    # Ensure header exists.
-    if not path.exists() or path.stat().st_size == 0:
-        write_csv(path, header, [])
-        st.data_rows = 0
-        st.last_compact_at_ms = 0
-    elif st.data_rows <= 0:
-        # First touch after process start: do a one-time line count.
-        st.data_rows = _count_csv_data_rows(path)
-
-    # Append row.
+    # Append rows.
     try:
-        with path.open("a", newline="", encoding="utf-8") as f:
+        try:
+            f = path.open("a", newline="", encoding="utf-8")
+        except FileNotFoundError:
+            ensure_parent(path)
+            f = path.open("a", newline="", encoding="utf-8")
+        with f:
             w = csv.writer(f)
-            w.writerow([str(x) for x in row])
-        st.data_rows += 1
+            if f.tell() == 0:
+                w.writerow(header)
+                st.data_rows = 0
+                st.last_compact_at_ms = 0
+                st.tail = deque(maxlen=keep_last) if keep_last > 0 else None
+            elif keep_last > 0 and st.tail is None:
+                # First touch after process start: one read to count rows and seed the tail.
+                st.data_rows, st.tail = _read_csv_tail(path, keep_last)
+            w.writerows(rows)
+        st.data_rows += len(rows)
+        if st.tail is not None:
+            st.tail.extend(rows)
     except Exception:
         # Fallback: if append fails for any reason, do a safe rewrite.
-        write_csv(path, header, [[str(x) for x in row]])
-        st.data_rows = 1
+        write_csv(path, header, cast(list[list[Any]], rows))
+        st.data_rows = len(rows)
         st.last_compact_at_ms = _now_ms()
+        st.tail = deque(rows, maxlen=keep_last) if keep_last > 0 else None
         return
 
     # Compaction: only when necessary.
@@ -1003,28 +1546,170 @@ def append_csv_row(path: Path, header: list[str], row: list[Any], *, keep_last:
     # Avoid pathological compaction loops under heavy logging.
     if st.last_compact_at_ms and (now_ms - st.last_compact_at_ms) < 1000:
         return
+    if st.tail is None:
+        return
 
     try:
-        tail: deque[list[str]] = deque(maxlen=int(keep_last))
-        with path.open("r", newline="", encoding="utf-8") as f:
-            r = csv.reader(f)
-            found_header = False
-            for line in r:
-                if not line:
-                    continue
-                if not found_header:
-                    found_header = True
-                    continue
-                tail.append(list(line))
-
-        write_csv(path, header, list(tail))
-        st.data_rows = len(tail)
+        write_csv(path, header, cast(list[list[Any]], list(st.tail)))
+        st.data_rows = len(st.tail)
         st.last_compact_at_ms = now_ms
     except Exception:
         # If compaction fails, keep going; we'll try again later.
         st.last_compact_at_ms = now_ms
 
 
+class CsvBatch:
+    """Per-tick buffer for append_csv_row.
+
+    Rows are grouped per file and written with one open()/writerows() per file at flush,
+    instead of one open/write/close per event. keep_last compaction is checked once per file.
+    """
+
+    def __init__(self) -> None:
+        self.rows: dict[Path, list[list[str]]] = {}
+        self.headers: dict[Path, list[str]] = {}
+        self.keep_last: dict[Path, int] = {}
+
+    def add(self, path: Path, header: list[str], row: list[Any], *, keep_last: int) -> None:
+        buf = self.rows.get(path)
+        if buf is None:
+            buf = self.rows[path] = []
+            self.headers[path] = header
+        # Stringify now: callers may reuse/mutate the objects they passed in.
+        buf.append([str(x) for x in row])
+        self.keep_last[path] = keep_last
+
+    def flush(self) -> None:
+        rows, self.rows = self.rows, {}
+        for path, buf in rows.items():
+            try:
+                _append_csv_rows(path, self.headers[path], buf, keep_last=self.keep_last[path])
+            except Exception as e:
+                print(f"[agent] csv flush failed for {path.name}: {e}", flush=True)
+
+
+# Active batch (set by csv_append_batch()); None means append_csv_row writes through.
+_CSV_BATCH: CsvBatch | None = None
+
+
+@contextmanager
+def csv_append_batch() -> Iterator[CsvBatch]:
+    """Buffer every append_csv_row call in the block and flush them on exit (even on error)."""
+    global _CSV_BATCH
+    prev = _CSV_BATCH
+    batch = CsvBatch()
+    _CSV_BATCH = batch
+    try:
+        yield batch
+    finally:
+        _CSV_BATCH = prev
+        batch.flush()
+
+
+def append_csv_row(path: Path, header: list[str], row: list[Any], *, keep_last: int = 200) -> None:
+    """Append a row to a CSV, keeping only the last N rows (plus header).
+
+    Inside csv_append_batch() the row is buffered and written at the end of the block.
+    """
+
+    batch = _CSV_BATCH
+    if batch is not None:
+        batch.add(path, header, row, keep_last=keep_last)
+        return
+    _append_csv_rows(path, header, [[str(x) for x in row]], keep_last=keep_last)
+
+
+_PM_ORDERS_HEADER = ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"]
+_PM_PAPER_TRADES_HEADER = ["ts", "market", "token", "outcome", "action", "price", "shares", "notional", "cash_after", "status", "notes"]
+_PM_PAPER_POSITIONS_HEADER = [
+    "ts",
+    "market",
+    "token",
+    "outcome",
+    "shares",
+    "avg_entry",
+    "last_price",
+    "value",
+    "unrealized_pnl",
+    "adds",
+    "last_mid",
+    "last_scale_at",
+]
+_PM_SCAN_HEADER = ["ts", "markets_seen", "edges_computed", "signals_emitted", "status", "notes"]
+_EDGE_SIGNALS_HEADER = ["ts", "market", "fair_p", "pm_price", "edge", "spread", "cost_est", "edge_net", "sources", "notes"]
+_KR_SIGNALS_HEADER = ["ts", "symbol", "signal", "confidence", "edge", "ref_price", "notes"]
+
+_PM_CANDIDATES_HEADER = [
+    "ts",
+    "market",
+    "market_ref",
+    "token",
+    "outcome",
+    "pm_bid",
+    "pm_ask",
+    "pm_mid",
+    "odds",
+    "odds_allowed",
+    "fair_p",
+    "ev",
+    "edge",
+    "spread",
+    "cost_est",
+    "edge_net",
+    "signal",
+    "decision",
+    "reason",
+]
+
+
+def _append_candidate_skip(
+    path: Path,
+    *,
+    ts: str,
+    market: str,
+    market_ref: str | None,
+    token: str | None,
+    outcome: str | None,
+    reason: str,
+    bid: float | None = None,
+    ask: float | None = None,
+    pm_mid: float | None = None,
+    odds: float | None = None,
+    fair_p: float | None = None,
+    edge: float | None = None,
+    spread: float | None = None,
+    edge_net: float | None = None,
+    signal: str = "",
+) -> None:
+    """Log a decision=skip row to pm_paper_candidates.csv; omitted/None columns are left blank."""
+    append_csv_row(
+        path,
+        _PM_CANDIDATES_HEADER,
+        [
+            ts,
+            market,
+            market_ref or "",
+            token or "",
+            outcome or "",
+            "" if bid is None else bid,
+            "" if ask is None else ask,
+            "" if pm_mid is None else pm_mid,
+            "" if odds is None else odds,
+            "",
+            "" if fair_p is None else fair_p,
+            "",
+            "" if edge is None else edge,
+            "" if spread is None else spread,
+            "",
+            "" if edge_net is None else edge_net,
+            signal,
+            "skip",
+            reason,
+        ],
+        keep_last=5000,
+    )
+
+
 def killswitch_active(cfg: Config) -> bool:
     if not cfg.killswitch_file:
         return False
@@ -1113,7 +1798,7 @@ def _sum_book_usdc_in_band(levels: list[dict[str, Any]], *, price_leq: float | N
 
 
 def load_kraken_keys(path: Path) -> KrakenFuturesKeys:
-    raw: Any = json.loads(path.read_text(encoding="utf-8"))
+    raw: Any = read_json(path)
     if not isinstance(raw, dict):
         raise TypeError("kraken keys file must be a JSON object")
     obj = cast(dict[str, Any], raw)
@@ -1133,7 +1818,7 @@ def clamp01(x: float) -> float:
 
 
 def load_market_map(path: Path) -> dict[str, Any]:
-    raw: Any = json.loads(path.read_text(encoding="utf-8"))
+    raw: Any = read_json(path)
     if not isinstance(raw, dict):
         raise TypeError("market map must be a JSON object")
     return cast(dict[str, Any], raw)
@@ -1151,6 +1836,21 @@ def select_markets(map_obj: dict[str, Any]) -> list[dict[str, Any]]:
     return out
 
 
+def _select_markets_cached(cache: RuntimeCache, path: Path, *, default_testnet: bool) -> list[dict[str, Any]]:
+    """select_markets(load_market_map(path)), reparsed (and re-normalized) only when the file changes.
+
+    Returns a fresh list each call; callers may append to it, but must not mutate the entries.
+    """
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    if cache.market_map_stamp != stamp:
+        markets = select_markets(load_market_map(path))
+        cache.market_map_markets = markets
+        cache.market_specs_by_id = {id(m): MarketSpec.from_market(m, default_testnet=default_testnet) for m in markets}
+        cache.market_map_stamp = stamp
+    return list(cache.market_map_markets)
+
+
 def compute_fair_probability(*, model: dict[str, Any], ref_price: float) -> float:
     mode = str(model.get("mode", "constant")).strip().lower()
     if mode == "constant":
@@ -1168,6 +1868,64 @@ def compute_fair_probability(*, model: dict[str, Any], ref_price: float) -> floa
     raise ValueError(f"Unknown fair_model.mode: {mode}")
 
 
+# Paper-trade note templates for the lead-lag loop, keyed by strategy mode (anything other than
+# pm_trend/pm_draw is tagged lead_lag). Kept as bound str.format methods so the tick picks its
+# template once and only fills it in when a trade is actually logged.
+_LL_ENTRY_NOTES: dict[str, Callable[..., str]] = {
+    "pm_trend": "pm_trend pm_ret={edge:.4f}%".format,
+    "pm_draw": "pm_draw edge_pp={edge:.2f}".format,
+    "lead_lag": "lead_lag edge={edge:.4f}%".format,
+}
+_LL_EXIT_NOTES: dict[str, Callable[..., str]] = {
+    "pm_trend": "pm_trend exit={reason} pm_ret={edge:.4f}%".format,
+    "pm_draw": "pm_draw exit={reason} edge_pp={edge:.2f}".format,
+    "lead_lag": "lead_lag exit={reason} edge={edge:.4f}%".format,
+}
+# Entry-gate block reasons worth surfacing as "skipped" rows in pm_orders.csv.
+_LL_SURFACED_BLOCK_REASONS = frozenset({"throttled", "insufficient_liquidity", "spread_too_high", "net_edge_too_low", "lag_too_short"})
+# Paper statuses that count against cfg.pm_max_orders_per_tick.
+_PAPER_COUNTED_STATUSES = frozenset({"filled", "rejected"})
+_LL_SCALE_NOTES = "{mode} scale_in pm_up_move={up:.3f}% edge={edge:.4f}%".format
+_NOTES_BASELINE_P = " baseline_p={:.4f}".format
+_NOTES_MAX_USDC = " max_usdc={:.2f}".format
+
+
+def _fair_edge_after_costs(
+    *, fair_p: float, mid: float, bid: float | None, ask: float | None, cost_frac: float
+) -> tuple[float, float, float | None, float, float]:
+    """Return (edge, ev, spread, cost_est, edge_net) for a BUY at the current book.
+
+    Approximates "edge after costs": start from ev=(fair-mid) and subtract
+    - half-spread (entry vs mid)
+    - estimated fee and extra cost as a fraction of execution price (ask when available)
+    """
+
+    spread: float | None = None
+    half_spread = 0.0
+    if bid is not None and ask is not None and ask > 0 and bid > 0 and ask >= bid:
+        spread = ask - bid
+        half_spread = spread / 2.0
+    exec_px = ask if ask is not None and ask > 0 else mid
+    cost_est = half_spread + cost_frac * exec_px
+    ev = fair_p - mid
+    return mid - fair_p, ev, spread, cost_est, ev - cost_est
+
+
+# Output dir and placeholder files this process has already seen on disk. Placeholders are
+# only created when missing, so once a path is known to exist the per-tick stat() is skipped.
+_OUTPUT_PATHS_READY: set[Path] = set()
+
+
+def _needs_placeholder(path: Path) -> bool:
+    """True when `path` is missing and its empty placeholder should be written."""
+    if path in _OUTPUT_PATHS_READY:
+        return False
+    if path.exists():
+        _OUTPUT_PATHS_READY.add(path)
+        return False
+    return True
+
+
 def write_outputs(  # pyright: ignore
     cfg: Config,
     *,
@@ -1183,18 +1941,28 @@ def write_outputs(  # pyright: ignore
     pm_live_error: str | None = None,
     pm_position_store: PolymarketPositionStore | None = None,
     pm_user_wss_status: dict[str, Any] | None = None,
+    pm_market_wss: PolymarketMarketWssClient | None = None,
 ) -> list[Path]:  # pyright: ignore[reportGeneralTypeIssues]
-    ts = utc_now_iso()
-    ts_dt = _parse_iso_dt(ts)
+    # One timestamp per tick: every CSV row, JSON snapshot and age check below reuses ts/ts_dt.
+    ts_dt = datetime.now(timezone.utc).replace(microsecond=0)
+    ts = ts_dt.isoformat()
     t0 = time.perf_counter()
+    # Wall-clock ms for cache TTLs / last-run bookkeeping, likewise read once per tick.
+    # Durations reported in sources_health use perf_counter() instead.
+    tick_ms = _now_ms()
+    # One killswitch read per tick: the status snapshot, the cancel-all step and every live-vs-paper
+    # decision below see the same state (a flip mid-tick takes effect on the next tick).
+    ks_active = killswitch_active(cfg)
 
     out = cfg.out_dir
-    out.mkdir(parents=True, exist_ok=True)
+    if out not in _OUTPUT_PATHS_READY:
+        out.mkdir(parents=True, exist_ok=True)
+        _OUTPUT_PATHS_READY.add(out)
 
     live_status: dict[str, Any] = {
         "ts": ts,
         "trading_mode": cfg.trading_mode,
-        "killswitch": bool(killswitch_active(cfg)),
+        "killswitch": ks_active,
         "strategy_mode": cfg.strategy_mode,
         "pm_user_wss_enabled": bool(cfg.pm_user_wss_enable),
         "pm_user_reconcile_interval_s": float(cfg.pm_user_reconcile_interval_s),
@@ -1205,6 +1973,7 @@ def write_outputs(  # pyright: ignore
         "ftp_port": int(cfg.ftp_port) if cfg.ftp_host else None,
         "upload_enabled": bool(cfg.upload_url and cfg.upload_api_key),
         "upload_url": cfg.upload_url,
+        "last_upload": dict(_last_upload) or None,
         "system_latency_ms": None,
         "market_lag_ms": None,
         "market_lag_confidence": None,
@@ -1246,14 +2015,7 @@ def write_outputs(  # pyright: ignore
         "pm_odds_test_mode": bool(cfg.pm_odds_test_mode),
         "pm_est_fee_pct": cfg.pm_est_fee_pct,
         "pm_edge_extra_cost_pct": cfg.pm_edge_extra_cost_pct,
-        "poly_trading_enabled": bool(
-            cfg.trading_mode == "live"
-            and cfg.poly_live_confirm == "YES"
-            and cfg.poly_private_key
-            and cfg.poly_api_key
-            and cfg.poly_api_secret
-            and cfg.poly_api_passphrase
-        ),
+        "poly_trading_enabled": cfg.poly_trading_configured,
         "market_map_path": str(cfg.market_map_path) if cfg.market_map_path else None,
         "kraken_futures_symbol": cfg.kraken_futures_symbol,
         "kraken_futures_testnet": cfg.kraken_futures_testnet,
@@ -1264,8 +2026,9 @@ def write_outputs(  # pyright: ignore
 
     files: list[Path] = []
 
+    # live_status.json is written once, after _finalize_live_status() at the end of the tick
+    # (main() writes a minimal one if the tick raises before that).
     p_live = out / "live_status.json"
-    write_json(p_live, live_status)
     files.append(p_live)
 
     p_lead_lag_health = out / "lead_lag_health.json"
@@ -1297,33 +2060,14 @@ def write_outputs(  # pyright: ignore
     # Edge signals: keep a stable schema for the portal.
     # In fair_model mode we will populate this later; default to stub row.
     edge_rows: list[dict[str, Any]] = []
-    if cfg.strategy_mode != "lead_lag":
+    if cfg.run_fair_loop:
         edge_rows = compute_edge_stub(ts=ts, pm=pm, kraken=kraken)
     p_edge = out / "edge_signals_live.csv"
-    write_csv(
-        p_edge,
-        ["ts", "market", "fair_p", "pm_price", "edge", "spread", "cost_est", "edge_net", "sources", "notes"],
-        [
-            [
-                r.get("ts"),
-                r.get("market"),
-                r.get("fair_p"),
-                r.get("pm_price"),
-                r.get("edge"),
-                r.get("spread"),
-                r.get("cost_est"),
-                r.get("edge_net"),
-                r.get("sources"),
-                r.get("notes"),
-            ]
-            for r in edge_rows
-        ],
-    )
     files.append(p_edge)
 
     # Lead–lag edge breakdown used by the dashboard.
     p_edge_calc = out / "edge_calculator_live.csv"
-    if not p_edge_calc.exists():
+    if _needs_placeholder(p_edge_calc):
         write_csv(
             p_edge_calc,
             [
@@ -1343,8 +2087,8 @@ def write_outputs(  # pyright: ignore
 
     # Optional files used by the portal (kept stable even if empty)
     p_pm_orders = out / "pm_orders.csv"
-    if not p_pm_orders.exists():
-        write_csv(p_pm_orders, ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"], [])
+    if _needs_placeholder(p_pm_orders):
+        write_csv(p_pm_orders, _PM_ORDERS_HEADER, [])
     files.append(p_pm_orders)
 
     # Paper portfolio snapshots (Polymarket-only, no secrets)
@@ -1352,59 +2096,26 @@ def write_outputs(  # pyright: ignore
     p_pm_paper_positions = out / "pm_paper_positions.csv"
     p_pm_paper_trades = out / "pm_paper_trades.csv"
     p_pm_paper_candidates = out / "pm_paper_candidates.csv"
-    if not p_pm_paper_positions.exists():
+    if _needs_placeholder(p_pm_paper_positions):
         write_csv(
             p_pm_paper_positions,
-            [
-                "ts",
-                "market",
-                "token",
-                "outcome",
-                "shares",
-                "avg_entry",
-                "last_price",
-                "value",
-                "unrealized_pnl",
-                "adds",
-                "last_mid",
-                "last_scale_at",
-            ],
+            _PM_PAPER_POSITIONS_HEADER,
             [],
         )
-    if not p_pm_paper_trades.exists():
+    if _needs_placeholder(p_pm_paper_trades):
         write_csv(
             p_pm_paper_trades,
-            ["ts", "market", "token", "outcome", "action", "price", "shares", "notional", "cash_after", "status", "notes"],
+            _PM_PAPER_TRADES_HEADER,
             [],
         )
-    if not p_pm_paper_candidates.exists():
+    if _needs_placeholder(p_pm_paper_candidates):
         write_csv(
             p_pm_paper_candidates,
-            [
-                "ts",
-                "market",
-                "market_ref",
-                "token",
-                "outcome",
-                "pm_bid",
-                "pm_ask",
-                "pm_mid",
-                "odds",
-                "odds_allowed",
-                "fair_p",
-                "ev",
-                "edge",
-                "spread",
-                "cost_est",
-                "edge_net",
-                "signal",
-                "decision",
-                "reason",
-            ],
+            _PM_CANDIDATES_HEADER,
             [],
         )
     # Always keep portfolio JSON stable for the portal.
-    if not p_pm_paper_portfolio.exists():
+    if _needs_placeholder(p_pm_paper_portfolio):
         write_json(
             p_pm_paper_portfolio,
             {
@@ -1425,30 +2136,30 @@ def write_outputs(  # pyright: ignore
     files.append(p_pm_paper_candidates)
 
     p_kr_sig = out / "kraken_futures_signals.csv"
-    if not p_kr_sig.exists():
-        write_csv(p_kr_sig, ["ts", "symbol", "signal", "confidence", "edge", "ref_price", "notes"], [])
+    if _needs_placeholder(p_kr_sig):
+        write_csv(p_kr_sig, _KR_SIGNALS_HEADER, [])
     files.append(p_kr_sig)
 
     p_kr_fill = out / "kraken_futures_fills.csv"
-    if not p_kr_fill.exists():
+    if _needs_placeholder(p_kr_fill):
         write_csv(p_kr_fill, ["ts", "symbol", "side", "qty", "price", "fee", "order_id", "position_id", "notes"], [])
     files.append(p_kr_fill)
 
     p_exec = out / "executed_trades.csv"
-    if not p_exec.exists():
+    if _needs_placeholder(p_exec):
         write_csv(p_exec, ["ts", "venue", "symbol", "side", "qty", "price", "status", "notes"], [])
     files.append(p_exec)
 
     # Scanner log (one row per loop) used by the portal.
     p_pm_scan = out / "pm_scanner_log.csv"
-    if not p_pm_scan.exists():
-        write_csv(p_pm_scan, ["ts", "markets_seen", "edges_computed", "signals_emitted", "status", "notes"], [])
+    if _needs_placeholder(p_pm_scan):
+        write_csv(p_pm_scan, _PM_SCAN_HEADER, [])
     files.append(p_pm_scan)
 
     # Market discovery (Gamma scan) outputs.
     p_pm_markets_index = out / "pm_markets_index.json"
     p_pm_markets_index_full = out / "pm_markets_index_full.json"
-    if not p_pm_markets_index.exists():
+    if _needs_placeholder(p_pm_markets_index):
         write_json(
             p_pm_markets_index,
             {
@@ -1462,7 +2173,7 @@ def write_outputs(  # pyright: ignore
 
     p_pm_scan_candidates = out / "pm_scan_candidates.csv"
     p_pm_scan_candidates_full = out / "pm_scan_candidates_full.csv"
-    if not p_pm_scan_candidates.exists():
+    if _needs_placeholder(p_pm_scan_candidates):
         write_csv(
             p_pm_scan_candidates,
             [
@@ -1492,7 +2203,7 @@ def write_outputs(  # pyright: ignore
 
     # Deadline-ladder scan outputs (derived from pm_markets_index.json + CLOB orderbooks).
     p_pm_deadline_edges = out / "pm_deadline_edges.csv"
-    if not p_pm_deadline_edges.exists():
+    if _needs_placeholder(p_pm_deadline_edges):
         write_csv(
             p_pm_deadline_edges,
             [
@@ -1521,11 +2232,10 @@ def write_outputs(  # pyright: ignore
     # If configured, compute a simple edge using Polymarket CLOB best bid/ask vs Kraken Futures ticker.
     try:
         # Load mapping (preferred) to tie token<->symbol<->fair-model.
-        mm: dict[str, Any] | None = None
+        cache = runtime_cache or RuntimeCache()
         mkts: list[dict[str, Any]] = []
         if cfg.market_map_path and cfg.market_map_path.exists():
-            mm = load_market_map(cfg.market_map_path)
-            mkts = select_markets(mm)
+            mkts = _select_markets_cached(cache, cfg.market_map_path, default_testnet=cfg.kraken_futures_testnet)
 
         # Fallback: if no market map is present, treat env vars as a single market.
         if not mkts:
@@ -1539,10 +2249,14 @@ def write_outputs(  # pyright: ignore
                 }
             ]
 
-        pm_clob = PolymarketClobPublic(base_url=cfg.polymarket_clob_base_url)
-        kr_spot = KrakenSpotPublic(base_url=cfg.kraken_spot_base_url) if cfg.strategy_mode not in {"pm_trend", "pm_draw"} else None
-        deribit = DeribitOptionsPublic()
-        gamma = PolymarketGammaPublic()
+        pm_clob = PolymarketClobPublic(base_url=cfg.polymarket_clob_base_url, session=_http_session("polymarket_clob"))
+        kr_spot = (
+            KrakenSpotPublic(base_url=cfg.kraken_spot_base_url, session=_http_session("kraken_spot"))
+            if cfg.strategy_mode not in {"pm_trend", "pm_draw"}
+            else None
+        )
+        deribit = DeribitOptionsPublic(session=_http_session("deribit"))
+        gamma = PolymarketGammaPublic(session=_http_session("polymarket_gamma"))
         # Portal expects Gamma to be present; mark it OK by default and flip to FAIL on actual errors.
         try:
             sources_health.setdefault("polymarket", {})
@@ -1550,7 +2264,8 @@ def write_outputs(  # pyright: ignore
                 cast(dict[str, Any], sources_health["polymarket"]).setdefault("gamma", {"ok": True})
         except Exception:
             pass
-        cache = runtime_cache or RuntimeCache()
+        if not cache.token_id_disk_loaded:
+            _load_token_cache(out, cache, now_ms=tick_ms, ttl_s=cfg.gamma_token_cache_ttl_s)
 
         # Deep market discovery: periodically scan Gamma for many active markets.
         # Optional: drive the active trading universe from the scan results.
@@ -1590,7 +2305,7 @@ def write_outputs(  # pyright: ignore
             pm_scan_max_spread = float(os.getenv("PM_SCAN_MAX_SPREAD", "0.10") or "0.10")
 
             if pm_scan_enabled:
-                now_ms = _now_ms()
+                now_ms = tick_ms
                 due = (cache.pm_scan_last_run_ms <= 0) or ((now_ms - cache.pm_scan_last_run_ms) >= int(pm_scan_interval_s * 1000.0))
                 if due:
                     print(
@@ -2173,7 +2888,18 @@ def write_outputs(  # pyright: ignore
         if isinstance(paper_positions_any, dict):
             for k, v in cast(dict[Any, Any], paper_positions_any).items():
                 if isinstance(k, str) and isinstance(v, dict):
-                    paper_positions[k] = cast(dict[str, Any], v)
+                    pos_d = cast(dict[str, Any], v)
+                    # Coerce the fields every in-tick write sets once on load, so the trade/MtM paths
+                    # can index pos["shares"], pos["market"], ... directly instead of re-coercing.
+                    pos_d["shares"] = _coerce_float(pos_d.get("shares")) or 0.0
+                    pos_d["avg_entry"] = _coerce_float(pos_d.get("avg_entry")) or 0.0
+                    pos_d["market"] = str(pos_d.get("market") or "")
+                    pos_d["outcome"] = str(pos_d.get("outcome") or "")
+                    pos_d["opened_at"] = str(pos_d.get("opened_at") or ts)
+                    # Only open positions are kept: exits pop their entry, so len(paper_positions)
+                    # is the open-position count and the MtM loop never sees closed rows.
+                    if pos_d["shares"] > 0:
+                        paper_positions[k] = pos_d
 
         # If the active market universe is dynamic (scan-driven), make sure we always keep open
         # paper positions in the active set so we can mark-to-market and evaluate exits.
@@ -2186,20 +2912,14 @@ def write_outputs(  # pyright: ignore
                     if tok:
                         existing_tokens.add(tok)
 
-            for tok, pos_any in list(paper_positions.items()):
-                try:
-                    shares = float(pos_any.get("shares") or 0.0)
-                except Exception:
-                    shares = 0.0
-                if shares <= 0:
-                    continue
-                tok_s = str(tok).strip()
+            for tok, pos_any in paper_positions.items():
+                tok_s = tok.strip()
                 if not tok_s or tok_s in existing_tokens:
                     continue
                 mkts.append(
                     {
-                        "name": str(pos_any.get("market") or f"pos:{tok_s}"),
-                        "polymarket": {"clob_token_id": tok_s, "outcome": str(pos_any.get("outcome") or "")},
+                        "name": pos_any["market"] or f"pos:{tok_s}",
+                        "polymarket": {"clob_token_id": tok_s, "outcome": pos_any["outcome"]},
                         "kraken_spot": {"pair": cfg.kraken_spot_pair},
                     }
                 )
@@ -2238,12 +2958,103 @@ def write_outputs(  # pyright: ignore
             "markets": [],
         }
 
+        # Kraken Futures snapshots are refreshed every few minutes. On a refresh tick their REST calls are
+        # started here, on the long-lived prefetch pool, so they run while the CLOB snapshot below is
+        # taken; the Kraken sections further down pick up the results.
+        kf_public_refresh_s = float(os.getenv("KRAKEN_FUTURES_PUBLIC_REFRESH_S", "300") or "300")
+        kf_instruments_refresh_s = float(os.getenv("KRAKEN_FUTURES_INSTRUMENTS_REFRESH_S", "3600") or "3600")
+        kf_priv_refresh_s = float(os.getenv("KRAKEN_FUTURES_PRIVATE_REFRESH_S", "300") or "300")
+        use_cached_kf_pub = bool(
+            cache.kraken_futures_public_snapshot
+            and cache.kraken_futures_public_fetched_at_ms > 0
+            and (tick_ms - cache.kraken_futures_public_fetched_at_ms) < int(kf_public_refresh_s * 1000.0)
+        )
+        kf_instruments_fresh = cache.kraken_futures_instruments is not None and (
+            tick_ms - cache.kraken_futures_instruments_fetched_at_ms
+        ) < int(kf_instruments_refresh_s * 1000.0)
+        kf_priv_due = bool(
+            cfg.kraken_keys_path
+            and cfg.kraken_keys_path.exists()
+            and not (
+                cache.kraken_futures_private_snapshot
+                and cache.kraken_futures_private_fetched_at_ms > 0
+                and (tick_ms - cache.kraken_futures_private_fetched_at_ms) < int(kf_priv_refresh_s * 1000.0)
+            )
+        )
+        kf_futs: dict[str, Future[Any]] = {}
+        kf_submit_t0 = time.perf_counter()
+        if not use_cached_kf_pub or kf_priv_due:
+            kf_pool = _kf_prefetch_pool()
+            kf_testnet = cfg.kraken_futures_testnet
+            if not use_cached_kf_pub:
+                kf_futs["tickers"] = kf_pool.submit(lambda: _kf_threadlocal(testnet=kf_testnet).get_tickers())
+                if not kf_instruments_fresh:
+                    kf_futs["instruments"] = kf_pool.submit(lambda: _kf_threadlocal(testnet=kf_testnet).get_instruments())
+            if kf_priv_due and cfg.kraken_keys_path:
+                kf_keys_path = cfg.kraken_keys_path
+
+                def _kf_private_fetch() -> tuple[dict[str, Any], list[dict[str, Any]]]:
+                    kf_private = _kf_threadlocal(testnet=kf_testnet, keys=load_kraken_keys(kf_keys_path))
+                    return kf_private.get_accounts(), kf_private.get_openpositions()
+
+                kf_futs["private"] = kf_pool.submit(_kf_private_fetch)
+
         # Compute these from the same market list we use for edge so it's aligned.
         # Note: token_id is mandatory to query /book.
-        clob_t0 = _now_ms()
+        # Books fetched for the snapshot are kept for the rest of the tick (fair pass, fills, MtM).
+        tick_ob_by_token: dict[str, dict[str, Any]] = {}
+        clob_t0 = time.perf_counter()
         clob_ok_markets = 0
         clob_error_markets = 0
-        for mkt in mkts:
+        # Slug-configured markets need their Gamma market below (and again in the fair pass); with
+        # PM_ORDERBOOK_WORKERS/GAMMA_WORKERS > 1 the cold ones are fetched concurrently up front.
+        if pm_orderbook_executor is not None and cfg.pm_orderbook_workers > 1:
+            gamma_refs: list[str] = []
+            for mkt in mkts:
+                pm_block = mkt.get("polymarket")
+                if not isinstance(pm_block, dict):
+                    continue
+                pm_cfg = cast(dict[str, Any], pm_block)
+                ref = str(pm_cfg.get("market_url") or pm_cfg.get("market_slug") or "").strip()
+                if ref and not str(pm_cfg.get("clob_token_id", "") or "").strip():
+                    gamma_refs.append(ref)
+            _prefetch_gamma_markets(
+                cache,
+                gamma_refs,
+                executor=pm_orderbook_executor,
+                workers=int(cfg.gamma_workers),
+                now_ms=tick_ms,
+                ttl_s=cfg.gamma_cache_ttl_s,
+                latency_tracker=latency_tracker,
+            )
+        # Books for every token already known before the loop (explicit clob_token_id, or a cached
+        # slug+outcome resolution) come from the market websocket or one batched /books request;
+        # the loop only falls back to /book for the rest.
+        snap_tokens: list[str] = []
+        for mkt in mkts:
+            pm_block = mkt.get("polymarket")
+            if not isinstance(pm_block, dict):
+                continue
+            pm_cfg = cast(dict[str, Any], pm_block)
+            tok = str(pm_cfg.get("clob_token_id", "") or "").strip()
+            if not tok:
+                ref = str(pm_cfg.get("market_url") or pm_cfg.get("market_slug") or "").strip()
+                outcome = str(pm_cfg.get("outcome") or "").strip()
+                if ref and outcome:
+                    tok = _cache_get_token_id(cache, key=(ref, outcome), now_ms=tick_ms, ttl_s=cfg.gamma_token_cache_ttl_s) or ""
+            if tok:
+                snap_tokens.append(tok)
+        snap_tokens = list(dict.fromkeys(snap_tokens))
+        if pm_market_wss is not None and snap_tokens:
+            pm_market_wss.watch(snap_tokens)
+            tick_ob_by_token.update(pm_market_wss.get_books(snap_tokens, max_age_s=cfg.pm_market_wss_max_age_s))
+            snap_tokens = [t for t in snap_tokens if t not in tick_ob_by_token]
+        if len(snap_tokens) > 1:
+            try:
+                tick_ob_by_token.update(pm_clob.get_orderbooks(snap_tokens))
+            except Exception:
+                pass
+        for mkt in mkts:
             market_name = str(mkt.get("name") or "market")
             token_id: str | None = None
             pm_block = mkt.get("polymarket")
@@ -2256,7 +3067,7 @@ def write_outputs(  # pyright: ignore
                     market_ref = str(pm_cfg.get("market_url") or pm_cfg.get("market_slug") or "").strip() or None
                     if market_ref:
                         try:
-                            now_ms = _now_ms()
+                            now_ms = tick_ms
                             gm = _cache_get_gamma_market(cache, key=market_ref, now_ms=now_ms, ttl_s=cfg.gamma_cache_ttl_s)
                             if gm is None:
                                 t_g0 = time.perf_counter()
@@ -2284,7 +3095,7 @@ def write_outputs(  # pyright: ignore
                                 )
 
                             cache_key = (market_ref, chosen)
-                            token_id_cached = _cache_get_token_id(cache, key=cache_key, now_ms=now_ms, ttl_s=cfg.gamma_cache_ttl_s)
+                            token_id_cached = _cache_get_token_id(cache, key=cache_key, now_ms=now_ms, ttl_s=cfg.gamma_token_cache_ttl_s)
                             if token_id_cached:
                                 token_id = token_id_cached
                             else:
@@ -2310,7 +3121,9 @@ def write_outputs(  # pyright: ignore
                 continue
 
             try:
-                ob = pm_clob.get_orderbook(token_id)
+                ob = tick_ob_by_token.get(token_id)
+                if ob is None:
+                    ob = tick_ob_by_token[token_id] = pm_clob.get_orderbook(token_id)
                 bid, ask = best_bid_ask(ob)
                 bids = _safe_top_levels(ob.get("bids"), max_levels=cfg.clob_depth_levels)
                 asks = _safe_top_levels(ob.get("asks"), max_levels=cfg.clob_depth_levels)
@@ -2347,7 +3160,7 @@ def write_outputs(  # pyright: ignore
             "markets": len(clob_summary.get("markets") or []),
             "ok_markets": clob_ok_markets,
             "error_markets": clob_error_markets,
-            "ms": _now_ms() - clob_t0,
+            "ms": int((time.perf_counter() - clob_t0) * 1000),
         }
 
         p_clob = out / "polymarket_clob_public.json"
@@ -2357,13 +3170,7 @@ def write_outputs(  # pyright: ignore
         # Kraken Futures public snapshot.
         # We fetch *all* instruments/tickers, then also provide a small filtered view for mapped symbols.
         # This keeps it future-proof when you add more markets.
-        kf_public_refresh_s = float(os.getenv("KRAKEN_FUTURES_PUBLIC_REFRESH_S", "300") or "300")
-        kf_now_ms = _now_ms()
-        use_cached_kf_pub = bool(
-            cache.kraken_futures_public_snapshot
-            and cache.kraken_futures_public_fetched_at_ms > 0
-            and (kf_now_ms - cache.kraken_futures_public_fetched_at_ms) < int(kf_public_refresh_s * 1000.0)
-        )
+        kf_now_ms = tick_ms
 
         instruments: list[dict[str, Any]]
         tickers: list[dict[str, Any]]
@@ -2381,11 +3188,16 @@ def write_outputs(  # pyright: ignore
                 "ms": 0,
             }
         else:
-            kf_t0 = _now_ms()
-            t_kf0 = time.perf_counter()
-            kf_public = KrakenFuturesApi(testnet=cfg.kraken_futures_testnet)
-            instruments = kf_public.get_instruments()
-            tickers = kf_public.get_tickers()
+            # Timed from submission: the calls were started before the CLOB snapshot.
+            kf_t0 = kf_submit_t0
+            t_kf0 = kf_submit_t0
+            if cache.kraken_futures_instruments is not None and kf_instruments_fresh:
+                instruments = cache.kraken_futures_instruments
+            else:
+                instruments = kf_futs["instruments"].result()
+                cache.kraken_futures_instruments = instruments
+                cache.kraken_futures_instruments_fetched_at_ms = kf_now_ms
+            tickers = kf_futs["tickers"].result()
             if latency_tracker is not None:
                 latency_tracker.record_kraken_futures_public_fetch(float((time.perf_counter() - t_kf0) * 1000.0))
             cache.kraken_futures_public_snapshot = {
@@ -2396,7 +3208,7 @@ def write_outputs(  # pyright: ignore
                 "tickers": tickers,
             }
             cache.kraken_futures_public_fetched_at_ms = kf_now_ms
-            sources_health["kraken"]["futures"]["public"] = {"ok": True, "cached": False, "ms": _now_ms() - kf_t0}
+            sources_health["kraken"]["futures"]["public"] = {"ok": True, "cached": False, "ms": int((time.perf_counter() - kf_t0) * 1000)}
 
         mapped_symbols: list[str] = []
         for mkt in mkts:
@@ -2408,13 +3220,13 @@ def write_outputs(  # pyright: ignore
                     mapped_symbols.append(sym)
         if cfg.kraken_futures_symbol:
             mapped_symbols.append(cfg.kraken_futures_symbol)
-        mapped_symbols = sorted(set(mapped_symbols))
+        mapped_set = frozenset(mapped_symbols)
+        mapped_symbols = sorted(mapped_set)
 
-        tickers_by_symbol: dict[str, Any] = {}
-        for t in tickers:
-            sym = str(t.get("symbol", "") or "").strip()
-            if sym in mapped_symbols:
-                tickers_by_symbol[sym] = t
+        # Hash lookup per ticker (mapped_symbols is a sorted list kept for the JSON output).
+        tickers_by_symbol: dict[str, Any] = {
+            sym: t for t in tickers if (sym := str(t.get("symbol", "") or "").strip()) in mapped_set
+        }
 
         kraken_futures_public_snapshot: dict[str, Any] = {
             "generated_at": (cache.kraken_futures_public_snapshot or {}).get("generated_at") or ts,
@@ -2450,13 +3262,8 @@ def write_outputs(  # pyright: ignore
             "open_positions": None,
         }
         if cfg.kraken_keys_path and cfg.kraken_keys_path.exists():
-            kf_priv_refresh_s = float(os.getenv("KRAKEN_FUTURES_PRIVATE_REFRESH_S", "300") or "300")
-            kf_priv_now_ms = _now_ms()
-            use_cached_kf_priv = bool(
-                cache.kraken_futures_private_snapshot
-                and cache.kraken_futures_private_fetched_at_ms > 0
-                and (kf_priv_now_ms - cache.kraken_futures_private_fetched_at_ms) < int(kf_priv_refresh_s * 1000.0)
-            )
+            kf_priv_now_ms = tick_ms
+            use_cached_kf_priv = not kf_priv_due
 
             if use_cached_kf_priv:
                 try:
@@ -2473,13 +3280,19 @@ def write_outputs(  # pyright: ignore
                     use_cached_kf_priv = False
 
             if not use_cached_kf_priv:
-                kf_priv_t0 = _now_ms()
+                kf_priv_t0 = kf_submit_t0
                 try:
-                    t_kf1 = time.perf_counter()
-                    keys = load_kraken_keys(cfg.kraken_keys_path)
-                    kf_private = KrakenFuturesApi(keys=keys, testnet=cfg.kraken_futures_testnet)
-                    accounts = kf_private.get_accounts()
-                    open_positions = kf_private.get_openpositions()
+                    t_kf1 = kf_submit_t0
+                    priv_fut = kf_futs.get("private")
+                    if priv_fut is not None:
+                        accounts, open_positions = priv_fut.result()
+                    else:
+                        # Cached snapshot turned out unusable above: fetch it inline.
+                        kf_priv_t0 = t_kf1 = time.perf_counter()
+                        keys = load_kraken_keys(cfg.kraken_keys_path)
+                        kf_private = KrakenFuturesApi(keys=keys, testnet=cfg.kraken_futures_testnet, session=_http_session("kraken_futures"))
+                        accounts = kf_private.get_accounts()
+                        open_positions = kf_private.get_openpositions()
                     if latency_tracker is not None:
                         latency_tracker.record_kraken_futures_private_fetch(float((time.perf_counter() - t_kf1) * 1000.0))
                     kraken_futures_private_snapshot.update(
@@ -2495,7 +3308,7 @@ def write_outputs(  # pyright: ignore
                     )
                     cache.kraken_futures_private_snapshot = dict(kraken_futures_private_snapshot)
                     cache.kraken_futures_private_fetched_at_ms = kf_priv_now_ms
-                    sources_health["kraken"]["futures"]["private"] = {"ok": True, "cached": False, "ms": _now_ms() - kf_priv_t0}
+                    sources_health["kraken"]["futures"]["private"] = {"ok": True, "cached": False, "ms": int((time.perf_counter() - kf_priv_t0) * 1000)}
                 except Exception as e:
                     kraken_futures_private_snapshot["error"] = str(e)
                     sources_health["kraken"]["futures"]["private"] = {"ok": False, "error": str(e)}
@@ -2528,34 +3341,33 @@ def write_outputs(  # pyright: ignore
         deribit_used = 0
 
         # Optional: Polymarket live client is created once in main() and passed in.
-        poly_trading_enabled = bool(
-            cfg.trading_mode == "live"
-            and cfg.poly_live_confirm == "YES"
-            and cfg.poly_private_key
-            and cfg.poly_api_key
-            and cfg.poly_api_secret
-            and cfg.poly_api_passphrase
-            and pm_live_client is not None
-        )
+        poly_trading_enabled = cfg.poly_trading_configured and pm_live_client is not None
 
         if pm_live_error:
             live_status["polymarket_live_error"] = str(pm_live_error)
         if pm_user_wss_status is not None:
             live_status["pm_user_wss"] = dict(pm_user_wss_status)
+        if pm_market_wss is not None:
+            live_status["pm_market_wss"] = pm_market_wss.status()
 
         # If killswitch is active and we have a live client, cancel all open orders and skip trading actions.
-        if killswitch_active(cfg) and pm_live_client is not None:
+        # The agent places nothing while it stays active, so cancel-all runs once per activation
+        # (retried each tick until it succeeds) instead of on every tick.
+        if not ks_active:
+            cache.killswitch_cancel_done = False
+        elif pm_live_client is not None and not cache.killswitch_cancel_done:
             try:
                 resp = pm_cancel_all_orders(pm_live_client)
+                cache.killswitch_cancel_done = True
                 append_csv_row(
                     p_pm_orders,
-                    ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                    [ts, "*", "*", "*", "", "", "canceled_all", "", json.dumps(resp, ensure_ascii=False)[:500]],
+                    _PM_ORDERS_HEADER,
+                    [ts, "*", "*", "*", "", "", "canceled_all", "", _json_snippet(resp)],
                 )
             except Exception as e:
                 append_csv_row(
                     p_pm_orders,
-                    ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
+                    _PM_ORDERS_HEADER,
                     [ts, "*", "*", "*", "", "", "cancel_all_error", "", str(e)[:500]],
                 )
             # Still record scan row below.
@@ -2583,7 +3395,6 @@ def write_outputs(  # pyright: ignore
             except Exception as e:
                 open_orders_payload["error"] = str(e)
                 live_status["pm_open_orders_error"] = str(e)
-                write_json(p_live, live_status)
 
         write_json(p_open, open_orders_payload)
         files.append(p_open)
@@ -2613,21 +3424,6 @@ def write_outputs(  # pyright: ignore
             spot_by_pair: dict[str, float] = {}
             spot_ts_by_pair: dict[str, datetime] = {}
 
-            # Thread-local PM CLOB client (Session is not shared across threads).
-            _pm_tls = threading.local()
-
-            def _pm_client_threadlocal() -> PolymarketClobPublic:
-                c = getattr(_pm_tls, "client", None)
-                base = getattr(_pm_tls, "base_url", None)
-                timeout = getattr(_pm_tls, "timeout_s", None)
-                if c is None or base != cfg.polymarket_clob_base_url or timeout != 10.0:
-                    sess = requests.Session()
-                    c = PolymarketClobPublic(base_url=cfg.polymarket_clob_base_url, timeout_s=10.0, session=sess)
-                    setattr(_pm_tls, "client", c)
-                    setattr(_pm_tls, "base_url", cfg.polymarket_clob_base_url)
-                    setattr(_pm_tls, "timeout_s", 10.0)
-                return cast(PolymarketClobPublic, c)
-
             ctxs: list[dict[str, Any]] = []
 
             # Build per-market items first, then prefetch Gamma for all missing refs.
@@ -2694,27 +3490,18 @@ def write_outputs(  # pyright: ignore
                     }
                 )
 
-            # Thread-local Gamma client (Session is not shared across threads).
-            _gamma_tls = threading.local()
-
-            def _gamma_client_threadlocal() -> PolymarketGammaPublic:
-                g = getattr(_gamma_tls, "client", None)
-                if g is None:
-                    sess = requests.Session()
-                    g = PolymarketGammaPublic(timeout_s=20.0, session=sess)
-                    setattr(_gamma_tls, "client", g)
-                return cast(PolymarketGammaPublic, g)
-
             # Prefetch Gamma markets for all refs that need it and are missing/expired.
-            now_ms = _now_ms()
+            now_ms = tick_ms
             refs_to_fetch: list[str] = []
+            # market_ref/token_id/chosen_outcome are declared `str | None` above, so the per-market
+            # loops below bind the dict values directly instead of paying a cast() call each.
             for it in market_items:
-                market_ref = cast(str | None, it.get("market_ref"))
+                market_ref = it.get("market_ref")
                 if not market_ref:
                     continue
 
-                token_id = cast(str | None, it.get("token_id"))
-                chosen_outcome = cast(str | None, it.get("chosen_outcome"))
+                token_id = it.get("token_id")
+                chosen_outcome = it.get("chosen_outcome")
                 fair_mode = str(it.get("fair_mode") or "").strip().lower()
                 direction = str(it.get("direction") or "").strip().lower()
                 needs_infer = (not chosen_outcome) and (fair_mode == "deribit_touch") and (direction in {"touch_above", "no_touch_above", "touch_below", "no_touch_below"})
@@ -2735,7 +3522,7 @@ def write_outputs(  # pyright: ignore
                     t_g0 = time.perf_counter()
                     try:
                         sem.acquire()
-                        gm = _gamma_client_threadlocal().get_market_by_slug(slug=ref)
+                        gm = _gamma_threadlocal().get_market_by_slug(slug=ref)
                         ms = float((time.perf_counter() - t_g0) * 1000.0)
                         return ref, gm, ms, None
                     except Exception as e:
@@ -2770,12 +3557,12 @@ def write_outputs(  # pyright: ignore
 
             # Phase 1: determine outcome for all markets (so we can batch token resolution).
             for it in market_items:
-                chosen_outcome = cast(str | None, it.get("chosen_outcome"))
+                chosen_outcome = it.get("chosen_outcome")
                 if chosen_outcome:
                     continue
 
                 desired_outcome = "Yes" if cfg.lead_lag_side == "YES" else "No"
-                market_ref = cast(str | None, it.get("market_ref"))
+                market_ref = it.get("market_ref")
                 fair_mode = str(it.get("fair_mode") or "").strip().lower()
                 direction = str(it.get("direction") or "").strip().lower()
 
@@ -2791,26 +3578,26 @@ def write_outputs(  # pyright: ignore
 
             # Phase 2: batch/parallel resolve token_id for all missing (market_ref, chosen_outcome).
             # Note: keep cache writes on the main thread (avoid concurrent dict mutation).
-            now_ms = _now_ms()
+            now_ms = tick_ms
             token_jobs: list[tuple[str, str]] = []
             token_job_keys: set[tuple[str, str]] = set()
             for it in market_items:
-                token_id = cast(str | None, it.get("token_id"))
+                token_id = it.get("token_id")
                 # If PM-trend auto-side is enabled, we still want to resolve both sides
                 # even if a single token_id was provided.
                 pm_auto_side = bool(cfg.strategy_mode == "pm_trend" and cfg.pm_trend_auto_side and it.get("pm_auto_side"))
                 if token_id and not pm_auto_side:
                     continue
 
-                market_ref = cast(str | None, it.get("market_ref"))
-                chosen_outcome = cast(str | None, it.get("chosen_outcome"))
+                market_ref = it.get("market_ref")
+                chosen_outcome = it.get("chosen_outcome")
                 if not market_ref or not chosen_outcome:
                     continue
 
                 if pm_auto_side:
                     for outcome in ("Yes", "No"):
                         cache_key = (market_ref, outcome)
-                        tok_cached = _cache_get_token_id(cache, key=cache_key, now_ms=now_ms, ttl_s=cfg.gamma_cache_ttl_s)
+                        tok_cached = _cache_get_token_id(cache, key=cache_key, now_ms=now_ms, ttl_s=cfg.gamma_token_cache_ttl_s)
                         if tok_cached:
                             it["token_id_yes" if outcome == "Yes" else "token_id_no"] = tok_cached
                             continue
@@ -2819,7 +3606,7 @@ def write_outputs(  # pyright: ignore
                             token_jobs.append(cache_key)
                 else:
                     cache_key = (market_ref, chosen_outcome)
-                    tok_cached = _cache_get_token_id(cache, key=cache_key, now_ms=now_ms, ttl_s=cfg.gamma_cache_ttl_s)
+                    tok_cached = _cache_get_token_id(cache, key=cache_key, now_ms=now_ms, ttl_s=cfg.gamma_token_cache_ttl_s)
                     if tok_cached:
                         it["token_id"] = tok_cached
                         continue
@@ -2849,10 +3636,10 @@ def write_outputs(  # pyright: ignore
 
                         gm = gamma_market_by_ref.get(ref)
                         if gm is None:
-                            fetched_market = _gamma_client_threadlocal().get_market_by_slug(slug=ref)
+                            fetched_market = _gamma_threadlocal().get_market_by_slug(slug=ref)
                             gm = fetched_market
 
-                        token_id_local = _gamma_client_threadlocal().resolve_token_id(market=gm, desired_outcome=outcome)
+                        token_id_local = _gamma_threadlocal().resolve_token_id(market=gm, desired_outcome=outcome)
                         ms = float((time.perf_counter() - t0) * 1000.0)
                         return cache_key, str(token_id_local), fetched_market, ms, None
                     except Exception as e:
@@ -2893,34 +3680,34 @@ def write_outputs(  # pyright: ignore
 
                 # Fill in token_id on all market items from cache.
                 for it in market_items:
-                    token_id = cast(str | None, it.get("token_id"))
+                    token_id = it.get("token_id")
                     pm_auto_side = bool(cfg.strategy_mode == "pm_trend" and cfg.pm_trend_auto_side and it.get("pm_auto_side"))
                     if token_id and not pm_auto_side:
                         continue
-                    market_ref = cast(str | None, it.get("market_ref"))
-                    chosen_outcome = cast(str | None, it.get("chosen_outcome"))
+                    market_ref = it.get("market_ref")
+                    chosen_outcome = it.get("chosen_outcome")
                     if not market_ref or not chosen_outcome:
                         continue
                     if pm_auto_side:
-                        tok_y = _cache_get_token_id(cache, key=(market_ref, "Yes"), now_ms=now_ms, ttl_s=cfg.gamma_cache_ttl_s)
-                        tok_n = _cache_get_token_id(cache, key=(market_ref, "No"), now_ms=now_ms, ttl_s=cfg.gamma_cache_ttl_s)
+                        tok_y = _cache_get_token_id(cache, key=(market_ref, "Yes"), now_ms=now_ms, ttl_s=cfg.gamma_token_cache_ttl_s)
+                        tok_n = _cache_get_token_id(cache, key=(market_ref, "No"), now_ms=now_ms, ttl_s=cfg.gamma_token_cache_ttl_s)
                         if tok_y:
                             it["token_id_yes"] = tok_y
                         if tok_n:
                             it["token_id_no"] = tok_n
                     else:
-                        tok_cached = _cache_get_token_id(cache, key=(market_ref, chosen_outcome), now_ms=now_ms, ttl_s=cfg.gamma_cache_ttl_s)
+                        tok_cached = _cache_get_token_id(cache, key=(market_ref, chosen_outcome), now_ms=now_ms, ttl_s=cfg.gamma_token_cache_ttl_s)
                         if tok_cached:
                             it["token_id"] = tok_cached
 
             for it in market_items:
                 mkt = cast(dict[str, Any], it.get("mkt") or {})
                 market_name = str(it.get("market_name") or "market")
-                token_id = cast(str | None, it.get("token_id"))
-                token_id_yes = cast(str | None, it.get("token_id_yes"))
-                token_id_no = cast(str | None, it.get("token_id_no"))
-                chosen_outcome = cast(str | None, it.get("chosen_outcome"))
-                market_ref = cast(str | None, it.get("market_ref"))
+                token_id = it.get("token_id")
+                token_id_yes: str | None = it.get("token_id_yes")
+                token_id_no: str | None = it.get("token_id_no")
+                chosen_outcome = it.get("chosen_outcome")
+                market_ref = it.get("market_ref")
                 pair = str(it.get("pair") or cfg.kraken_spot_pair).strip() or cfg.kraken_spot_pair
                 fair_mode = str(it.get("fair_mode") or "").strip().lower()
                 direction = str(it.get("direction") or "").strip().lower()
@@ -2942,7 +3729,7 @@ def write_outputs(  # pyright: ignore
                 if not token_id and market_ref and chosen_outcome:
                     try:
                         cache_key = (market_ref, chosen_outcome)
-                        tok_cached = _cache_get_token_id(cache, key=cache_key, now_ms=now_ms, ttl_s=cfg.gamma_cache_ttl_s)
+                        tok_cached = _cache_get_token_id(cache, key=cache_key, now_ms=now_ms, ttl_s=cfg.gamma_token_cache_ttl_s)
                         if tok_cached:
                             token_id = tok_cached
                         else:
@@ -2985,51 +3772,14 @@ def write_outputs(  # pyright: ignore
                     continue
 
                 if not token_id:
-                    append_csv_row(
+                    _append_candidate_skip(
                         p_pm_paper_candidates,
-                        [
-                            "ts",
-                            "market",
-                            "market_ref",
-                            "token",
-                            "outcome",
-                            "pm_bid",
-                            "pm_ask",
-                            "pm_mid",
-                            "odds",
-                            "odds_allowed",
-                            "fair_p",
-                            "ev",
-                            "edge",
-                            "spread",
-                            "cost_est",
-                            "edge_net",
-                            "signal",
-                            "decision",
-                            "reason",
-                        ],
-                        [
-                            ts,
-                            market_name,
-                            market_ref or "",
-                            "",
-                            chosen_outcome or "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "skip",
-                            "no_token",
-                        ],
-                        keep_last=5000,
+                        ts=ts,
+                        market=market_name,
+                        market_ref=market_ref,
+                        token=None,
+                        outcome=chosen_outcome,
+                        reason="no_token",
                     )
                     continue
 
@@ -3054,51 +3804,14 @@ def write_outputs(  # pyright: ignore
                     spot_price = float(spot_by_pair[pair])
 
                     if not (spot_price == spot_price):
-                        append_csv_row(
+                        _append_candidate_skip(
                             p_pm_paper_candidates,
-                            [
-                                "ts",
-                                "market",
-                                "market_ref",
-                                "token",
-                                "outcome",
-                                "pm_bid",
-                                "pm_ask",
-                                "pm_mid",
-                                "odds",
-                                "odds_allowed",
-                                "fair_p",
-                                "ev",
-                                "edge",
-                                "spread",
-                                "cost_est",
-                                "edge_net",
-                                "signal",
-                                "decision",
-                                "reason",
-                            ],
-                            [
-                                ts,
-                                market_name,
-                                market_ref or "",
-                                token_id,
-                                chosen_outcome or "",
-                                "",
-                                "",
-                                "",
-                                "",
-                                "",
-                                "",
-                                "",
-                                "",
-                                "",
-                                "",
-                                "",
-                                "",
-                                "skip",
-                                "missing_spot",
-                            ],
-                            keep_last=5000,
+                            ts=ts,
+                            market=market_name,
+                            market_ref=market_ref,
+                            token=token_id,
+                            outcome=chosen_outcome,
+                            reason="missing_spot",
                         )
                         continue
 
@@ -3132,7 +3845,7 @@ def write_outputs(  # pyright: ignore
                 def _fetch_ob(tok: str) -> tuple[str, dict[str, Any] | None, float, str | None]:
                     t_ob0 = time.perf_counter()
                     try:
-                        ob_any = _pm_client_threadlocal().get_orderbook(tok)
+                        ob_any = _pm_clob_threadlocal(cfg.polymarket_clob_base_url).get_orderbook(tok)
                         ms = float((time.perf_counter() - t_ob0) * 1000.0)
                         return tok, cast(dict[str, Any], ob_any) if isinstance(ob_any, dict) else {"data": ob_any}, ms, None
                     except Exception as e:
@@ -3193,13 +3906,8 @@ def write_outputs(  # pyright: ignore
                         if not tok:
                             continue
                         pos = paper_positions.get(tok)
-                        if pos is None:
-                            continue
-                        try:
-                            if float(pos.get("shares") or 0.0) > 0:
-                                group_has_open_pos.add(g)
-                        except Exception:
-                            pass
+                        if pos is not None and pos["shares"] > 0:
+                            group_has_open_pos.add(g)
                 except Exception:
                     pass
 
@@ -3268,11 +3976,15 @@ def write_outputs(  # pyright: ignore
                         sources_health.setdefault("pm_draw", {})
                         sources_health["pm_draw"] = {"ok": False, "error": str(e), "baseline_file": str(cfg.pm_draw_baseline_file)}
 
+            ll_mode_tag = cfg.strategy_mode if cfg.strategy_mode in {"pm_trend", "pm_draw"} else "lead_lag"
+            ll_entry_notes = _LL_ENTRY_NOTES[ll_mode_tag]
+            ll_exit_notes = _LL_EXIT_NOTES[ll_mode_tag]
+
             for ctx in ctxs:
                 market_name = str(ctx.get("market_name") or "market")
                 token_id = str(ctx.get("token_id") or "").strip()
-                chosen_outcome = cast(str | None, ctx.get("chosen_outcome"))
-                market_ref = cast(str | None, ctx.get("market_ref"))
+                chosen_outcome = ctx.get("chosen_outcome")
+                market_ref = ctx.get("market_ref")
                 pair = str(ctx.get("pair") or cfg.kraken_spot_pair).strip() or cfg.kraken_spot_pair
                 spot_price = float(ctx.get("spot_price") or float("nan"))
                 fair_p = None
@@ -3293,51 +4005,16 @@ def write_outputs(  # pyright: ignore
                     pm_mid = None
 
                 if pm_mid is None or (cfg.strategy_mode not in {"pm_trend", "pm_draw"} and not (spot_price == spot_price)):
-                    append_csv_row(
+                    _append_candidate_skip(
                         p_pm_paper_candidates,
-                        [
-                            "ts",
-                            "market",
-                            "market_ref",
-                            "token",
-                            "outcome",
-                            "pm_bid",
-                            "pm_ask",
-                            "pm_mid",
-                            "odds",
-                            "odds_allowed",
-                            "fair_p",
-                            "ev",
-                            "edge",
-                            "spread",
-                            "cost_est",
-                            "edge_net",
-                            "signal",
-                            "decision",
-                            "reason",
-                        ],
-                        [
-                            ts,
-                            market_name,
-                            market_ref or "",
-                            token_id,
-                            chosen_outcome or "",
-                            bid if bid is not None else "",
-                            ask if ask is not None else "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "skip",
-                            "missing_price",
-                        ],
-                        keep_last=5000,
+                        ts=ts,
+                        market=market_name,
+                        market_ref=market_ref,
+                        token=token_id,
+                        outcome=chosen_outcome,
+                        bid=bid,
+                        ask=ask,
+                        reason="missing_price",
                     )
                     continue
 
@@ -3354,10 +4031,14 @@ def write_outputs(  # pyright: ignore
 
                 ll_key = f"{market_name}:{token_id}:{pair}"
 
+                # Per-market signal locals; bound up front so every exit path (and the
+                # health tracker record below) sees a defined value.
                 lag_ms: float | None = None
                 spot_ret = None
                 pm_ret = None
                 edge_pct = None
+                spread_cost_pct: float | None = None
+                net_edge_pct: float | None = None
 
                 if cfg.strategy_mode == "pm_trend":
                     pm_ret = None
@@ -3444,157 +4125,60 @@ def write_outputs(  # pyright: ignore
 
                 # Trading decisions only when fresh + enough history
                 if not is_fresh or edge_pct is None:
-                    append_csv_row(
+                    _append_candidate_skip(
                         p_pm_paper_candidates,
-                        [
-                            "ts",
-                            "market",
-                            "market_ref",
-                            "token",
-                            "outcome",
-                            "pm_bid",
-                            "pm_ask",
-                            "pm_mid",
-                            "odds",
-                            "odds_allowed",
-                            "fair_p",
-                            "ev",
-                            "edge",
-                            "spread",
-                            "cost_est",
-                            "edge_net",
-                            "signal",
-                            "decision",
-                            "reason",
-                        ],
-                        [
-                            ts,
-                            market_name,
-                            market_ref or "",
-                            token_id,
-                            chosen_outcome or "",
-                            bid if bid is not None else "",
-                            ask if ask is not None else "",
-                            float(pm_mid),
-                            "",
-                            "",
-                            "",
-                            "",
-                            float(edge_pct) if edge_pct is not None else "",
-                            "",
-                            "",
-                            "",
-                            "",
-                            "skip",
-                            "stale_or_warmup" if not is_fresh else "warmup",
-                        ],
-                        keep_last=5000,
+                        ts=ts,
+                        market=market_name,
+                        market_ref=market_ref,
+                        token=token_id,
+                        outcome=chosen_outcome,
+                        bid=bid,
+                        ask=ask,
+                        pm_mid=pm_mid,
+                        edge=edge_pct,
+                        reason="stale_or_warmup" if not is_fresh else "warmup",
                     )
                     continue
 
                 # Price zone guards
                 if float(pm_mid) > cfg.lead_lag_avoid_price_above or float(pm_mid) < cfg.lead_lag_avoid_price_below:
-                    append_csv_row(
+                    _append_candidate_skip(
                         p_pm_paper_candidates,
-                        [
-                            "ts",
-                            "market",
-                            "market_ref",
-                            "token",
-                            "outcome",
-                            "pm_bid",
-                            "pm_ask",
-                            "pm_mid",
-                            "odds",
-                            "odds_allowed",
-                            "fair_p",
-                            "ev",
-                            "edge",
-                            "spread",
-                            "cost_est",
-                            "edge_net",
-                            "signal",
-                            "decision",
-                            "reason",
-                        ],
-                        [
-                            ts,
-                            market_name,
-                            market_ref or "",
-                            token_id,
-                            chosen_outcome or "",
-                            bid if bid is not None else "",
-                            ask if ask is not None else "",
-                            float(pm_mid),
-                            "",
-                            "",
-                            "",
-                            "",
-                            float(edge_pct),
-                            "",
-                            "",
-                            "",
-                            "",
-                            "skip",
-                            "avoid_price_zone",
-                        ],
-                        keep_last=5000,
+                        ts=ts,
+                        market=market_name,
+                        market_ref=market_ref,
+                        token=token_id,
+                        outcome=chosen_outcome,
+                        bid=bid,
+                        ask=ask,
+                        pm_mid=pm_mid,
+                        edge=edge_pct,
+                        reason="avoid_price_zone",
                     )
                     continue
 
                 # Draw-specific guard: avoid buying very expensive draw tokens.
                 if cfg.strategy_mode == "pm_draw" and float(cfg.pm_draw_max_price) > 0 and float(pm_mid) > float(cfg.pm_draw_max_price):
-                    append_csv_row(
+                    _append_candidate_skip(
                         p_pm_paper_candidates,
-                        [
-                            "ts",
-                            "market",
-                            "market_ref",
-                            "token",
-                            "outcome",
-                            "pm_bid",
-                            "pm_ask",
-                            "pm_mid",
-                            "odds",
-                            "odds_allowed",
-                            "fair_p",
-                            "ev",
-                            "edge",
-                            "spread",
-                            "cost_est",
-                            "edge_net",
-                            "signal",
-                            "decision",
-                            "reason",
-                        ],
-                        [
-                            ts,
-                            market_name,
-                            market_ref or "",
-                            token_id,
-                            chosen_outcome or "",
-                            bid if bid is not None else "",
-                            ask if ask is not None else "",
-                            float(pm_mid),
-                            "",
-                            "",
-                            float(fair_p) if fair_p is not None else "",
-                            "",
-                            float(edge_pct) if edge_pct is not None else "",
-                            "",
-                            "",
-                            "",
-                            "watch",
-                            "skip",
-                            "draw_too_expensive",
-                        ],
-                        keep_last=5000,
+                        ts=ts,
+                        market=market_name,
+                        market_ref=market_ref,
+                        token=token_id,
+                        outcome=chosen_outcome,
+                        bid=bid,
+                        ask=ask,
+                        pm_mid=pm_mid,
+                        fair_p=fair_p,
+                        edge=edge_pct,
+                        signal="watch",
+                        reason="draw_too_expensive",
                     )
                     continue
 
                 # Determine whether we are already in position for this token
                 pos = paper_positions.get(token_id)
-                in_pos = pos is not None and float(pos.get("shares") or 0.0) > 0
+                in_pos = pos is not None and pos["shares"] > 0
 
                 # Entry safety: avoid trading into very wide spreads or extreme executable prices.
                 # (Entry executes at ask; using mid for gating can otherwise create false-positive edges.)
@@ -3605,106 +4189,42 @@ def write_outputs(  # pyright: ignore
                         spread = float("inf")
 
                     if spread > float(cfg.lead_lag_slippage_cap):
-                        append_csv_row(
+                        _append_candidate_skip(
                             p_pm_paper_candidates,
-                            [
-                                "ts",
-                                "market",
-                                "market_ref",
-                                "token",
-                                "outcome",
-                                "pm_bid",
-                                "pm_ask",
-                                "pm_mid",
-                                "odds",
-                                "odds_allowed",
-                                "fair_p",
-                                "ev",
-                                "edge",
-                                "spread",
-                                "cost_est",
-                                "edge_net",
-                                "signal",
-                                "decision",
-                                "reason",
-                            ],
-                            [
-                                ts,
-                                market_name,
-                                market_ref or "",
-                                token_id,
-                                chosen_outcome or "",
-                                bid if bid is not None else "",
-                                ask if ask is not None else "",
-                                float(pm_mid),
-                                "",
-                                "",
-                                "",
-                                "",
-                                float(edge_pct) if edge_pct is not None else "",
-                                float(spread),
-                                "",
-                                "",
-                                "watch",
-                                "skip",
-                                f"wide_spread>{cfg.lead_lag_slippage_cap}",
-                            ],
-                            keep_last=5000,
+                            ts=ts,
+                            market=market_name,
+                            market_ref=market_ref,
+                            token=token_id,
+                            outcome=chosen_outcome,
+                            bid=bid,
+                            ask=ask,
+                            pm_mid=pm_mid,
+                            edge=edge_pct,
+                            spread=spread,
+                            signal="watch",
+                            reason=f"wide_spread>{cfg.lead_lag_slippage_cap}",
                         )
                         continue
 
                     # Executable entry price guard (BUY at ask).
                     if float(ask) > cfg.lead_lag_avoid_price_above or float(ask) < cfg.lead_lag_avoid_price_below:  # type: ignore[arg-type]
-                        append_csv_row(
+                        _append_candidate_skip(
                             p_pm_paper_candidates,
-                            [
-                                "ts",
-                                "market",
-                                "market_ref",
-                                "token",
-                                "outcome",
-                                "pm_bid",
-                                "pm_ask",
-                                "pm_mid",
-                                "odds",
-                                "odds_allowed",
-                                "fair_p",
-                                "ev",
-                                "edge",
-                                "spread",
-                                "cost_est",
-                                "edge_net",
-                                "signal",
-                                "decision",
-                                "reason",
-                            ],
-                            [
-                                ts,
-                                market_name,
-                                market_ref or "",
-                                token_id,
-                                chosen_outcome or "",
-                                bid if bid is not None else "",
-                                ask if ask is not None else "",
-                                float(pm_mid),
-                                "",
-                                "",
-                                "",
-                                "",
-                                float(edge_pct) if edge_pct is not None else "",
-                                "",
-                                "",
-                                "",
-                                "watch",
-                                "skip",
-                                "avoid_price_zone_executable",
-                            ],
-                            keep_last=5000,
+                            ts=ts,
+                            market=market_name,
+                            market_ref=market_ref,
+                            token=token_id,
+                            outcome=chosen_outcome,
+                            bid=bid,
+                            ask=ask,
+                            pm_mid=pm_mid,
+                            edge=edge_pct,
+                            signal="watch",
+                            reason="avoid_price_zone_executable",
                         )
                         continue
 
                 # Precompute spread cost (percent points) so we can use it in adaptive move gating.
-                spread_cost_pct: float | None = None
                 try:
                     if bid is not None and ask is not None:
                         spread = float(ask) - float(bid)
@@ -3766,7 +4286,7 @@ def write_outputs(  # pyright: ignore
                 hold_secs = 0.0
                 pm_up_move_pct = 0.0
                 if in_pos:
-                    opened_at = str(pos.get("opened_at") or ts)
+                    opened_at = pos["opened_at"]
                     try:
                         hold_secs = (ts_dt - _parse_iso_dt(opened_at)).total_seconds()
                     except Exception:
@@ -3802,8 +4322,8 @@ def write_outputs(  # pyright: ignore
                         exit_ok = True
                         exit_reason = "max_hold"
                     elif (not exit_ok) and cfg.lead_lag_pm_stop_pct and float(cfg.lead_lag_pm_stop_pct) > 0:
-                        entry_price = float(pos.get("avg_entry") or pm_mid)
-                        pm_move_pct = (float(pm_mid) / max(entry_price, 1e-12) - 1.0) * 100.0
+                        entry_price = pos["avg_entry"] or pm_mid
+                        pm_move_pct = (pm_mid / max(entry_price, 1e-12) - 1.0) * 100.0
                         if pm_move_pct <= -abs(float(cfg.lead_lag_pm_stop_pct)):
                             exit_ok = True
                             exit_reason = "stop"
@@ -3811,7 +4331,6 @@ def write_outputs(  # pyright: ignore
                 # Update edge calculator snapshot (percent points).
 
                 fees_pct = (float(cfg.pm_est_fee_pct) + float(cfg.pm_edge_extra_cost_pct)) * 100.0
-                net_edge_pct: float | None = None
                 if edge_pct is not None and spread_cost_pct is not None:
                     net_edge_pct = float(edge_pct) - float(spread_cost_pct) - float(fees_pct)
 
@@ -3863,7 +4382,7 @@ def write_outputs(  # pyright: ignore
                         enter_block_reason = "net_edge_too_low"
 
                 # Orderbook sizing for entry
-                desired_shares = float(cfg.pm_order_size_shares)
+                desired_shares = cfg.pm_order_size_shares
                 max_usdc = None
                 if enter_ok and ob is not None and cfg.lead_lag_enable_orderbook_sizing:
                     try:
@@ -3909,10 +4428,7 @@ def write_outputs(  # pyright: ignore
                     except Exception:
                         cooldown_ok = True
 
-                    try:
-                        shares_now = float(pos.get("shares") or 0.0)
-                    except Exception:
-                        shares_now = 0.0
+                    shares_now = pos["shares"]
 
                     max_total_ok = True
                     if float(cfg.lead_lag_scale_max_total_shares) > 0:
@@ -3957,17 +4473,14 @@ def write_outputs(  # pyright: ignore
                         scale_block_reason = "net_edge_too_low"
 
                 if scale_ok:
-                    scale_desired_shares = float(cfg.pm_order_size_shares) * float(cfg.lead_lag_scale_size_mult)
+                    scale_desired_shares = cfg.pm_order_size_shares * cfg.lead_lag_scale_size_mult
                     if scale_desired_shares <= 0:
-                        scale_desired_shares = float(cfg.pm_order_size_shares)
+                        scale_desired_shares = cfg.pm_order_size_shares
 
                     # Cap by remaining position limit.
                     if float(cfg.lead_lag_scale_max_total_shares) > 0:
-                        try:
-                            shares_now = float(pos.get("shares") or 0.0)
-                        except Exception:
-                            shares_now = 0.0
-                        remaining = float(cfg.lead_lag_scale_max_total_shares) - float(shares_now)
+                        shares_now = pos["shares"]
+                        remaining = float(cfg.lead_lag_scale_max_total_shares) - shares_now
                         if remaining <= 0:
                             scale_ok = False
                             scale_block_reason = "max_position"
@@ -4076,17 +4589,17 @@ def write_outputs(  # pyright: ignore
                         pass
 
                 # Enter: BUY at best ask
-                if enter_raw and not enter_ok and enter_block_reason in {"throttled", "insufficient_liquidity", "spread_too_high", "net_edge_too_low", "lag_too_short"}:
+                if enter_raw and not enter_ok and enter_block_reason in _LL_SURFACED_BLOCK_REASONS:
                     # Surface the block in orders log (helps explain skipped opportunities)
                     append_csv_row(
                         p_pm_orders,
-                        ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                        [ts, market_name, "buy", token_id, float(ask or pm_mid), float(desired_shares), "skipped", "", f"blocked:{enter_block_reason}"],
+                        _PM_ORDERS_HEADER,
+                        [ts, market_name, "buy", token_id, ask or pm_mid, desired_shares, "skipped", "", f"blocked:{enter_block_reason}"],
                     )
 
                 if enter_ok:
-                    fill_price = float(ask or pm_mid)
-                    notional = float(fill_price) * float(desired_shares)
+                    fill_price: float = ask or pm_mid
+                    notional: float = fill_price * desired_shares
                     paper_status = "filled"
                     paper_notes = ""
                     if desired_shares <= 0:
@@ -4097,74 +4610,64 @@ def write_outputs(  # pyright: ignore
                         paper_notes = "insufficient_cash"
                     else:
                         prev = paper_positions.get(token_id)
-                        prev_shares = float(prev.get("shares") or 0.0) if prev is not None else 0.0
-                        prev_avg = float(prev.get("avg_entry") or fill_price) if prev is not None else float(fill_price)
-                        new_shares = prev_shares + float(desired_shares)
-                        new_avg = ((prev_shares * prev_avg) + (float(desired_shares) * float(fill_price))) / max(new_shares, 1e-9)
+                        prev_shares, prev_avg = (prev["shares"], prev["avg_entry"] or fill_price) if prev is not None else (0.0, fill_price)
+                        new_shares = prev_shares + desired_shares
+                        new_avg = ((prev_shares * prev_avg) + (desired_shares * fill_price)) / max(new_shares, 1e-9)
                         paper_positions[token_id] = {
                             "market": market_name,
                             "outcome": chosen_outcome,
-                            "shares": float(new_shares),
-                            "avg_entry": float(new_avg),
+                            "shares": new_shares,
+                            "avg_entry": new_avg,
                             "opened_at": ts,
                             "adds": 0,
-                            "last_mid": float(pm_mid),
+                            "last_mid": pm_mid,
                         }
                         paper_cash -= notional
-                        if cfg.strategy_mode == "pm_trend":
-                            paper_notes = f"pm_trend pm_ret={edge_pct:.4f}% max_usdc={max_usdc:.2f}" if max_usdc is not None else f"pm_trend pm_ret={edge_pct:.4f}%"
-                        elif cfg.strategy_mode == "pm_draw":
-                            paper_notes = (
-                                f"pm_draw edge_pp={edge_pct:.2f} baseline_p={fair_p:.4f} max_usdc={max_usdc:.2f}"
-                                if (max_usdc is not None and fair_p is not None)
-                                else (f"pm_draw edge_pp={edge_pct:.2f} baseline_p={fair_p:.4f}" if fair_p is not None else f"pm_draw edge_pp={edge_pct:.2f}")
-                            )
-                        else:
-                            paper_notes = f"lead_lag edge={edge_pct:.4f}% max_usdc={max_usdc:.2f}" if max_usdc is not None else f"lead_lag edge={edge_pct:.4f}%"
+                        paper_notes = ll_entry_notes(edge=edge_pct)
+                        if ll_mode_tag == "pm_draw" and fair_p is not None:
+                            paper_notes += _NOTES_BASELINE_P(fair_p)
+                        # pm_draw notes carry max_usdc only next to a baseline_p.
+                        if max_usdc is not None and (ll_mode_tag != "pm_draw" or fair_p is not None):
+                            paper_notes += _NOTES_MAX_USDC(max_usdc)
 
                     append_csv_row(
                         p_pm_orders,
-                        ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                        [ts, market_name, "buy", token_id, float(fill_price), float(desired_shares), "paper", "", paper_notes],
+                        _PM_ORDERS_HEADER,
+                        [ts, market_name, "buy", token_id, fill_price, desired_shares, "paper", "", paper_notes],
                     )
                     append_csv_row(
                         p_pm_paper_trades,
-                        ["ts", "market", "token", "outcome", "action", "price", "shares", "notional", "cash_after", "status", "notes"],
-                        [ts, market_name, token_id, chosen_outcome or "", "BUY", float(fill_price), float(desired_shares), float(notional), float(paper_cash), paper_status, paper_notes],
+                        _PM_PAPER_TRADES_HEADER,
+                        [ts, market_name, token_id, chosen_outcome or "", "BUY", fill_price, desired_shares, notional, paper_cash, paper_status, paper_notes],
                         keep_last=500,
                     )
-                    if paper_status in {"filled", "rejected"}:
+                    if paper_status in _PAPER_COUNTED_STATUSES:
                         signals_emitted += 1
                     continue
 
                 # Exit: SELL all at best bid
                 if exit_ok:
-                    shares_to_sell = float(pos.get("shares") or 0.0) if pos is not None else 0.0
-                    fill_price = float(bid or pm_mid)
-                    notional = float(fill_price) * float(shares_to_sell)
-                    avg_entry = float(pos.get("avg_entry") or fill_price) if pos is not None else float(fill_price)
+                    fill_price = bid or pm_mid
+                    pos = paper_positions.pop(token_id, None)
+                    shares_to_sell: float
+                    avg_entry: float
+                    shares_to_sell, avg_entry = (pos["shares"], pos["avg_entry"] or fill_price) if pos is not None else (0.0, fill_price)
+                    notional = fill_price * shares_to_sell
                     paper_cash += notional
-                    paper_realized += (float(fill_price) - float(avg_entry)) * float(shares_to_sell)
-                    paper_positions.pop(token_id, None)
-
-                    notes = (
-                        f"pm_trend exit={exit_reason} pm_ret={edge_pct:.4f}%"
-                        if cfg.strategy_mode == "pm_trend"
-                        else (
-                            f"pm_draw exit={exit_reason} edge_pp={edge_pct:.2f} baseline_p={fair_p:.4f}"
-                            if cfg.strategy_mode == "pm_draw" and fair_p is not None
-                            else (f"pm_draw exit={exit_reason} edge_pp={edge_pct:.2f}" if cfg.strategy_mode == "pm_draw" else f"lead_lag exit={exit_reason} edge={edge_pct:.4f}%")
-                        )
-                    )
+                    paper_realized += (fill_price - avg_entry) * shares_to_sell
+
+                    notes = ll_exit_notes(reason=exit_reason, edge=edge_pct)
+                    if ll_mode_tag == "pm_draw" and fair_p is not None:
+                        notes += _NOTES_BASELINE_P(fair_p)
                     append_csv_row(
                         p_pm_orders,
-                        ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                        [ts, market_name, "sell", token_id, float(fill_price), float(shares_to_sell), "paper", "", notes],
+                        _PM_ORDERS_HEADER,
+                        [ts, market_name, "sell", token_id, fill_price, shares_to_sell, "paper", "", notes],
                     )
                     append_csv_row(
                         p_pm_paper_trades,
-                        ["ts", "market", "token", "outcome", "action", "price", "shares", "notional", "cash_after", "status", "notes"],
-                        [ts, market_name, token_id, chosen_outcome or "", "SELL", float(fill_price), float(shares_to_sell), float(notional), float(paper_cash), "filled", notes],
+                        _PM_PAPER_TRADES_HEADER,
+                        [ts, market_name, token_id, chosen_outcome or "", "SELL", fill_price, shares_to_sell, notional, paper_cash, "filled", notes],
                         keep_last=500,
                     )
                     signals_emitted += 1
@@ -4172,8 +4675,8 @@ def write_outputs(  # pyright: ignore
 
                 # Scale-in: BUY at best ask while already in position (pyramiding on improving odds).
                 if scale_ok:
-                    fill_price = float(ask or pm_mid)
-                    notional = float(fill_price) * float(scale_desired_shares)
+                    fill_price = ask or pm_mid
+                    notional = fill_price * scale_desired_shares
                     paper_status = "filled"
                     paper_notes = ""
                     if scale_desired_shares <= 0:
@@ -4184,11 +4687,10 @@ def write_outputs(  # pyright: ignore
                         paper_notes = "insufficient_cash"
                     else:
                         prev = paper_positions.get(token_id) or {}
-                        prev_shares = float(prev.get("shares") or 0.0)
-                        prev_avg = float(prev.get("avg_entry") or fill_price)
-                        new_shares = prev_shares + float(scale_desired_shares)
-                        new_avg = ((prev_shares * prev_avg) + (float(scale_desired_shares) * float(fill_price))) / max(new_shares, 1e-9)
-                        prev_opened_at = str(prev.get("opened_at") or ts)
+                        prev_shares, prev_avg = (prev["shares"], prev["avg_entry"] or fill_price) if prev else (0.0, fill_price)
+                        new_shares = prev_shares + scale_desired_shares
+                        new_avg = ((prev_shares * prev_avg) + (scale_desired_shares * fill_price)) / max(new_shares, 1e-9)
+                        prev_opened_at = prev["opened_at"] if prev else ts
                         try:
                             adds = int(prev.get("adds") or 0) + 1
                         except Exception:
@@ -4197,100 +4699,69 @@ def write_outputs(  # pyright: ignore
                         paper_positions[token_id] = {
                             "market": market_name,
                             "outcome": chosen_outcome,
-                            "shares": float(new_shares),
-                            "avg_entry": float(new_avg),
+                            "shares": new_shares,
+                            "avg_entry": new_avg,
                             "opened_at": prev_opened_at,
-                            "adds": int(adds),
+                            "adds": adds,
                             "last_scale_at": ts,
-                            "last_mid": float(pm_mid),
+                            "last_mid": pm_mid,
                         }
                         paper_cash -= notional
-                        mode_tag = "pm_trend" if cfg.strategy_mode == "pm_trend" else ("pm_draw" if cfg.strategy_mode == "pm_draw" else "lead_lag")
-                        paper_notes = (
-                            f"{mode_tag} scale_in pm_up_move={pm_up_move_pct:.3f}% edge={edge_pct:.4f}%"
-                            + (f" max_usdc={scale_max_usdc:.2f}" if scale_max_usdc is not None else "")
-                        )
+                        paper_notes = _LL_SCALE_NOTES(mode=ll_mode_tag, up=pm_up_move_pct, edge=edge_pct)
+                        if scale_max_usdc is not None:
+                            paper_notes += _NOTES_MAX_USDC(scale_max_usdc)
 
                     append_csv_row(
                         p_pm_orders,
-                        ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                        [ts, market_name, "buy", token_id, float(fill_price), float(scale_desired_shares), "paper", "", paper_notes],
+                        _PM_ORDERS_HEADER,
+                        [ts, market_name, "buy", token_id, fill_price, scale_desired_shares, "paper", "", paper_notes],
                     )
                     append_csv_row(
                         p_pm_paper_trades,
-                        ["ts", "market", "token", "outcome", "action", "price", "shares", "notional", "cash_after", "status", "notes"],
+                        _PM_PAPER_TRADES_HEADER,
                         [
                             ts,
                             market_name,
                             token_id,
                             chosen_outcome or "",
                             "BUY",
-                            float(fill_price),
-                            float(scale_desired_shares),
-                            float(notional),
-                            float(paper_cash),
+                            fill_price,
+                            scale_desired_shares,
+                            notional,
+                            paper_cash,
                             paper_status,
                             paper_notes,
                         ],
                         keep_last=500,
                     )
-                    if paper_status in {"filled", "rejected"}:
+                    if paper_status in _PAPER_COUNTED_STATUSES:
                         signals_emitted += 1
                     continue
 
                 # Keep a lightweight per-position last_mid snapshot for scale-in logic.
                 if in_pos:
                     try:
-                        pos["last_mid"] = float(pm_mid)
+                        pos["last_mid"] = pm_mid
                     except Exception:
                         pass
 
                 # No trade this tick, but log candidate
-                append_csv_row(
+                _append_candidate_skip(
                     p_pm_paper_candidates,
-                    [
-                        "ts",
-                        "market",
-                        "market_ref",
-                        "token",
-                        "outcome",
-                        "pm_bid",
-                        "pm_ask",
-                        "pm_mid",
-                        "odds",
-                        "odds_allowed",
-                        "fair_p",
-                        "ev",
-                        "edge",
-                        "spread",
-                        "cost_est",
-                        "edge_net",
-                        "signal",
-                        "decision",
-                        "reason",
-                    ],
-                    [
-                        ts,
-                        market_name,
-                        market_ref or "",
-                        token_id,
-                        chosen_outcome or "",
-                        bid if bid is not None else "",
-                        ask if ask is not None else "",
-                        float(pm_mid),
-                        (1.0 / float(pm_mid)) if float(pm_mid) > 0 else "",
-                        "",
-                        float(fair_p) if fair_p is not None else "",
-                        "",
-                        float(edge_pct),
-                        "",
-                        "",
-                        float(net_edge_pct) if net_edge_pct is not None else "",
-                        "hold" if in_pos else "watch",
-                        "skip",
-                        reason or "no_signal",
-                    ],
-                    keep_last=5000,
+                    ts=ts,
+                    market=market_name,
+                    market_ref=market_ref,
+                    token=token_id,
+                    outcome=chosen_outcome,
+                    bid=bid,
+                    ask=ask,
+                    pm_mid=pm_mid,
+                    odds=(1.0 / pm_mid) if pm_mid > 0 else None,
+                    fair_p=fair_p,
+                    edge=edge_pct,
+                    edge_net=net_edge_pct,
+                    signal="hold" if in_pos else "watch",
+                    reason=reason or "no_signal",
                 )
 
             # After lead-lag loop
@@ -4312,7 +4783,7 @@ def write_outputs(  # pyright: ignore
                 pm_deadline_max_frac_cash = float(os.getenv("PM_DEADLINE_MAX_FRACTION_CASH", "0.05") or "0.05")
 
                 if pm_deadline_enable and runtime_cache is not None:
-                    now_ms = _now_ms()
+                    now_ms = tick_ms
                     due = (runtime_cache.pm_deadline_last_run_ms <= 0) or ((now_ms - runtime_cache.pm_deadline_last_run_ms) >= int(pm_deadline_interval_s * 1000.0))
 
                     # Build candidate maturity pairs from the latest Gamma scan index.
@@ -4474,9 +4945,11 @@ def write_outputs(  # pyright: ignore
                                     continue
 
                                 # Avoid duplicate stacking: if we already hold either leg, skip.
-                                if float((paper_positions.get(early_no) or {}).get("shares") or 0.0) > 0:
+                                pos_e = paper_positions.get(early_no)
+                                if pos_e is not None and pos_e["shares"] > 0:
                                     continue
-                                if float((paper_positions.get(late_yes) or {}).get("shares") or 0.0) > 0:
+                                pos_l = paper_positions.get(late_yes)
+                                if pos_l is not None and pos_l["shares"] > 0:
                                     continue
 
                                 # Price legs at best ask.
@@ -4537,34 +5010,33 @@ def write_outputs(  # pyright: ignore
 
                                 def _paper_buy(tok: str, *, market_name: str, outcome_name: str, price: float, shares: float, notes: str) -> bool:
                                     nonlocal paper_cash
-                                    fill_price = float(price)
-                                    notional = float(fill_price) * float(shares)
-                                    if float(shares) <= 0:
+                                    fill_price = price
+                                    notional = fill_price * shares
+                                    if shares <= 0:
                                         return False
                                     if paper_cash + 1e-9 < notional:
                                         return False
                                     prev = paper_positions.get(tok)
-                                    prev_shares = float(prev.get("shares") or 0.0) if prev is not None else 0.0
-                                    prev_avg = float(prev.get("avg_entry") or fill_price) if prev is not None else float(fill_price)
-                                    new_shares = prev_shares + float(shares)
-                                    new_avg = ((prev_shares * prev_avg) + (float(shares) * float(fill_price))) / max(new_shares, 1e-9)
+                                    prev_shares, prev_avg = (prev["shares"], prev["avg_entry"] or fill_price) if prev is not None else (0.0, fill_price)
+                                    new_shares = prev_shares + shares
+                                    new_avg = ((prev_shares * prev_avg) + (shares * fill_price)) / max(new_shares, 1e-9)
                                     paper_positions[tok] = {
                                         "market": market_name,
                                         "outcome": outcome_name,
-                                        "shares": float(new_shares),
-                                        "avg_entry": float(new_avg),
+                                        "shares": new_shares,
+                                        "avg_entry": new_avg,
                                         "opened_at": ts,
                                     }
                                     paper_cash -= notional
                                     append_csv_row(
                                         p_pm_orders,
-                                        ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                                        [ts, market_name, "buy", tok, float(fill_price), float(shares), "paper", "", notes],
+                                        _PM_ORDERS_HEADER,
+                                        [ts, market_name, "buy", tok, fill_price, shares, "paper", "", notes],
                                     )
                                     append_csv_row(
                                         p_pm_paper_trades,
-                                        ["ts", "market", "token", "outcome", "action", "price", "shares", "notional", "cash_after", "status", "notes"],
-                                        [ts, market_name, tok, outcome_name, "BUY", float(fill_price), float(shares), float(notional), float(paper_cash), "filled", notes],
+                                        _PM_PAPER_TRADES_HEADER,
+                                        [ts, market_name, tok, outcome_name, "BUY", fill_price, shares, notional, paper_cash, "filled", notes],
                                         keep_last=500,
                                     )
                                     return True
@@ -4624,35 +5096,86 @@ def write_outputs(  # pyright: ignore
             except Exception:
                 pass
 
-        mkts_fair = [] if cfg.strategy_mode == "lead_lag" else mkts
-        for mkt in mkts_fair:
-            market_name = str(mkt.get("name") or "market")
-
-            token_id: str | None = None
-            chosen_outcome: str | None = None
+        # Mode is static for the process lifetime; cfg.run_fair_loop is resolved once in load_config().
+        mkts_fair: list[dict[str, Any]] = mkts if cfg.run_fair_loop else []
+        # Loop-invariant friction (fee + extra cost) as a fraction of execution price.
+        fair_cost_frac = float(cfg.pm_est_fee_pct) + float(cfg.pm_edge_extra_cost_pct) if mkts_fair else 0.0
+        fair_edge_threshold = float(cfg.edge_threshold)
+        fair_order_shares = cfg.pm_order_size_shares
+        fair_max_orders = cfg.pm_max_orders_per_tick
+        # Market-map entries were normalized when the map was (re)loaded; scan/env entries are built per tick.
+        fair_specs = [
+            cache.market_specs_by_id.get(id(m)) or MarketSpec.from_market(m, default_testnet=cfg.kraken_futures_testnet)
+            for m in mkts_fair
+        ]
+        # Books fetched this tick, keyed by token id: starts with the CLOB snapshot's books (same dict).
+        # Auto-resolve already pulls the book for every outcome, so the chosen token (and duplicate
+        # market entries) reuse it instead of refetching.
+        fair_ob_by_token = tick_ob_by_token
+        # The pass's network inputs are fetched up front. With PM_ORDERBOOK_WORKERS > 1, missing Gamma
+        # markets for slug-configured entries are fetched concurrently into the cross-tick cache
+        # (GAMMA_WORKERS at a time). Every book the loop will read, including the outcome tokens
+        # auto-resolve compares once their Gamma market is cached, then comes from one batched
+        # POST /books (concurrent /book calls if the batch fails). Tokens still missing are fetched
+        # serially by the loop, which keeps its skip rows.
+        fair_exec = pm_orderbook_executor if cfg.pm_orderbook_workers > 1 else None
+        fair_tokens_set = {spec.token_id for spec in fair_specs if spec.token_id}
+        fair_refs = sorted({spec.market_ref for spec in fair_specs if spec.market_ref and not spec.token_id})
+        if fair_exec is not None and fair_refs:
+            _prefetch_gamma_markets(
+                cache,
+                fair_refs,
+                executor=fair_exec,
+                workers=int(cfg.gamma_workers),
+                now_ms=tick_ms,
+                ttl_s=cfg.gamma_cache_ttl_s,
+                latency_tracker=latency_tracker,
+            )
+        for spec in fair_specs:
+            if spec.token_id or not spec.market_ref:
+                continue
+            gm_pre = _cache_get_gamma_market(cache, key=spec.market_ref, now_ms=tick_ms, ttl_s=cfg.gamma_cache_ttl_s)
+            if gm_pre is None:
+                continue
+            if spec.chosen_outcome:
+                try:
+                    fair_tokens_set.add(gamma.resolve_token_id(market=gm_pre, desired_outcome=spec.chosen_outcome))
+                except Exception:
+                    pass
+            elif len(gm_pre.clob_token_ids) == 2:
+                fair_tokens_set.update(gm_pre.clob_token_ids)
+        # With the market websocket on, live local books replace the fetch; REST covers the rest.
+        if pm_market_wss is not None and fair_tokens_set:
+            pm_market_wss.watch(fair_tokens_set)
+        fair_tokens = sorted(t for t in fair_tokens_set if t not in fair_ob_by_token)
+        if pm_market_wss is not None and fair_tokens:
+            fair_ob_by_token.update(pm_market_wss.get_books(fair_tokens, max_age_s=cfg.pm_market_wss_max_age_s))
+            fair_tokens = [t for t in fair_tokens if t not in fair_ob_by_token]
+        if len(fair_tokens) > 1:
+            try:
+                fair_ob_by_token.update(pm_clob.get_orderbooks(fair_tokens))
+            except Exception:
+                if fair_exec is not None:
+                    clob_base_url = cfg.polymarket_clob_base_url
+                    fair_futs = {fair_exec.submit(lambda t: _pm_clob_threadlocal(clob_base_url).get_orderbook(t), tok): tok for tok in fair_tokens}
+                    for fut in as_completed(fair_futs):
+                        try:
+                            fair_ob_by_token[fair_futs[fut]] = fut.result()
+                        except Exception:
+                            pass
+        # One public Kraken Futures client per environment for the whole pass, and one /tickers call
+        # per environment: every market's ref price is looked up in that snapshot.
+        kf_public_clients: dict[bool, KrakenFuturesApi] = {}
+        kf_tickers_by_testnet: dict[bool, dict[str, dict[str, Any]]] = {}
+        for spec in fair_specs:
+            market_name = spec.name
+            token_id = spec.token_id
+            chosen_outcome = spec.chosen_outcome
             chosen_yes_no: str | None = None  # 'yes' | 'no' | None
-            market_ref: str | None = None
-            pm_block = mkt.get("polymarket")
-            if isinstance(pm_block, dict):
-                pm_cfg = cast(dict[str, Any], pm_block)
-                token_id = str(pm_cfg.get("clob_token_id", "") or "").strip() or None
-                chosen_outcome = str(pm_cfg.get("outcome") or "").strip() or None
-                market_ref = str(pm_cfg.get("market_url") or pm_cfg.get("market_slug") or "").strip() or None
-
-            symbol: str | None = None
-            testnet = cfg.kraken_futures_testnet
-            ref_field: str | None = None
-            k_block = mkt.get("kraken_futures")
-            if isinstance(k_block, dict):
-                k_cfg = cast(dict[str, Any], k_block)
-                symbol = str(k_cfg.get("symbol", "") or "").strip() or None
-                testnet = bool(k_cfg.get("testnet", testnet))
-                ref_field = str(k_cfg.get("ref_price_field", "") or "").strip() or None
-
-            fair_model: dict[str, Any] = {"mode": "constant", "p": 0.5}
-            fm = mkt.get("fair_model")
-            if isinstance(fm, dict):
-                fair_model = cast(dict[str, Any], fm)
+            market_ref = spec.market_ref
+            symbol = spec.symbol
+            testnet = spec.testnet
+            fair_model = spec.fair_model
 
             # Compute fair probability. Default: uses Kraken Futures ref price.
             fair_mode = str(fair_model.get("mode", "constant")).strip().lower()
@@ -4661,7 +5184,9 @@ def write_outputs(  # pyright: ignore
             rn_debug: dict[str, Any] | None = None
             if fair_mode == "deribit_rn":
                 try:
-                    rn = deribit.compute_rn_probability_from_model(model=fair_model)
+                    rn = _deribit_fair_result(
+                        cache, deribit, mode=fair_mode, model=fair_model, now_ms=tick_ms, ttl_s=cfg.deribit_cache_ttl_s
+                    )
                     rn_debug = rn
                     rn_prob_any = rn.get("rn_prob")
                     if rn_prob_any is None:
@@ -4674,7 +5199,9 @@ def write_outputs(  # pyright: ignore
                     continue
             elif fair_mode == "deribit_touch":
                 try:
-                    touch = deribit.compute_touch_probability_from_model(model=fair_model)
+                    touch = _deribit_fair_result(
+                        cache, deribit, mode=fair_mode, model=fair_model, now_ms=tick_ms, ttl_s=cfg.deribit_cache_ttl_s
+                    )
                     rn_debug = touch
                     event_prob_any = touch.get("event_prob")
                     if event_prob_any is None:
@@ -4689,19 +5216,22 @@ def write_outputs(  # pyright: ignore
                 if not symbol:
                     continue
                 kr_ref = None
-                k = KrakenFuturesApi(testnet=testnet)
-                t = k.get_ticker(symbol)
-                fields = [ref_field] if ref_field else []
-                fields += ["markPrice", "indexPrice", "last", "lastPrice"]
-                for key in fields:
-                    if not key:
+                kf_tickers = kf_tickers_by_testnet.get(testnet)
+                if kf_tickers is None:
+                    k = kf_public_clients.get(testnet)
+                    if k is None:
+                        k = kf_public_clients[testnet] = KrakenFuturesApi(testnet=testnet, session=_http_session("kraken_futures"))
+                    kf_tickers = kf_tickers_by_testnet[testnet] = k.get_tickers_by_symbol()
+                t = kf_tickers.get(symbol) or {}
+                for key in spec.ref_keys:
+                    v = t.get(key)
+                    if v is None:
+                        continue
+                    try:
+                        kr_ref = float(v)
+                        break
+                    except (TypeError, ValueError):
                         continue
-                    if key in t:
-                        try:
-                            kr_ref = float(t[key])
-                            break
-                        except Exception:
-                            pass
                 if kr_ref is None or kr_ref <= 0:
                     continue
                 fair_p = compute_fair_probability(model=fair_model, ref_price=kr_ref)
@@ -4711,7 +5241,10 @@ def write_outputs(  # pyright: ignore
             auto_skip_reason: str | None = None
             if not token_id and market_ref:
                 try:
-                    gm = gamma.get_market_by_slug(slug=market_ref)
+                    gm = _cache_get_gamma_market(cache, key=market_ref, now_ms=tick_ms, ttl_s=cfg.gamma_cache_ttl_s)
+                    if gm is None:
+                        gm = gamma.get_market_by_slug(slug=market_ref)
+                        _cache_set_gamma_market(cache, key=market_ref, market=gm, now_ms=tick_ms)
 
                     # Normalize YES/NO mapping for fair_p.
                     event_outcome_label: str | None = None
@@ -4750,38 +5283,40 @@ def write_outputs(  # pyright: ignore
                         saw_orderbook = False
                         rejected_by_odds = 0
                         rejected_by_ev = 0
+                        event_label_norm = event_outcome_label.strip().lower()
                         for out_label, out_token in zip(outcomes, token_ids, strict=False):
                             try:
-                                ob = pm_clob.get_orderbook(out_token)
+                                ob = fair_ob_by_token.get(out_token)
+                                if ob is None:
+                                    ob = fair_ob_by_token[out_token] = pm_clob.get_orderbook(out_token)
                                 bid, ask = best_bid_ask(ob)
                                 if bid is None or ask is None or bid <= 0 or ask <= 0:
                                     continue
                                 saw_orderbook = True
                                 mid = (bid + ask) / 2.0
                                 fair_outcome_p = fair_p
-                                if out_label.strip().lower() != event_outcome_label.strip().lower():
+                                if out_label.strip().lower() != event_label_norm:
                                     fair_outcome_p = 1.0 - fair_p
 
                                 # Positive EV for BUY is (fair - price).
-                                ev = float(fair_outcome_p) - float(mid)
-                                edge_outcome = float(mid) - float(fair_outcome_p)
-
-                                odds_allowed = _price_allowed_by_odds(cfg, price=float(mid))
-                                odds_any = _price_to_decimal_odds(float(mid))
-                                observed.append(
-                                    {
-                                        "outcome": out_label,
-                                        "token_id": out_token,
-                                        "pm_bid": float(bid),
-                                        "pm_ask": float(ask),
-                                        "pm_price": float(mid),
-                                        "odds": float(odds_any) if odds_any is not None else None,
-                                        "odds_allowed": bool(odds_allowed),
-                                        "fair_p": float(fair_outcome_p),
-                                        "edge": float(edge_outcome),
-                                        "ev": float(ev),
-                                    }
-                                )
+                                ev = fair_outcome_p - mid
+
+                                odds_allowed = _price_allowed_by_odds(cfg, price=mid)
+                                # One record per outcome; eligible ones are shared into `candidates`
+                                # (same keys) rather than copied into a second dict.
+                                obs = {
+                                    "outcome": out_label,
+                                    "token_id": out_token,
+                                    "pm_bid": bid,
+                                    "pm_ask": ask,
+                                    "pm_price": mid,
+                                    "odds": _price_to_decimal_odds(mid),
+                                    "odds_allowed": odds_allowed,
+                                    "fair_p": fair_outcome_p,
+                                    "edge": mid - fair_outcome_p,
+                                    "ev": ev,
+                                }
+                                observed.append(obs)
 
                                 if not odds_allowed:
                                     rejected_by_odds += 1
@@ -4790,16 +5325,7 @@ def write_outputs(  # pyright: ignore
                                 if ev <= 0:
                                     rejected_by_ev += 1
                                     continue
-                                candidates.append(
-                                    {
-                                        "outcome": out_label,
-                                        "token_id": out_token,
-                                        "pm_price": float(mid),
-                                        "fair_p": float(fair_outcome_p),
-                                        "edge": float(edge_outcome),
-                                        "ev": float(ev),
-                                    }
-                                )
+                                candidates.append(obs)
                             except Exception:
                                 continue
 
@@ -4820,30 +5346,9 @@ def write_outputs(  # pyright: ignore
                                 # This does NOT place trades (the later decision gate will still skip).
                                 rep: dict[str, Any] | None = None
                                 if observed:
-                                    min_odds = cfg.pm_min_odds
-                                    max_odds = cfg.pm_max_odds
-
-                                    def _odds_distance(o: dict[str, Any]) -> float:
-                                        if min_odds is None or max_odds is None:
-                                            return 0.0
-                                        ov = o.get("odds")
-                                        if not isinstance(ov, (int, float)):
-                                            return 0.0
-                                        odds_v = float(ov)
-                                        if min_odds <= odds_v <= max_odds:
-                                            return 0.0
-                                        if odds_v < min_odds:
-                                            return min_odds - odds_v
-                                        return odds_v - max_odds
-
                                     # Prefer the one closest to odds band; break ties by higher EV.
-                                    rep = sorted(
-                                        observed,
-                                        key=lambda o: (
-                                            _odds_distance(o),
-                                            -float(o.get("ev") or 0.0),
-                                        ),
-                                    )[0]
+                                    # Single pass (min) instead of sorting the whole list for index 0.
+                                    rep = min(observed, key=lambda o: (_odds_band_distance(cfg, o["odds"]), -o["ev"]))
 
                                 if rep is None:
                                     token_id = None
@@ -4853,7 +5358,7 @@ def write_outputs(  # pyright: ignore
                                     chosen_yes_no = _yn(chosen_outcome)
                                     fair_p = float(rep["fair_p"])
                         else:
-                            best = sorted(candidates, key=lambda r: float(r.get("ev") or 0.0), reverse=True)[0]
+                            best = max(candidates, key=itemgetter("ev"))
                             token_id = str(best["token_id"])
                             chosen_outcome = str(best["outcome"])
                             chosen_yes_no = _yn(chosen_outcome)
@@ -4873,51 +5378,15 @@ def write_outputs(  # pyright: ignore
                     chosen_yes_no = "no"
 
             if not token_id:
-                append_csv_row(
+                _append_candidate_skip(
                     p_pm_paper_candidates,
-                    [
-                        "ts",
-                        "market",
-                        "market_ref",
-                        "token",
-                        "outcome",
-                        "pm_bid",
-                        "pm_ask",
-                        "pm_mid",
-                        "odds",
-                        "odds_allowed",
-                        "fair_p",
-                        "ev",
-                        "edge",
-                        "spread",
-                        "cost_est",
-                        "edge_net",
-                        "signal",
-                        "decision",
-                        "reason",
-                    ],
-                    [
-                        ts,
-                        market_name,
-                        market_ref or "",
-                        "",
-                        chosen_outcome or "",
-                        "",
-                        "",
-                        "",
-                        "",
-                        "",
-                        fair_p,
-                        "",
-                        "",
-                        "",
-                        "",
-                        "",
-                        "",
-                        "skip",
-                        auto_skip_reason or "no_token",
-                    ],
-                    keep_last=5000,
+                    ts=ts,
+                    market=market_name,
+                    market_ref=market_ref,
+                    token=None,
+                    outcome=chosen_outcome,
+                    fair_p=fair_p,
+                    reason=auto_skip_reason or "no_token",
                 )
                 continue
 
@@ -4925,7 +5394,9 @@ def write_outputs(  # pyright: ignore
             bid: float | None = None
             ask: float | None = None
             try:
-                ob = pm_clob.get_orderbook(token_id)
+                ob = fair_ob_by_token.get(token_id)
+                if ob is None:
+                    ob = fair_ob_by_token[token_id] = pm_clob.get_orderbook(token_id)
                 bid, ask = best_bid_ask(ob)
                 if bid is not None and ask is not None and bid > 0 and ask > 0:
                     pm_price = (bid + ask) / 2.0
@@ -4933,88 +5404,42 @@ def write_outputs(  # pyright: ignore
                 pm_price = None
 
             if pm_price is None:
-                append_csv_row(
+                _append_candidate_skip(
                     p_pm_paper_candidates,
-                    [
-                        "ts",
-                        "market",
-                        "market_ref",
-                        "token",
-                        "outcome",
-                        "pm_bid",
-                        "pm_ask",
-                        "pm_mid",
-                        "odds",
-                        "odds_allowed",
-                        "fair_p",
-                        "ev",
-                        "edge",
-                        "spread",
-                        "cost_est",
-                        "edge_net",
-                        "signal",
-                        "decision",
-                        "reason",
-                    ],
-                    [
-                        ts,
-                        market_name,
-                        market_ref or "",
-                        token_id,
-                        chosen_outcome or "",
-                        bid if bid is not None else "",
-                        ask if ask is not None else "",
-                        "",
-                        "",
-                        "",
-                        fair_p,
-                        "",
-                        "",
-                        "",
-                        "",
-                        "",
-                        "",
-                        "skip",
-                        "no_price",
-                    ],
-                    keep_last=5000,
+                    ts=ts,
+                    market=market_name,
+                    market_ref=market_ref,
+                    token=token_id,
+                    outcome=chosen_outcome,
+                    bid=bid,
+                    ask=ask,
+                    fair_p=fair_p,
+                    reason="no_price",
                 )
                 continue
 
-            odds_allowed = _price_allowed_by_odds(cfg, price=float(pm_price))
-            odds_any = _price_to_decimal_odds(float(pm_price))
+            odds_allowed = _price_allowed_by_odds(cfg, price=pm_price)
+            odds_any = _price_to_decimal_odds(pm_price)
             odds_str = f"{odds_any:.4f}" if odds_any is not None else ""
 
-            hedge: dict[str, Any] = {}
-            h = mkt.get("hedge")
-            if isinstance(h, dict):
-                hedge = cast(dict[str, Any], h)
-
-            edge = pm_price - fair_p
-            ev = float(fair_p) - float(pm_price)
-
-            spread: float | None = None
-            half_spread: float | None = None
-            cost_est: float = 0.0
-            edge_net: float | None = None
-            if bid is not None and ask is not None and float(ask) > 0 and float(bid) > 0 and float(ask) >= float(bid):
-                spread = float(ask) - float(bid)
-                half_spread = spread / 2.0
-
-            # Approximate "edge after costs" for BUY decisions:
-            # Start from ev=(fair-mid) and subtract:
-            # - half-spread (entry vs mid)
-            # - estimated fee and extra cost as % of execution price (use ask when available)
-            exec_px = float(ask) if ask is not None and float(ask) > 0 else float(pm_price)
-            cost_est = float(half_spread or 0.0) + float(cfg.pm_est_fee_pct) * exec_px + float(cfg.pm_edge_extra_cost_pct) * exec_px
-            edge_net = float(ev) - float(cost_est)
+            hedge = spec.hedge
+
+            edge, ev, spread, cost_est, edge_net = _fair_edge_after_costs(
+                fair_p=fair_p,
+                mid=pm_price,
+                bid=bid,
+                ask=ask,
+                cost_frac=fair_cost_frac,
+            )
 
+            # Classify once; the candidate row and the signal/trade branch below share these.
             sig_preview = "buy" if pm_price < fair_p else "sell"
+            edge_ok = abs(edge) >= fair_edge_threshold
             decision = "skip"
             reason = ""
             if not odds_allowed:
                 reason = "odds_filter"
-            elif abs(edge) < cfg.edge_threshold:
+            elif not edge_ok:
                 reason = "below_threshold"
             elif ev <= 0:
                 reason = "negative_ev"
@@ -5024,27 +5449,7 @@ def write_outputs(  # pyright: ignore
 
             append_csv_row(
                 p_pm_paper_candidates,
-                [
-                    "ts",
-                    "market",
-                    "market_ref",
-                    "token",
-                    "outcome",
-                    "pm_bid",
-                    "pm_ask",
-                    "pm_mid",
-                    "odds",
-                    "odds_allowed",
-                    "fair_p",
-                    "ev",
-                    "edge",
-                    "spread",
-                    "cost_est",
-                    "edge_net",
-                    "signal",
-                    "decision",
-                    "reason",
-                ],
+                _PM_CANDIDATES_HEADER,
                 [
                     ts,
                     market_name,
@@ -5053,14 +5458,14 @@ def write_outputs(  # pyright: ignore
                     chosen_outcome or "",
                     bid if bid is not None else "",
                     ask if ask is not None else "",
-                    float(pm_price),
+                    pm_price,
                     odds_str,
-                    bool(odds_allowed),
-                    float(fair_p),
-                    float(ev),
-                    float(edge),
+                    odds_allowed,
+                    fair_p,
+                    ev,
+                    edge,
                     spread if spread is not None else "",
-                    float(cost_est),
+                    cost_est,
                     edge_net if edge_net is not None else "",
                     sig_preview,
                     decision,
@@ -5091,9 +5496,9 @@ def write_outputs(  # pyright: ignore
             if not odds_allowed:
                 continue
 
-            if abs(edge) >= cfg.edge_threshold:
+            if edge_ok:
                 # If pm_price < fair_p -> buy (undervalued). If pm_price > fair_p -> sell (overvalued).
-                sig = "buy" if pm_price < fair_p else "sell"
+                sig = sig_preview
 
                 yes_side = str(hedge.get("yes_side") or "").strip() or "sell"
                 no_side = str(hedge.get("no_side") or "").strip() or "buy"
@@ -5119,24 +5524,25 @@ def write_outputs(  # pyright: ignore
                 if symbol:
                     append_csv_row(
                         p_kr_sig,
-                        ["ts", "symbol", "signal", "confidence", "edge", "ref_price", "notes"],
+                        _KR_SIGNALS_HEADER,
                         [ts, symbol, hedge_side, 0.5, edge, kr_ref, f"market={market_name}"],
                     )
 
                 # Polymarket action: paper logs only, unless explicit live trading is enabled.
-                if pm_live_client is None or killswitch_active(cfg):
+                if pm_live_client is None or ks_active:
+                    size_shares: float = fair_order_shares
                     # Keep paper behavior aligned with live: cap how many trades we simulate per tick.
-                    if signals_emitted >= cfg.pm_max_orders_per_tick:
+                    if signals_emitted >= fair_max_orders:
                         append_csv_row(
                             p_pm_orders,
-                            ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
+                            _PM_ORDERS_HEADER,
                             [
                                 ts,
                                 market_name,
                                 sig,
                                 token_id,
                                 pm_price,
-                                cfg.pm_order_size_shares,
+                                size_shares,
                                 "skipped",
                                 "",
                                 "max orders per tick reached (paper)",
@@ -5144,17 +5550,17 @@ def write_outputs(  # pyright: ignore
                         )
                         append_csv_row(
                             p_pm_paper_trades,
-                            ["ts", "market", "token", "outcome", "action", "price", "shares", "notional", "cash_after", "status", "notes"],
+                            _PM_PAPER_TRADES_HEADER,
                             [
                                 ts,
                                 market_name,
                                 token_id,
                                 chosen_outcome or "",
                                 "BUY" if sig == "buy" else "SELL",
-                                float(pm_price),
-                                float(cfg.pm_order_size_shares),
-                                float(float(pm_price) * float(cfg.pm_order_size_shares)),
-                                float(paper_cash),
+                                pm_price,
+                                size_shares,
+                                pm_price * size_shares,
+                                paper_cash,
                                 "skipped",
                                 "max orders per tick reached (paper)",
                             ],
@@ -5162,9 +5568,11 @@ def write_outputs(  # pyright: ignore
                         )
                         continue
 
-                    # Use best ask/bid for a more realistic fill assumption.
+                    # Use best ask/bid for a more realistic fill assumption (book fetched earlier this tick).
                     try:
-                        ob2 = pm_clob.get_orderbook(token_id)
+                        ob2 = fair_ob_by_token.get(token_id)
+                        if ob2 is None:
+                            ob2 = fair_ob_by_token[token_id] = pm_clob.get_orderbook(token_id)
                         bb, ba = best_bid_ask(ob2)
                     except Exception:
                         bb, ba = (None, None)
@@ -5172,91 +5580,96 @@ def write_outputs(  # pyright: ignore
                     paper_status = "skipped"
                     paper_notes = ""
                     action = "BUY" if sig == "buy" else "SELL"
-                    fill_price = float(pm_price)
+                    fill_price: float = pm_price
                     if action == "BUY" and ba is not None:
-                        fill_price = float(ba)
+                        fill_price = ba
                     if action == "SELL" and bb is not None:
-                        fill_price = float(bb)
+                        fill_price = bb
+                    # Order notional at the fill: the BUY cost and the trades-row notional.
+                    order_notional = fill_price * size_shares
 
                     # Paper execution model:
                     # - BUY: open/increase a long position in this outcome token.
                     # - SELL: close the existing position in this token (if any).
                     if action == "BUY":
-                        shares = float(cfg.pm_order_size_shares)
-                        notional = float(fill_price) * shares
-                        if paper_cash + 1e-9 < notional:
+                        shares = size_shares
+                        notional = order_notional
+                        if shares <= 0:
+                            paper_status = "skipped"
+                            paper_notes = "zero_size"
+                        elif paper_cash + 1e-9 < notional:
                             paper_status = "rejected"
                             paper_notes = "insufficient_cash"
                         else:
                             pos = paper_positions.get(token_id)
-                            prev_shares = float(pos.get("shares") or 0.0) if pos is not None else 0.0
-                            prev_avg = float(pos.get("avg_entry") or fill_price) if pos is not None else float(fill_price)
-                            opened_at = str(pos.get("opened_at") or ts) if pos is not None else ts
+                            prev_shares, prev_avg = (pos["shares"], pos["avg_entry"] or fill_price) if pos is not None else (0.0, fill_price)
+                            opened_at = pos["opened_at"] if pos is not None else ts
 
                             new_shares = prev_shares + shares
-                            new_avg = ((prev_shares * prev_avg) + (shares * float(fill_price))) / max(new_shares, 1e-9)
+                            new_avg = ((prev_shares * prev_avg) + (shares * fill_price)) / max(new_shares, 1e-9)
                             paper_positions[token_id] = {
                                 "market": market_name,
                                 "outcome": chosen_outcome,
-                                "shares": float(new_shares),
-                                "avg_entry": float(new_avg),
+                                "shares": new_shares,
+                                "avg_entry": new_avg,
                                 "opened_at": opened_at,
                             }
                             paper_cash -= notional
                             paper_status = "filled"
                     else:
                         pos = paper_positions.get(token_id)
-                        if pos is None or float(pos.get("shares") or 0.0) <= 0:
+                        if pos is None or pos["shares"] <= 0:
                             paper_status = "skipped"
                             paper_notes = "no_position"
                         else:
-                            shares = float(pos.get("shares") or 0.0)
-                            avg_entry = float(pos.get("avg_entry") or fill_price)
-                            notional = float(fill_price) * shares
+                            shares = pos["shares"]
+                            avg_entry = pos["avg_entry"] or fill_price
+                            notional = fill_price * shares
                             paper_cash += notional
-                            paper_realized += (float(fill_price) - avg_entry) * shares
+                            paper_realized += (fill_price - avg_entry) * shares
                             paper_positions.pop(token_id, None)
                             paper_status = "filled"
 
                     append_csv_row(
                         p_pm_orders,
-                        ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                        [ts, market_name, sig, token_id, fill_price, cfg.pm_order_size_shares, "paper", "", paper_notes or "paper"],
+                        _PM_ORDERS_HEADER,
+                        [ts, market_name, sig, token_id, fill_price, size_shares, "paper", "", paper_notes or "paper"],
                     )
 
                     append_csv_row(
                         p_pm_paper_trades,
-                        ["ts", "market", "token", "outcome", "action", "price", "shares", "notional", "cash_after", "status", "notes"],
+                        _PM_PAPER_TRADES_HEADER,
                         [
                             ts,
                             market_name,
                             token_id,
                             chosen_outcome or "",
                             action,
-                            float(fill_price),
-                            float(cfg.pm_order_size_shares),
-                            float(float(fill_price) * float(cfg.pm_order_size_shares)),
-                            float(paper_cash),
+                            fill_price,
+                            size_shares,
+                            order_notional,
+                            paper_cash,
                             paper_status,
                             paper_notes,
                         ],
                         keep_last=500,
                     )
 
-                    if paper_status in {"filled", "rejected"}:
+                    if paper_status in _PAPER_COUNTED_STATUSES:
                         signals_emitted += 1
                     continue
 
                 # Hard cap on how many Polymarket orders we try per tick.
-                if signals_emitted >= cfg.pm_max_orders_per_tick:
+                if signals_emitted >= fair_max_orders:
                     append_csv_row(
                         p_pm_orders,
-                        ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                        [ts, market_name, sig, token_id, pm_price, cfg.pm_order_size_shares, "skipped", "", "max orders per tick reached"],
+                        _PM_ORDERS_HEADER,
+                        [ts, market_name, sig, token_id, pm_price, fair_order_shares, "skipped", "", "max orders per tick reached"],
                     )
                     continue
 
                 # Price selection: use best ask for BUY, best bid for SELL to avoid accidental worse pricing.
+                # A real limit order is priced off a fresh /book, never the tick's snapshot or ws cache.
                 try:
                     ob2 = pm_clob.get_orderbook(token_id)
                     bb, ba = best_bid_ask(ob2)
@@ -5282,55 +5695,32 @@ def write_outputs(  # pyright: ignore
                         token_id=token_id,
                         side=desired_side,
                         price=float(desired_price),
-                        size=float(cfg.pm_order_size_shares),
+                        size=fair_order_shares,
                         order_type="GTC",
                     )
                     order_id = str(resp.get("orderID") or resp.get("orderId") or "")
                     status = str(resp.get("status") or "submitted")
                     append_csv_row(
                         p_pm_orders,
-                        ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                        [ts, market_name, sig, token_id, desired_price, cfg.pm_order_size_shares, status, order_id, "live"],
+                        _PM_ORDERS_HEADER,
+                        [ts, market_name, sig, token_id, desired_price, fair_order_shares, status, order_id, "live"],
                     )
                     signals_emitted += 1
                 except Exception as e:
                     append_csv_row(
                         p_pm_orders,
-                        ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                        [ts, market_name, sig, token_id, desired_price, cfg.pm_order_size_shares, "error", "", str(e)[:500]],
+                        _PM_ORDERS_HEADER,
+                        [ts, market_name, sig, token_id, desired_price, fair_order_shares, "error", "", str(e)[:500]],
                     )
 
         if computed_rows:
             edge_rows = computed_rows
             live_status["mapped_markets"] = len(computed_rows)
-            write_json(p_live, live_status)
-
-        # Ensure the portal edge CSV always reflects the latest computed rows (not just the stub written earlier).
-        if edge_rows:
-            write_csv(
-                p_edge,
-                ["ts", "market", "fair_p", "pm_price", "edge", "spread", "cost_est", "edge_net", "sources", "notes"],
-                [
-                    [
-                        r.get("ts"),
-                        r.get("market"),
-                        r.get("fair_p"),
-                        r.get("pm_price"),
-                        r.get("edge"),
-                        r.get("spread"),
-                        r.get("cost_est"),
-                        r.get("edge_net"),
-                        r.get("sources"),
-                        r.get("notes"),
-                    ]
-                    for r in edge_rows
-                ],
-            )
 
         # Always append a scan row so the portal shows the agent is alive.
         append_csv_row(
             p_pm_scan,
-            ["ts", "markets_seen", "edges_computed", "signals_emitted", "status", "notes"],
+            _PM_SCAN_HEADER,
             [ts, len(mkts), len(computed_rows), signals_emitted, "ok", scan_note],
         )
 
@@ -5347,9 +5737,7 @@ def write_outputs(  # pyright: ignore
 
         # Paper portfolio mark-to-market (always updated, even if no new trades)
         mtm_rows: list[list[Any]] = []
-        unrealized = 0.0
-        equity = float(paper_cash)
-        now_dt = _parse_iso_dt(ts)
+        now_dt = ts_dt
 
         # Auto-close paper positions whose market end_date has passed.
         # This keeps the portal from showing stale positions forever.
@@ -5362,17 +5750,48 @@ def write_outputs(  # pyright: ignore
         paper_auto_exit_meta_lookup_max = max(0, min(int(paper_auto_exit_meta_lookup_max), 50))
         meta_lookups_used = 0
 
-        for tok, pos_any in list(paper_positions.items()):
-            shares = float(pos_any.get("shares") or 0.0)
-            if shares <= 0:
-                continue
-            avg_entry = float(pos_any.get("avg_entry") or 0.0)
-            mname = str(pos_any.get("market") or "")
-            outcome = str(pos_any.get("outcome") or "")
+        # Mark prices: books already fetched by the fair pass this tick are reused; the rest come
+        # from one batched round-trip up front. Anything the batch misses (or a failed batch)
+        # falls back to a per-token /book below.
+        mtm_books: dict[str, dict[str, Any]] = {tok: fair_ob_by_token[tok] for tok in paper_positions if tok in fair_ob_by_token}
+        mtm_tokens = [tok for tok in paper_positions if tok not in mtm_books]
+        if pm_market_wss is not None and mtm_tokens:
+            pm_market_wss.watch(mtm_tokens)
+            mtm_books.update(pm_market_wss.get_books(mtm_tokens, max_age_s=cfg.pm_market_wss_max_age_s))
+            mtm_tokens = [tok for tok in mtm_tokens if tok not in mtm_books]
+        if mtm_tokens:
+            try:
+                mtm_books.update(pm_clob.get_orderbooks(mtm_tokens))
+            except Exception:
+                pass
+            # Whatever the batch missed is fetched concurrently (PM_ORDERBOOK_WORKERS > 1) rather than
+            # one /book per position in the loop below.
+            mtm_missing = [tok for tok in mtm_tokens if tok not in mtm_books]
+            if len(mtm_missing) > 1 and pm_orderbook_executor is not None and cfg.pm_orderbook_workers > 1:
+                clob_base_url = cfg.polymarket_clob_base_url
+                mtm_futs = {
+                    pm_orderbook_executor.submit(lambda t: _pm_clob_threadlocal(clob_base_url).get_orderbook(t), tok): tok
+                    for tok in mtm_missing
+                }
+                for fut in as_completed(mtm_futs):
+                    try:
+                        mtm_books[mtm_futs[fut]] = fut.result()
+                    except Exception:
+                        pass
+
+        # Auto-exited tokens are popped after the loop, so it can iterate the dict without a copy.
+        mtm_closed: list[str] = []
+        for tok, pos_any in paper_positions.items():
+            shares = pos_any["shares"]
+            avg_entry = pos_any["avg_entry"]
+            mname = pos_any["market"]
+            outcome = pos_any["outcome"]
 
             last_price: float | None = None
             try:
-                ob = pm_clob.get_orderbook(tok)
+                ob = mtm_books.get(tok)
+                if ob is None:
+                    ob = pm_clob.get_orderbook(tok)
                 bid, ask = best_bid_ask(ob)
                 # Mark long positions at the best bid (liquidation price), not mid.
                 if bid is not None and bid > 0:
@@ -5418,7 +5837,7 @@ def write_outputs(  # pyright: ignore
                             meta["end_date"] = str(found.end_date or meta.get("end_date") or "")
                             meta["closed"] = bool(found.closed) if found.closed is not None else meta.get("closed")
                             runtime_cache.pm_scan_token_meta[tok] = meta
-                            runtime_cache.pm_scan_token_meta_at_ms = int(_now_ms())
+                            runtime_cache.pm_scan_token_meta_at_ms = tick_ms
                         meta_lookups_used += 1
                     except Exception:
                         meta_lookups_used += 1
@@ -5455,7 +5874,7 @@ def write_outputs(  # pyright: ignore
                                 "outcome_prices": [str(x) for x in outcome_prices],
                             }
                             runtime_cache.pm_scan_token_meta[tok] = meta
-                            runtime_cache.pm_scan_token_meta_at_ms = int(_now_ms())
+                            runtime_cache.pm_scan_token_meta_at_ms = tick_ms
                         meta_lookups_used += 1
                     except Exception:
                         meta_lookups_used += 1
@@ -5476,26 +5895,26 @@ def write_outputs(  # pyright: ignore
                                     idx = next(i for i, o in enumerate(outs) if str(o).strip().lower() == outcome.strip().lower())
                                     exit_px = float(prs[idx])
                                 except Exception:
-                                    exit_px = float(last_price) if last_price is not None else float(avg_entry)
+                                    exit_px = last_price if last_price is not None else avg_entry
                             else:
-                                exit_px = float(last_price) if last_price is not None else float(avg_entry)
+                                exit_px = last_price if last_price is not None else avg_entry
                         else:
-                            exit_px = float(last_price) if last_price is not None else float(avg_entry)
-                        notional = float(exit_px) * float(shares)
+                            exit_px = last_price if last_price is not None else avg_entry
+                        notional = exit_px * shares
                         paper_cash += notional
-                        paper_realized += (float(exit_px) - float(avg_entry)) * float(shares)
-                        paper_positions.pop(tok, None)
+                        paper_realized += (exit_px - avg_entry) * shares
+                        mtm_closed.append(tok)
 
                         notes = f"auto_exit_after_end_date end_date={end_dt.isoformat()} grace_h={paper_auto_exit_grace_hours:g} closed={meta_closed}"
                         append_csv_row(
                             p_pm_orders,
-                            ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                            [ts, mname, "sell", tok, float(exit_px), float(shares), "paper", "", notes],
+                            _PM_ORDERS_HEADER,
+                            [ts, mname, "sell", tok, exit_px, shares, "paper", "", notes],
                         )
                         append_csv_row(
                             p_pm_paper_trades,
-                            ["ts", "market", "token", "outcome", "action", "price", "shares", "notional", "cash_after", "status", "notes"],
-                            [ts, mname, tok, outcome, "AUTO_SELL", float(exit_px), float(shares), float(notional), float(paper_cash), "filled", notes],
+                            _PM_PAPER_TRADES_HEADER,
+                            [ts, mname, tok, outcome, "AUTO_SELL", exit_px, shares, notional, paper_cash, "filled", notes],
                             keep_last=500,
                         )
                         continue
@@ -5510,34 +5929,32 @@ def write_outputs(  # pyright: ignore
                             idx = next(i for i, o in enumerate(outs) if str(o).strip().lower() == outcome.strip().lower())
                             exit_px = float(prs[idx])
                         except Exception:
-                            exit_px = float(last_price) if last_price is not None else float(avg_entry)
+                            exit_px = last_price if last_price is not None else avg_entry
                     else:
-                        exit_px = float(last_price) if last_price is not None else float(avg_entry)
+                        exit_px = last_price if last_price is not None else avg_entry
 
-                    notional = float(exit_px) * float(shares)
+                    notional = exit_px * shares
                     paper_cash += notional
-                    paper_realized += (float(exit_px) - float(avg_entry)) * float(shares)
-                    paper_positions.pop(tok, None)
+                    paper_realized += (exit_px - avg_entry) * shares
+                    mtm_closed.append(tok)
 
                     notes = "auto_exit_closed"
                     append_csv_row(
                         p_pm_orders,
-                        ["ts", "market", "side", "token", "price", "size", "status", "tx_id", "notes"],
-                        [ts, mname, "sell", tok, float(exit_px), float(shares), "paper", "", notes],
+                        _PM_ORDERS_HEADER,
+                        [ts, mname, "sell", tok, exit_px, shares, "paper", "", notes],
                     )
                     append_csv_row(
                         p_pm_paper_trades,
-                        ["ts", "market", "token", "outcome", "action", "price", "shares", "notional", "cash_after", "status", "notes"],
-                        [ts, mname, tok, outcome, "AUTO_SELL", float(exit_px), float(shares), float(notional), float(paper_cash), "filled", notes],
+                        _PM_PAPER_TRADES_HEADER,
+                        [ts, mname, tok, outcome, "AUTO_SELL", exit_px, shares, notional, paper_cash, "filled", notes],
                         keep_last=500,
                     )
                     continue
 
-            lp = float(last_price) if last_price is not None else avg_entry
+            lp = last_price if last_price is not None else avg_entry
             value = shares * lp
             upnl = shares * (lp - avg_entry)
-            unrealized += upnl
-            equity += value
             try:
                 adds = int(pos_any.get("adds") or 0)
             except Exception:
@@ -5548,28 +5965,22 @@ def write_outputs(  # pyright: ignore
                 last_mid = lp
             last_scale_at = str(pos_any.get("last_scale_at") or "")
             mtm_rows.append([ts, mname, tok, outcome, shares, avg_entry, lp, value, upnl, adds, last_mid, last_scale_at])
+        for tok in mtm_closed:
+            paper_positions.pop(tok, None)
+
+        # Portfolio aggregates in one pass over the marked rows (value=col 7, unrealized_pnl=col 8).
+        # Cash is read after the loop so proceeds from positions auto-exited this tick are included.
+        unrealized = sum(r[8] for r in mtm_rows)
+        equity = paper_cash + sum(r[7] for r in mtm_rows)
 
         write_csv(
             p_pm_paper_positions,
-            [
-                "ts",
-                "market",
-                "token",
-                "outcome",
-                "shares",
-                "avg_entry",
-                "last_price",
-                "value",
-                "unrealized_pnl",
-                "adds",
-                "last_mid",
-                "last_scale_at",
-            ],
+            _PM_PAPER_POSITIONS_HEADER,
             mtm_rows,
         )
 
         paper_state_prev = paper_state
-        open_positions = sum(1 for _tok, p in paper_positions.items() if float(p.get("shares") or 0.0) > 0)
+        open_positions = len(paper_positions)
         paper_state_out: dict[str, Any] = {
             "generated_at": ts,
             "started_at": str(paper_state_prev.get("started_at") or ts),
@@ -5581,7 +5992,13 @@ def write_outputs(  # pyright: ignore
             "open_positions": int(open_positions),
             "positions": paper_positions,
         }
-        write_json(p_pm_paper_portfolio, paper_state_out)
+        skipped = _PAPER_STATE_SKIPPED.get(p_pm_paper_portfolio, 0)
+        if skipped + 1 < cfg.paper_portfolio_rewrite_every_n and _paper_state_unchanged(p_pm_paper_portfolio, paper_state_out):
+            _PAPER_STATE_SKIPPED[p_pm_paper_portfolio] = skipped + 1
+        else:
+            write_json(p_pm_paper_portfolio, paper_state_out)
+            _remember_paper_state(p_pm_paper_portfolio, paper_state_out)
+            _PAPER_STATE_SKIPPED[p_pm_paper_portfolio] = 0
 
     except Exception as e:
         # Still record timing + best-available lag to keep portal diagnostics informative.
@@ -5592,16 +6009,41 @@ def write_outputs(  # pyright: ignore
             health_tracker=health_tracker,
         )
         live_status["edge_error"] = str(e)
-        write_json(p_live, live_status)
 
         pm_status["ok"] = False
         pm_status["error"] = str(e)
         append_csv_row(
             p_pm_scan,
-            ["ts", "markets_seen", "edges_computed", "signals_emitted", "status", "notes"],
+            _PM_SCAN_HEADER,
             [ts, 0, 0, 0, "error", str(e)],
         )
 
+    # Edge signals: one write per tick, after the edge pass (computed rows, else the stub).
+    # Rows identical to the last write apart from ts leave the file (and its mtime) alone,
+    # so quiet ticks cost neither a rewrite nor an upload; every EDGE_SIGNALS_REWRITE_EVERY_N
+    # ticks it is rewritten anyway so the portal does not flag it as stale.
+    write_csv_if_changed(
+        p_edge,
+        _EDGE_SIGNALS_HEADER,
+        [
+            [
+                r.get("ts"),
+                r.get("market"),
+                r.get("fair_p"),
+                r.get("pm_price"),
+                r.get("edge"),
+                r.get("spread"),
+                r.get("cost_est"),
+                r.get("edge_net"),
+                r.get("sources"),
+                r.get("notes"),
+            ]
+            for r in edge_rows
+        ],
+        ignore_cols=1,
+        rewrite_every_n=cfg.edge_signals_rewrite_every_n,
+    )
+
     # Write polymarket status after attempting edge computation
     write_json(p_pm_status, pm_status)
     files.append(p_pm_status)
@@ -5630,7 +6072,6 @@ def write_outputs(  # pyright: ignore
         health_tracker=health_tracker,
     )
 
-    # Rewrite live_status so these fields are included.
     try:
         write_json(p_live, live_status)
     except Exception:
@@ -5660,14 +6101,21 @@ def write_outputs(  # pyright: ignore
     except Exception:
         pass
 
+    # Persist newly resolved token ids (local only; not part of the upload set).
+    if runtime_cache is not None and runtime_cache.token_id_dirty:
+        try:
+            _save_token_cache(out, runtime_cache)
+        except Exception as e:
+            print(f"[agent] token cache save failed: {e}", flush=True)
+
     return files
 
 
 def _median_from_floats(values: list[float]) -> float | None:
     if not values:
         return None
-    vs = sorted(values)
-    return float(vs[len(vs) // 2])
+    # Upper median (vs[n // 2] of the sorted samples), which the lag gauges have always reported.
+    return float(median_high(values))
 
 
 def _best_available_market_lag_ms(
@@ -5722,6 +6170,16 @@ def _finalize_live_status(
             pass
 
 
+def _gzip_copy(path: Path) -> Path:
+    """Write `<name>.gz` next to `path` (atomically) and return it."""
+    gz = path.with_name(path.name + ".gz")
+    tmp = gz.with_name(gz.name + ".tmp")
+    # Level 1 and a fixed header mtime: most of the size win, little CPU, identical bytes per input.
+    tmp.write_bytes(gzip.compress(path.read_bytes(), compresslevel=1, mtime=0))
+    os.replace(tmp, gz)
+    return gz
+
+
 def ftp_upload_files(cfg: Config, files: list[Path]) -> None:
     if cfg.ftp_host and not (cfg.ftp_user and cfg.ftp_pass):
         print("[agent] ftp configured partially: missing FTP_USER/FTP_PASS", flush=True)
@@ -5735,39 +6193,25 @@ def ftp_upload_files(cfg: Config, files: list[Path]) -> None:
 
     ftp_debug = (os.getenv("FTP_DEBUG", "0") or "0").strip().lower() in {"1", "true", "yes"}
     ftp_upload_interval_s = float(os.getenv("FTP_UPLOAD_INTERVAL_S", "60") or "60")
-
-    # Upload only the portal-facing files (not raw debug)
-    allow = {
-        "live_status.json",
-        "lead_lag_health.json",
-        "sources_health.json",
-        "deribit_options_public.json",
-        "polymarket_status.json",
-        "polymarket_clob_public.json",
-        "pm_open_orders.json",
-        "pm_scanner_log.csv",
-        "pm_markets_index.json",
-        "pm_scan_candidates.csv",
-        "edge_signals_live.csv",
-        "edge_calculator_live.csv",
-        "pm_orders.csv",
-        "pm_paper_portfolio.json",
-        "pm_paper_positions.csv",
-        "pm_paper_trades.csv",
-        "pm_paper_candidates.csv",
-        "kraken_futures_public.json",
-        "kraken_futures_private.json",
-        "kraken_futures_signals.csv",
-        "kraken_futures_fills.csv",
-        "executed_trades.csv",
-    }
+    # Unchanged content is skipped, but still re-sent this often (0 = never) so the portal does not
+    # flag e.g. a header-only pm_paper_positions.csv as stale.
+    ftp_refresh_s = float(os.getenv("FTP_UPLOAD_REFRESH_S", "120") or "120")
+    ftp_keepalive = (os.getenv("FTP_KEEPALIVE", "1") or "1").strip().lower() not in {"0", "false", "no"}
+    # Parallel STORs, one control connection each. Shared hosts often cap concurrent logins,
+    # so this stays serial unless raised explicitly.
+    ftp_workers = max(1, min(int(os.getenv("FTP_UPLOAD_WORKERS", "1") or "1"), 8))
+    # Optional: one STOR per tick. Changed files are zipped into outputs_bundle.zip (same layout as
+    # UPLOAD_BUNDLE_ZIP for the HTTP uploader); the site must unpack it, so this is opt-in.
+    ftp_bundle_zip = (os.getenv("FTP_UPLOAD_BUNDLE_ZIP", "0") or "0").strip().lower() in {"1", "true", "yes"}
+    # Optional: send the _FTP_GZIP_JSON files gzipped (needs the web/.htaccess rule on the site).
+    ftp_gzip_json = (os.getenv("FTP_UPLOAD_GZIP_JSON", "0") or "0").strip().lower() in {"1", "true", "yes"}
 
     if not files:
         if ftp_debug:
             print("[agent] ftp: no files produced this tick", flush=True)
         return
 
-    matched = [p for p in files if p.name in allow]
+    matched = [p for p in files if p.name in _UPLOAD_ALLOW]
     if ftp_debug:
         print(f"[agent] ftp: tick produced {len(files)} file(s), {len(matched)} eligible", flush=True)
     if not matched:
@@ -5786,13 +6230,20 @@ def ftp_upload_files(cfg: Config, files: list[Path]) -> None:
                 print("[agent] ftp: throttled", flush=True)
             return
 
-    # Only upload files that changed since last successful upload (always upload live_status.json)
+    # Only upload files that changed since last successful upload (always upload live_status.json).
+    # Most outputs are rewritten every tick, so a newer mtime is confirmed with a content digest.
+    # The mtime recorded after the upload is the one seen here: with background uploads the tick
+    # thread may replace a file mid-transfer, and that newer version must still count as changed.
     to_upload: list[Path] = []
+    digests: dict[str, bytes] = {}
+    mtimes: dict[str, float] = {}
     for p in matched:
         try:
             mtime = float(p.stat().st_mtime)
         except Exception:
             mtime = None  # best-effort
+        else:
+            mtimes[p.name] = mtime
 
         if p.name == "live_status.json":
             to_upload.append(p)
@@ -5804,6 +6255,17 @@ def ftp_upload_files(cfg: Config, files: list[Path]) -> None:
 
         last_mtime = _ftp_last_uploaded_mtime.get(p.name)
         if last_mtime is None or mtime > (last_mtime + 1e-6):
+            try:
+                digest = hashlib.blake2b(p.read_bytes(), digest_size=16).digest()
+            except Exception:
+                to_upload.append(p)
+                continue
+            last_sent = _ftp_last_sent_mono.get(p.name)
+            refresh_due = ftp_refresh_s > 0 and (last_sent is None or (now_mono - last_sent) >= ftp_refresh_s)
+            if _ftp_last_uploaded_digest.get(p.name) == digest and not refresh_due:
+                _ftp_last_uploaded_mtime[p.name] = mtime
+                continue
+            digests[p.name] = digest
             to_upload.append(p)
 
     if not to_upload:
@@ -5811,18 +6273,38 @@ def ftp_upload_files(cfg: Config, files: list[Path]) -> None:
             print("[agent] ftp: nothing changed; skipping", flush=True)
         return
 
-    def _upload_once_ftp(paths: list[Path]) -> list[str]:
-        uploaded_local: list[str] = []
-        with FTP() as ftp:
+    def _ftp_close(ftp: FTP) -> None:
+        try:
+            ftp.quit()
+        except Exception:
+            try:
+                ftp.close()
+            except Exception:
+                pass
+
+    def _ftp_open() -> FTP:
+        # ftps = explicit FTP over TLS (AUTH TLS on port 21), with the data channels protected too.
+        ftp = FTP_TLS() if cfg.ftp_protocol == "ftps" else FTP()
+        try:
             try:
                 ftp.connect(ftp_host, int(cfg.ftp_port), timeout=20)
             except Exception as e:
                 raise RuntimeError(f"ftp connect failed: {type(e).__name__}: {e!r}") from e
+            try:
+                if ftp.sock is not None:
+                    ftp.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except Exception:
+                pass
+            ftp.set_pasv(True)
 
             try:
                 ftp.login(ftp_user, ftp_pass)
+                if isinstance(ftp, FTP_TLS):
+                    ftp.prot_p()
             except Exception as e:
                 raise RuntimeError(f"ftp login failed: {type(e).__name__}: {e!r}") from e
+            # Binary mode once per session; _ftp_stor() does not re-send TYPE I per file.
+            ftp.voidcmd("TYPE I")
 
             # Ensure remote directory exists by walking segments
             remote = cfg.ftp_remote_dir.strip("/")
@@ -5844,15 +6326,80 @@ def ftp_upload_files(cfg: Config, files: list[Path]) -> None:
                         ftp.cwd(part)
                     except Exception as e:
                         raise RuntimeError(f"ftp cwd({part!r}) failed: {type(e).__name__}: {e!r}") from e
+        except Exception:
+            _ftp_close(ftp)
+            raise
+        return ftp
+
+    def _ftp_stor(ftp: FTP, name: str, f: Any) -> None:
+        # storbinary() minus its per-call TYPE I round-trip (the session is already binary).
+        conn = ftp.transfercmd(f"STOR {name}")
+        with conn:
+            while True:
+                buf = f.read(65536)
+                if not buf:
+                    break
+                conn.sendall(buf)
+            # ftps: end the protected data channel with a TLS close_notify, as storbinary() does;
+            # servers may otherwise discard or truncate the transfer.
+            if isinstance(conn, ssl.SSLSocket):
+                conn.unwrap()
+        ftp.voidresp()
+
+    def _ftp_acquire() -> FTP:
+        # Reuse a connection parked by an earlier upload when it still answers NOOP; otherwise
+        # pay the connect+login+cwd handshake once and park the fresh connection afterwards.
+        while True:
+            try:
+                ftp = _ftp_pool.pop()
+            except IndexError:
+                return _ftp_open()
+            try:
+                ftp.voidcmd("NOOP")
+                return ftp
+            except Exception:
+                _ftp_close(ftp)
 
+    def _ftp_upload_group(paths: list[Path]) -> list[str]:
+        ftp = _ftp_acquire()
+        uploaded_local: list[str] = []
+        try:
             for path in paths:
                 try:
                     with path.open("rb") as f:
-                        ftp.storbinary(f"STOR {path.name}", f)
+                        _ftp_stor(ftp, path.name, f)
                 except Exception as e:
                     raise RuntimeError(f"ftp stor failed for {path.name}: {type(e).__name__}: {e!r}") from e
                 uploaded_local.append(path.name)
+        except Exception:
+            _ftp_close(ftp)
+            raise
 
+        if ftp_keepalive and len(_ftp_pool) < ftp_workers:
+            _ftp_pool.append(ftp)
+        else:
+            _ftp_close(ftp)
+        return uploaded_local
+
+    def _upload_once_ftp(paths: list[Path]) -> list[str]:
+        # FTP is one transfer per control connection, so parallel uploads use one connection
+        # per worker, each storing a round-robin share of the files.
+        n = max(1, min(ftp_workers, len(paths)))
+        if n == 1:
+            return _ftp_upload_group(paths)
+
+        uploaded_local: list[str] = []
+        first_err: Exception | None = None
+        with ThreadPoolExecutor(max_workers=n, thread_name_prefix="ftp_upload") as ex:
+            futs = [ex.submit(_ftp_upload_group, paths[i::n]) for i in range(n)]
+            for fut in futs:
+                try:
+                    uploaded_local.extend(fut.result())
+                except Exception as e:
+                    if first_err is None:
+                        first_err = e
+        if first_err is not None:
+            raise first_err
         return uploaded_local
 
     def _sftp_mkdir_p(sftp: Any, remote_dir: str) -> None:
@@ -5931,29 +6478,45 @@ def ftp_upload_files(cfg: Config, files: list[Path]) -> None:
 
         return uploaded_local
 
+    to_send = to_upload
+    if ftp_bundle_zip:
+        bundle = cfg.out_dir / "outputs_bundle.zip"
+        tmp = bundle.with_name(bundle.name + ".tmp")
+        # Deflate level 1: JSON/CSV still shrink several-fold at a fraction of the default CPU cost.
+        with zipfile.ZipFile(tmp, mode="w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as z:
+            for path in to_upload:
+                z.write(path, arcname=path.name)
+        os.replace(tmp, bundle)
+        to_send = [bundle]
+    elif ftp_gzip_json:
+        to_send = [_gzip_copy(p) if p.name in _FTP_GZIP_JSON else p for p in to_upload]
+
     # Retry once on transient disconnects (EOFError often means the server dropped the connection)
     try:
         if cfg.ftp_protocol == "sftp":
-            uploaded = _upload_once_sftp(to_upload)
+            uploaded = _upload_once_sftp(to_send)
         else:
-            uploaded = _upload_once_ftp(to_upload)
+            uploaded = _upload_once_ftp(to_send)
     except EOFError:
         time.sleep(2)
         if cfg.ftp_protocol == "sftp":
-            uploaded = _upload_once_sftp(to_upload)
+            uploaded = _upload_once_sftp(to_send)
         else:
-            uploaded = _upload_once_ftp(to_upload)
+            uploaded = _upload_once_ftp(to_send)
+    if uploaded and (ftp_bundle_zip or ftp_gzip_json):
+        uploaded = [p.name for p in to_upload]
 
     if uploaded:
         _ftp_last_upload_mono = now_mono
         for p in to_upload:
-            try:
-                _ftp_last_uploaded_mtime[p.name] = float(p.stat().st_mtime)
-            except Exception:
-                pass
+            _ftp_last_sent_mono[p.name] = now_mono
+            if p.name in mtimes:
+                _ftp_last_uploaded_mtime[p.name] = mtimes[p.name]
+            if p.name in digests:
+                _ftp_last_uploaded_digest[p.name] = digests[p.name]
 
         print(
-            f"[agent] ftp uploaded {len(uploaded)} file(s) via {cfg.ftp_protocol} to {cfg.ftp_host}:{cfg.ftp_remote_dir}: {', '.join(uploaded[:8])}{' ...' if len(uploaded) > 8 else ''}",
+            f"[agent] ftp uploaded {len(uploaded)} file(s){' (bundle zip)' if ftp_bundle_zip else ' (gzip json)' if ftp_gzip_json else ''} via {cfg.ftp_protocol} to {cfg.ftp_host}:{cfg.ftp_remote_dir}: {', '.join(uploaded[:8])}{' ...' if len(uploaded) > 8 else ''}",
             flush=True,
         )
 
@@ -5966,37 +6529,12 @@ def http_upload_files(cfg: Config, files: list[Path]) -> None:
     upload_interval_s = float(os.getenv("UPLOAD_INTERVAL_S", "60") or "60")
     upload_bundle_zip = (os.getenv("UPLOAD_BUNDLE_ZIP", "0") or "0").strip().lower() in {"1", "true", "yes"}
 
-    allow = {
-        "live_status.json",
-        "lead_lag_health.json",
-        "sources_health.json",
-        "deribit_options_public.json",
-        "polymarket_status.json",
-        "polymarket_clob_public.json",
-        "pm_open_orders.json",
-        "pm_scanner_log.csv",
-        "pm_markets_index.json",
-        "pm_scan_candidates.csv",
-        "edge_signals_live.csv",
-        "edge_calculator_live.csv",
-        "pm_orders.csv",
-        "pm_paper_portfolio.json",
-        "pm_paper_positions.csv",
-        "pm_paper_trades.csv",
-        "pm_paper_candidates.csv",
-        "kraken_futures_public.json",
-        "kraken_futures_private.json",
-        "kraken_futures_signals.csv",
-        "kraken_futures_fills.csv",
-        "executed_trades.csv",
-    }
-
     if not files:
         if upload_debug:
             print("[agent] upload: no files produced this tick", flush=True)
         return
 
-    matched = [p for p in files if p.name in allow]
+    matched = [p for p in files if p.name in _UPLOAD_ALLOW]
     if upload_debug:
         print(f"[agent] upload: tick produced {len(files)} file(s), {len(matched)} eligible", flush=True)
     if not matched:
@@ -6011,12 +6549,16 @@ def http_upload_files(cfg: Config, files: list[Path]) -> None:
                 print("[agent] upload: throttled", flush=True)
             return
 
+    # As in ftp_upload_files: record the mtime seen at selection, not after the transfer.
     to_upload: list[Path] = []
+    mtimes: dict[str, float] = {}
     for p in matched:
         try:
             mtime = float(p.stat().st_mtime)
         except Exception:
             mtime = None
+        else:
+            mtimes[p.name] = mtime
 
         if p.name == "live_status.json":
             to_upload.append(p)
@@ -6081,10 +6623,8 @@ def http_upload_files(cfg: Config, files: list[Path]) -> None:
         uploaded = [p.name for p in to_upload]
         _http_last_upload_mono = now_mono
         for p in to_upload:
-            try:
-                _http_last_uploaded_mtime[p.name] = float(p.stat().st_mtime)
-            except Exception:
-                pass
+            if p.name in mtimes:
+                _http_last_uploaded_mtime[p.name] = mtimes[p.name]
 
         print(
             f"[agent] upload posted {len(uploaded)} file(s) (bundle zip) to {cfg.upload_url}: {', '.join(uploaded[:8])}{' ...' if len(uploaded) > 8 else ''}",
@@ -6117,10 +6657,8 @@ def http_upload_files(cfg: Config, files: list[Path]) -> None:
     if uploaded:
         _http_last_upload_mono = now_mono
         for p in to_upload:
-            try:
-                _http_last_uploaded_mtime[p.name] = float(p.stat().st_mtime)
-            except Exception:
-                pass
+            if p.name in mtimes:
+                _http_last_uploaded_mtime[p.name] = mtimes[p.name]
 
         print(
             f"[agent] upload posted {len(uploaded)} file(s) to {cfg.upload_url}: {', '.join(uploaded[:8])}{' ...' if len(uploaded) > 8 else ''}",
@@ -6128,6 +6666,30 @@ def http_upload_files(cfg: Config, files: list[Path]) -> None:
         )
 
 
+def upload_files(cfg: Config, files: list[Path]) -> None:
+    try:
+        if cfg.upload_url and cfg.upload_api_key:
+            http_upload_files(cfg, files)
+        else:
+            ftp_upload_files(cfg, files)
+        _last_upload.update({"ok": True, "ts": utc_now_iso(), "error": None})
+    except Exception as e:
+        # Keep loop alive; surface error in live_status on next tick.
+        print(f"[agent] upload failed: {type(e).__name__}: {e!r}", flush=True)
+        _last_upload.update({"ok": False, "ts": utc_now_iso(), "error": f"{type(e).__name__}: {e}"})
+
+
+def _upload_worker(cfg: Config, q: queue.Queue[list[Path]]) -> None:
+    # Sole caller of the uploaders once started, so their module-level throttle/pool state
+    # stays single-threaded.
+    while True:
+        files = q.get()
+        try:
+            upload_files(cfg, files)
+        finally:
+            q.task_done()
+
+
 def main() -> None:
     cfg = load_config()
     cfg.out_dir.mkdir(parents=True, exist_ok=True)
@@ -6170,6 +6732,9 @@ def main() -> None:
     )
 
     consecutive_failures = 0
+    # Sleep per failure streak: the plain interval while healthy, then doubled per consecutive
+    # failure, capped at 4 doublings / 300s.
+    backoff_sleep_s = (float(cfg.interval_s),) + tuple(min(float(cfg.interval_s) * (1 << k), 300.0) for k in range(1, 5))
 
     # Live runtime: create a single live client + optional user websocket.
     pm_live_client: Any | None = None
@@ -6178,15 +6743,7 @@ def main() -> None:
     pm_user_wss: PolymarketUserWssClient | None = None
     pm_user_wss_status: dict[str, Any] = {}
 
-    poly_trading_requested = bool(
-        cfg.trading_mode == "live"
-        and cfg.poly_live_confirm == "YES"
-        and cfg.poly_private_key
-        and cfg.poly_api_key
-        and cfg.poly_api_secret
-        and cfg.poly_api_passphrase
-    )
-    if poly_trading_requested:
+    if cfg.poly_trading_configured:
         try:
             pm_live_client = pm_make_live_client(
                 PolymarketClobLiveConfig(
@@ -6232,23 +6789,47 @@ def main() -> None:
         except Exception as e:
             pm_user_wss_status.update({"ok": False, "error": str(e)})
 
+    # Optional: market-channel websocket for orderbooks (public, no auth). Tokens are added by
+    # write_outputs() as it resolves them; until books arrive, everything is fetched over REST.
+    pm_market_wss: PolymarketMarketWssClient | None = None
+    if cfg.pm_market_wss_enable:
+        try:
+            pm_market_wss = PolymarketMarketWssClient(wss_url=cfg.poly_wss_url or "wss://ws-subscriptions-clob.polymarket.com/ws/")
+            pm_market_wss.start()
+        except Exception as e:
+            print(f"[agent] pm_market_wss disabled: {e}", flush=True)
+            pm_market_wss = None
+
+    # Upload off the tick thread (UPLOAD_BACKGROUND=1): the next tick's fetches overlap the
+    # previous tick's FTP/HTTP transfer. At most one batch waits; a newer tick merges into it.
+    upload_q: queue.Queue[list[Path]] | None = None
+    if (os.getenv("UPLOAD_BACKGROUND", "1") or "1").strip().lower() not in {"0", "false", "no"}:
+        upload_q = queue.Queue(maxsize=1)
+        threading.Thread(target=_upload_worker, args=(cfg, upload_q), name="uploader", daemon=True).start()
+
     pm_exec: ThreadPoolExecutor | None = None
     try:
         if cfg.pm_orderbook_workers > 1:
             pm_exec = ThreadPoolExecutor(max_workers=int(cfg.pm_orderbook_workers), thread_name_prefix="pm_ob")
 
         while True:
+            tick_t0 = time.monotonic()
             ts = utc_now_iso()
             tick_count += 1
 
             pm: dict[str, Any] | None = None
             kraken: dict[str, Any] | None = None
 
-            try:
-                if cfg.polymarket_public_url:
+            # The two raw snapshots are independent: fetch Polymarket on the (idle) orderbook pool
+            # while Kraken is fetched here.
+            pm_fut: Future[dict[str, Any]] | None = None
+            if pm_exec is not None and cfg.polymarket_public_url and cfg.kraken_public_url:
+                pm_fut = pm_exec.submit(fetch_pm_public, base_url=cfg.polymarket_public_url)
+            elif cfg.polymarket_public_url:
+                try:
                     pm = fetch_pm_public(base_url=cfg.polymarket_public_url)
-            except Exception as e:
-                pm = {"error": str(e), "ts": ts}
+                except Exception as e:
+                    pm = {"error": str(e), "ts": ts}
 
             try:
                 if cfg.kraken_public_url:
@@ -6256,6 +6837,12 @@ def main() -> None:
             except Exception as e:
                 kraken = {"error": str(e), "ts": ts}
 
+            if pm_fut is not None:
+                try:
+                    pm = pm_fut.result()
+                except Exception as e:
+                    pm = {"error": str(e), "ts": ts}
+
             # Optional: verify keys via a private endpoint (paper-first, no orders)
             if cfg.kraken_keys_path and cfg.kraken_keys_path.exists():
                 try:
@@ -6286,21 +6873,25 @@ def main() -> None:
                         pm_user_wss_status["reconcile_error"] = str(e)
                         pm_position_store.mark_reconciled()
 
-                files = write_outputs(
-                    cfg,
-                    pm=pm,
-                    kraken=kraken,
-                    lead_lag_engine=lead_lag_engine,
-                    pm_trend_engine=pm_trend_engine,
-                    health_tracker=health_tracker,
-                    latency_tracker=latency_tracker,
-                    runtime_cache=runtime_cache,
-                    pm_orderbook_executor=pm_exec,
-                    pm_live_client=pm_live_client,
-                    pm_live_error=pm_live_error,
-                    pm_position_store=pm_position_store,
-                    pm_user_wss_status=pm_user_wss_status,
-                )
+                # Per-tick CSV event rows (orders, paper trades, candidates, ...) are buffered and
+                # written once per file when the tick finishes, before the upload step.
+                with csv_append_batch():
+                    files = write_outputs(
+                        cfg,
+                        pm=pm,
+                        kraken=kraken,
+                        lead_lag_engine=lead_lag_engine,
+                        pm_trend_engine=pm_trend_engine,
+                        health_tracker=health_tracker,
+                        latency_tracker=latency_tracker,
+                        runtime_cache=runtime_cache,
+                        pm_orderbook_executor=pm_exec,
+                        pm_live_client=pm_live_client,
+                        pm_live_error=pm_live_error,
+                        pm_position_store=pm_position_store,
+                        pm_user_wss_status=pm_user_wss_status,
+                        pm_market_wss=pm_market_wss,
+                    )
                 consecutive_failures = 0
             except Exception as e:
                 consecutive_failures += 1
@@ -6334,34 +6925,46 @@ def main() -> None:
                 # In a later step: log killswitch events and prevent any live actions.
                 pass
 
-            try:
-                if cfg.upload_url and cfg.upload_api_key:
-                    http_upload_files(cfg, files)
+            if upload_q is None:
+                upload_files(cfg, files)
+            else:
+                try:
+                    pending = upload_q.get_nowait()
+                except queue.Empty:
+                    pass
                 else:
-                    ftp_upload_files(cfg, files)
-            except Exception as e:
-                # Keep loop alive; surface error in live_status on next tick.
-                print(f"[agent] upload failed: {type(e).__name__}: {e!r}", flush=True)
-
-            if run_once:
-                print("[agent] RUN_ONCE=1 -> exiting after single tick")
-                return
-
-            if run_ticks > 0 and tick_count >= run_ticks:
-                print(f"[agent] RUN_TICKS={run_ticks} -> exiting after {tick_count} ticks")
+                    # The uploader is still busy with an older batch; send the union once it is free.
+                    upload_q.task_done()
+                    files = list(dict.fromkeys([*pending, *files]))
+                upload_q.put(files)
+
+            if run_once or (run_ticks > 0 and tick_count >= run_ticks):
+                if upload_q is not None:
+                    upload_q.join()
+                if run_once:
+                    print("[agent] RUN_ONCE=1 -> exiting after single tick")
+                else:
+                    print(f"[agent] RUN_TICKS={run_ticks} -> exiting after {tick_count} ticks")
                 return
 
-            # Drift stability: simple exponential backoff on repeated failures.
-            sleep_s = float(cfg.interval_s)
-            if consecutive_failures > 0:
-                sleep_s = min(float(cfg.interval_s) * (2 ** min(consecutive_failures, 4)), 300.0)
-            time.sleep(sleep_s)
+            # Drift stability: the next tick starts interval_s after this one started (not after it
+            # ended), with simple exponential backoff on repeated failures.
+            tick_s = time.monotonic() - tick_t0
+            sleep_s = backoff_sleep_s[min(consecutive_failures, 4)]
+            if consecutive_failures == 0 and 0 < sleep_s < tick_s:
+                print(f"[agent] tick overran interval: took {tick_s:.2f}s > interval_s={cfg.interval_s}", flush=True)
+            time.sleep(max(0.0, sleep_s - tick_s))
     finally:
         try:
             if pm_exec is not None:
                 pm_exec.shutdown(wait=False, cancel_futures=True)
         except Exception:
             pass
+        try:
+            if _KF_PREFETCH_POOL is not None:
+                _KF_PREFETCH_POOL.shutdown(wait=False, cancel_futures=True)
+        except Exception:
+            pass
 
         try:
             if pm_user_wss is not None:
@@ -6369,6 +6972,12 @@ def main() -> None:
         except Exception:
             pass
 
+        try:
+            if pm_market_wss is not None:
+                pm_market_wss.stop(timeout_s=2.0)
+        except Exception:
+            pass
+
 
 if __name__ == "__main__":
     main()